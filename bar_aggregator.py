@@ -0,0 +1,301 @@
+"""
+다중 시간프레임 OHLCV 봉 생성기
+체결 틱 스트림에서 종목 × 시간프레임(기본 1초/10초/1분) 봉을 증분 생성
+- 시가/고가/저가/종가, 체결량, 거래대금(VWAP), 체결 건수, 봉 마지막 체결 시점 호가
+- 체결 없는 구간은 직전 종가로 빈 봉 생성 (설정시)
+- 완성된 봉은 등록된 싱크(예: BarCSVSink)로 전달
+틱 CSV를 사후에 반복 리샘플링하던 작업을 수집 단계에서 1회로 대체
+"""
+
+import os
+import csv
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import DataConfig
+
+# 봉에 남기는 호가 필드 (봉 마지막 체결 시점)
+BAR_BOOK_FIELDS = ['ask1', 'bid1', 'ask1_qty', 'bid1_qty']
+
+BAR_COLUMNS = (['start_ms', 'stock_code', 'timeframe', 'open', 'high', 'low', 'close',
+                'volume', 'vwap', 'trade_count'] + BAR_BOOK_FIELDS)
+
+class Bar:
+    """봉 1개 (start_ms 포함, start_ms + timeframe 미포함 구간)"""
+
+    __slots__ = ('stock_code', 'timeframe', 'start_ms', 'open', 'high', 'low', 'close',
+                 'volume', 'turnover', 'trade_count', 'book')
+
+    def __init__(self, stock_code: str, timeframe: int, start_ms: int, price: int, book: Dict = None):
+        self.stock_code = stock_code
+        self.timeframe = timeframe  # 초
+        self.start_ms = start_ms
+        self.open = self.high = self.low = self.close = price
+        self.volume = 0
+        self.turnover = 0  # Σ 체결가 × 체결량 (VWAP 분자, 정수)
+        self.trade_count = 0
+        self.book = book or {}
+
+    @property
+    def end_ms(self) -> int:
+        return self.start_ms + self.timeframe * 1000
+
+    @property
+    def vwap(self) -> float:
+        """거래량 가중 평균가 (체결량 0이면 종가)"""
+        return self.turnover / self.volume if self.volume else self.close
+
+    def add_trade(self, price: int, qty: int, book: Dict):
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += qty
+        self.turnover += price * qty
+        self.trade_count += 1
+        self.book = book
+
+    def to_row(self) -> Dict:
+        row = {
+            'start_ms': self.start_ms,
+            'stock_code': self.stock_code,
+            'timeframe': self.timeframe,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume,
+            'vwap': self.vwap,
+            'trade_count': self.trade_count,
+        }
+        for field in BAR_BOOK_FIELDS:
+            row[field] = self.book.get(field, 0)
+        return row
+
+class _SeriesState:
+    """종목 × 시간프레임 진행 상태"""
+
+    __slots__ = ('stock_code', 'current', 'next_start_ms', 'last_close', 'last_book', 'last_trade_end_ms')
+
+    def __init__(self, stock_code: str, start_ms: int):
+        self.stock_code = stock_code
+        self.current: Optional[Bar] = None
+        self.next_start_ms = start_ms  # 아직 내보내지 않은 첫 구간 시작
+        self.last_close = 0
+        self.last_book: Dict = {}
+        self.last_trade_end_ms = start_ms  # 마지막 체결 봉 끝 (빈 봉 상한 기준)
+
+class BarAggregator:
+    """
+    체결 틱 → 다중 시간프레임 봉 (DataProcessor가 체결마다 on_trade 호출)
+    - 봉 완성: 다음 구간 체결 도착시 또는 flush(now_ms) (타이머) - 체결 없는 종목도 제때 봉 마감
+    - 빈 구간: fill_empty면 직전 종가 OHLC, 거래량 0 봉 (첫 체결 이전 구간은 생성 안함)
+      마지막 체결 봉 이후 max_fill개까지만 - flush가 주기마다 1구간씩 호출돼도 상한 유지, close_all 이후는 다음 체결까지 중단
+    - 체결량: 누적거래량(FID 13) 차분 (첫 체결은 FID 15 체결량 trade_volume)
+    """
+
+    def __init__(self, timeframes: Iterable[int] = None, fill_empty: bool = None, max_fill: int = None):
+        self.logger = logging.getLogger(__name__)
+
+        self.timeframes: List[int] = sorted(set(DataConfig.BAR_TIMEFRAMES if timeframes is None else timeframes))
+        self.fill_empty = DataConfig.BAR_FILL_EMPTY if fill_empty is None else fill_empty
+        self.max_fill = DataConfig.BAR_MAX_FILL if max_fill is None else max_fill
+
+        # (종목, 시간프레임) -> 진행 상태, 종목 -> 직전 누적거래량
+        self.series: Dict[Tuple[str, int], _SeriesState] = {}
+        self.last_cum_volume: Dict[str, int] = {}
+
+        # 시간프레임 -> 싱크 목록 (fn(bar))
+        self.sinks: Dict[int, List[Callable[[Bar], None]]] = {timeframe: [] for timeframe in self.timeframes}
+
+        # 통계
+        self.emitted_counts: Dict[int, int] = {timeframe: 0 for timeframe in self.timeframes}
+        self.empty_counts: Dict[int, int] = {timeframe: 0 for timeframe in self.timeframes}
+
+    def add_sink(self, sink: Callable[[Bar], None], timeframes: Iterable[int] = None):
+        """완성 봉 싱크 등록 (timeframes None이면 전체 시간프레임)"""
+        for timeframe in (self.timeframes if timeframes is None else timeframes):
+            if timeframe in self.sinks:
+                self.sinks[timeframe].append(sink)
+
+    # ------------------------------------------------------------------------
+    # 입력
+    # ------------------------------------------------------------------------
+
+    def on_trade(self, stock_code: str, tick_data: Dict):
+        """체결 틱 반영 (tick_data: 호가가 병합된 체결 데이터 - time, current_price, volume)"""
+        price = int(tick_data.get('current_price', 0))
+        if price <= 0 or not self.timeframes:
+            return
+
+        time_ms = int(tick_data.get('time', 0))
+        cum_volume = int(tick_data.get('volume', 0))
+        prev_cum = self.last_cum_volume.get(stock_code)
+        if prev_cum is None or cum_volume < prev_cum:
+            qty = int(tick_data.get('trade_volume', 0))  # 첫 체결 또는 누적값 초기화
+        else:
+            qty = cum_volume - prev_cum
+        self.last_cum_volume[stock_code] = cum_volume
+
+        book = {field: tick_data.get(field, 0) for field in BAR_BOOK_FIELDS}
+
+        for timeframe in self.timeframes:
+            span_ms = timeframe * 1000
+            start_ms = time_ms - time_ms % span_ms
+            key = (stock_code, timeframe)
+            state = self.series.get(key)
+            if state is None:
+                state = self.series[key] = _SeriesState(stock_code, start_ms)
+
+            # 이전 구간 마감 (늦게 도착한 틱은 현재 봉에 합침)
+            if start_ms > state.next_start_ms:
+                self._advance(state, timeframe, start_ms)
+
+            if state.current is None:
+                state.current = Bar(stock_code, timeframe, max(start_ms, state.next_start_ms), price, book)
+            state.current.add_trade(price, qty, book)
+
+    def flush(self, now_ms: int):
+        """now_ms 기준으로 끝난 구간의 봉 마감 (타이머 호출 - 체결 없는 종목/빈 구간 처리)"""
+        for (_, timeframe), state in self.series.items():
+            span_ms = timeframe * 1000
+            self._advance(state, timeframe, now_ms - now_ms % span_ms)
+
+    def close_all(self):
+        """진행 중인 봉까지 모두 내보냄 (장 마감/종료시) - 다음 체결 전까지 빈 봉 생성 안함"""
+        for state in self.series.values():
+            self._emit_current(state)
+            state.last_close = 0
+
+    def remove_stock(self, stock_code: str):
+        """종목 제거 - 진행 중인 봉 내보내고 상태 정리"""
+        for timeframe in self.timeframes:
+            state = self.series.pop((stock_code, timeframe), None)
+            if state:
+                self._emit_current(state)
+        self.last_cum_volume.pop(stock_code, None)
+
+    # ------------------------------------------------------------------------
+    # 봉 마감
+    # ------------------------------------------------------------------------
+
+    def _advance(self, state: _SeriesState, timeframe: int, until_start_ms: int):
+        """until_start_ms 이전 구간 봉을 모두 내보냄 (진행 봉 + 빈 구간)"""
+        span_ms = timeframe * 1000
+        current = state.current
+        if current is not None:
+            if current.start_ms >= until_start_ms:
+                return
+            self._emit_current(state)
+
+        if state.next_start_ms >= until_start_ms or not state.last_close:
+            state.next_start_ms = max(state.next_start_ms, until_start_ms)
+            return
+
+        # 빈 구간 (마지막 체결 봉 이후 max_fill개까지, 그 이후 공백은 건너뜀)
+        if self.fill_empty:
+            fill_until_ms = min(until_start_ms, state.last_trade_end_ms + self.max_fill * span_ms)
+            start_ms = state.next_start_ms
+            while start_ms < fill_until_ms:
+                empty = Bar(state.stock_code, timeframe, start_ms, state.last_close, state.last_book)
+                self._emit(empty)
+                self.empty_counts[timeframe] += 1
+                start_ms += span_ms
+        state.next_start_ms = until_start_ms
+
+    def _emit_current(self, state: _SeriesState):
+        bar = state.current
+        if bar is None:
+            return
+        state.current = None
+        state.next_start_ms = bar.end_ms
+        state.last_close = bar.close
+        state.last_book = bar.book
+        state.last_trade_end_ms = bar.end_ms
+        self._emit(bar)
+
+    def _emit(self, bar: Bar):
+        self.emitted_counts[bar.timeframe] += 1
+        for sink in self.sinks.get(bar.timeframe, ()):
+            try:
+                sink(bar)
+            except Exception as e:
+                self.logger.error(f"봉 싱크 처리 실패 ({bar.stock_code} {bar.timeframe}s): {e}")
+
+    def get_statistics(self) -> Dict:
+        """시간프레임별 생성 봉 수"""
+        return {
+            'timeframes': self.timeframes,
+            'series': len(self.series),
+            'emitted': dict(self.emitted_counts),
+            'empty': dict(self.empty_counts)
+        }
+
+class BarCSVSink:
+    """
+    봉 CSV 저장 싱크 - {BAR_DIR}/{종목}_{N}s_bars_{YYYYMMDD}.csv (append, 새 파일만 헤더)
+    일정 개수마다 또는 flush/close시 디스크 반영
+    """
+
+    def __init__(self, base_dir: str = None, flush_every: int = 100):
+        self.logger = logging.getLogger(__name__)
+        self.base_dir = base_dir or DataConfig.BAR_DIR
+        self.flush_every = flush_every
+
+        self.files: Dict[Tuple[str, int, str], Tuple] = {}  # (종목, 시간프레임, 일자) -> (파일, writer)
+        self.pending = 0
+        self.write_count = 0
+
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def get_filepath(self, stock_code: str, timeframe: int, date_str: str) -> str:
+        return os.path.join(self.base_dir, f"{stock_code}_{timeframe}s_bars_{date_str}.csv")
+
+    def __call__(self, bar: Bar):
+        date_str = datetime.fromtimestamp(bar.start_ms / 1000).strftime('%Y%m%d')
+        key = (bar.stock_code, bar.timeframe, date_str)
+        entry = self.files.get(key)
+        if entry is None:
+            filepath = self.get_filepath(bar.stock_code, bar.timeframe, date_str)
+            new_file = not os.path.exists(filepath)
+            handle = open(filepath, 'a', newline='', encoding='utf-8')
+            writer = csv.DictWriter(handle, fieldnames=BAR_COLUMNS)
+            if new_file:
+                writer.writeheader()
+            entry = self.files[key] = (handle, writer)
+            self._close_other_dates(key)
+
+        entry[1].writerow(bar.to_row())
+        self.write_count += 1
+        self.pending += 1
+        if self.pending >= self.flush_every:
+            self.flush()
+
+    def _close_other_dates(self, key: Tuple[str, int, str]):
+        """같은 종목/시간프레임의 다른 일자 파일 닫기 (날짜가 바뀌면 이전 일자 파일은 더 쓰지 않음)"""
+        for other in [other for other in self.files if other[:2] == key[:2] and other != key]:
+            try:
+                self.files.pop(other)[0].close()
+            except Exception as e:
+                self.logger.error(f"봉 CSV 닫기 실패: {e}")
+
+    def flush(self):
+        for handle, _ in self.files.values():
+            handle.flush()
+        self.pending = 0
+
+    def close_stock(self, stock_code: str):
+        """종목 파일 닫기"""
+        for key in [key for key in self.files if key[0] == stock_code]:
+            self.files.pop(key)[0].close()
+
+    def close(self):
+        for handle, _ in self.files.values():
+            try:
+                handle.close()
+            except Exception as e:
+                self.logger.error(f"봉 CSV 닫기 실패: {e}")
+        self.files.clear()
+        self.logger.info(f"봉 CSV 저장 종료: {self.write_count:,}개")
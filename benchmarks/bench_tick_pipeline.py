@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+틱 파이프라인 벤치마크
+PyQt5/OCX 없이 합성 시장 데이터(synthetic_market)로 처리량(ticks/sec)과 틱당 지연(p50/p99) 측정
+- IndicatorCalculator.update_tick_data
+- DataProcessor.process_realdata (체결 + 호가 이벤트)
+- CSVWriter.write_indicators
+- BatchCSVWriter.write_indicators (배치 크기별, 마지막 flush 포함)
+
+저장된 기준값(baseline.json) 대비 처리량이 허용 오차 이상 떨어지면 종료코드 1
+
+사용법:
+    python benchmarks/bench_tick_pipeline.py                     # 측정 + 기준값 비교
+    python benchmarks/bench_tick_pipeline.py --update-baseline   # 기준값 갱신
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+from typing import Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from synthetic_market import SyntheticMarket, MarketProfile, load_profiles
+from data_processor import IndicatorCalculator, DataProcessor
+from csv_writer import CSVWriter, BatchCSVWriter
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+BATCH_SIZES = [1, 10, 100, 1000]
+DEFAULT_TOLERANCE = 0.3  # 기준 처리량 대비 30% 이상 느려지면 회귀
+
+def percentile(sorted_values: List[int], pct: float) -> float:
+    """정렬된 값 목록의 백분위 (최근접 순위)"""
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return float(sorted_values[idx])
+
+def measure(name: str, items: List, fn: Callable, finish: Callable = None) -> Dict:
+    """
+    items 각각에 fn 실행, 호출별 지연(ns) 기록
+    finish: 측정 마지막에 실행 (배치 flush 등) - 전체 시간에 포함
+    """
+    latencies = []
+    perf_counter_ns = time.perf_counter_ns
+
+    start = perf_counter_ns()
+    for item in items:
+        t0 = perf_counter_ns()
+        fn(item)
+        latencies.append(perf_counter_ns() - t0)
+    if finish:
+        finish()
+    elapsed_ns = perf_counter_ns() - start
+
+    latencies.sort()
+    result = {
+        'ticks': len(items),
+        'ticks_per_sec': len(items) / (elapsed_ns / 1e9) if elapsed_ns else 0.0,
+        'p50_us': percentile(latencies, 50) / 1000,
+        'p99_us': percentile(latencies, 99) / 1000,
+        'max_us': latencies[-1] / 1000 if latencies else 0.0,
+    }
+    print(f"{name:<28} {result['ticks_per_sec']:>12,.0f} ticks/s   "
+          f"p50 {result['p50_us']:>9.1f}us   p99 {result['p99_us']:>9.1f}us   max {result['max_us']:>10.1f}us")
+    return result
+
+def build_inputs(n_trades: int, seed: int):
+    """합성 이벤트 및 체결 틱(호가 병합) / 지표 행 미리 생성"""
+    profiles = load_profiles() or [MarketProfile.default("005930", 70000, 100)]
+    events = SyntheticMarket(profiles, seed=seed).generate(n_trades)
+
+    # 체결 틱에 직전 호가를 병합한 입력 (DataProcessor가 calculator에 넘기는 형태)
+    books: Dict[str, Dict] = {}
+    merged_trades = []
+    for stock_code, real_type, data in events:
+        book = books.setdefault(stock_code, {})
+        book.update(data)
+        if real_type == "주식체결":
+            merged_trades.append((stock_code, dict(book)))
+
+    return profiles, events, merged_trades
+
+def run_benchmarks(n_trades: int, seed: int) -> Dict:
+    profiles, events, merged_trades = build_inputs(n_trades, seed)
+    stock_codes = [profile.stock_code for profile in profiles]
+    print(f"종목 {len(stock_codes)}개, 이벤트 {len(events):,}개 (체결 {len(merged_trades):,}개)\n")
+
+    results = {}
+
+    # 1. IndicatorCalculator.update_tick_data
+    calculators = {code: IndicatorCalculator(code) for code in stock_codes}
+    indicator_rows = []
+
+    def calc(item):
+        stock_code, tick = item
+        indicator_rows.append((stock_code, calculators[stock_code].update_tick_data(tick)))
+
+    results['calculator.update_tick_data'] = measure('calculator.update_tick_data', merged_trades, calc)
+
+    temp_dir = tempfile.mkdtemp(prefix="bench_csv_")
+    try:
+        # 2. DataProcessor.process_realdata (호가 이벤트 포함 전체 스트림)
+        # 스냅샷도 임시 디렉토리 - 운영 스냅샷(DataConfig.SNAPSHOT_FILE)으로 웜 스타트되지 않도록
+        processor = DataProcessor(stock_codes, snapshot_file=os.path.join(temp_dir, "indicator_state.bin"))
+        results['processor.process_realdata'] = measure(
+            'processor.process_realdata', events, lambda e: processor.process_realdata(*e))
+
+        # 3~4. CSV 저장 (임시 디렉토리)
+        writer = CSVWriter(base_dir=os.path.join(temp_dir, "csv"))
+        results['csv_writer'] = measure(
+            'csv_writer', indicator_rows, lambda row: writer.write_indicators(*row), writer.close_all)
+
+        for batch_size in BATCH_SIZES:
+            batch_writer = BatchCSVWriter(base_dir=os.path.join(temp_dir, f"batch_{batch_size}"),
+                                          batch_size=batch_size)
+            name = f'batch_csv_writer[{batch_size}]'
+            results[name] = measure(
+                name, indicator_rows, lambda row: batch_writer.write_indicators(*row), batch_writer.close_all)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return results
+
+def compare_with_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """기준값 대비 처리량 회귀 목록"""
+    regressions = []
+    print(f"\n기준값 비교 (허용 오차 {tolerance * 100:.0f}%)")
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            print(f"  {name:<28} 기준값 없음")
+            continue
+
+        ratio = result['ticks_per_sec'] / base['ticks_per_sec'] if base['ticks_per_sec'] else 1.0
+        status = "OK"
+        if ratio < 1.0 - tolerance:
+            status = "REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<28} {ratio * 100:>6.1f}% of baseline  [{status}]")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="틱 파이프라인 벤치마크")
+    parser.add_argument('--trades', type=int, default=10000, help='합성 체결 수 (전 종목 합계)')
+    parser.add_argument('--seed', type=int, default=0, help='합성 데이터 시드')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='허용 처리량 하락 비율')
+    parser.add_argument('--update-baseline', action='store_true', help='측정 결과를 기준값으로 저장')
+    parser.add_argument('--log-level', default='WARNING', help='파이프라인 로그 레벨 (기본 WARNING)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper()))
+    logging.getLogger().setLevel(getattr(logging, args.log_level.upper()))
+
+    results = run_benchmarks(args.trades, args.seed)
+
+    if args.update_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'trades': args.trades,
+                'seed': args.seed,
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n기준값 저장: {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("\n기준값 파일 없음 - --update-baseline으로 생성하세요")
+        return 0
+
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n[FAIL] 성능 회귀: {', '.join(regressions)}")
+        return 1
+
+    print("\n[OK] 성능 회귀 없음")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+수집기 부하(soak) 테스트
+모의 OCX(KIWOOM_TRANSPORT=mock)로 KiwoomDataCollector 전체를 헤드리스 실행 (Linux, QT_QPA_PLATFORM=offscreen)
+- 부하: 종목 수 × 종목당 피크 체결률(PEAK_TRADES_PER_SEC) × 배율(기본 10배) 체결/초
+  샘플 CSV의 평균 체결 간격으로 합성 시세 속도 배율을 역산 (호가 이벤트는 체결당 평균 BOOK_EVENTS_PER_TRADE개 추가)
+- CommRqData 시세과부하(-200) 확률, 평균 연결 끊김 간격 주입
+- 지정 시간 후 종료, 처리 틱/초 · 수신 지연 · 모의 OCX 통계 · ERROR 로그 수 출력
+- 오류 주입 없이 ERROR 로그가 있거나 비정상 종료시 종료코드 1
+
+CSV/로그는 임시 작업 디렉토리에 저장 (--keep 지정시 보존)
+연결 끊김 주입시 main.check_connection_status의 재시작용 프로세스 종료는 끄고
+KiwoomClient ConnectionMonitor의 재연결/재등록 경로를 검증
+
+사용법:
+    python benchmarks/soak_collector.py --duration 300 --load 10 --throttle 0.05
+    python benchmarks/soak_collector.py --duration 60 --speed 10   # 합성 시세 속도 배율 직접 지정
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+# 종목당 피크 체결률 (체결/초) - 대형주 장 시작 직후 1초 체결 수 상위 구간 가정, 실측값이 있으면 --peak-rate로 조정
+PEAK_TRADES_PER_SEC = 30
+
+class ErrorCounter(logging.Handler):
+    """ERROR 이상 로그 수 집계"""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+        self.samples = []
+
+    def emit(self, record):
+        self.count += 1
+        if len(self.samples) < 10:
+            self.samples.append(f"{record.name}: {record.getMessage()}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="모의 OCX 기반 수집기 부하 테스트")
+    parser.add_argument('--duration', type=float, default=60, help='실행 시간 (초)')
+    parser.add_argument('--load', type=float, default=10, help='피크 부하 배율 (종목 수 × 종목당 피크 체결률 기준)')
+    parser.add_argument('--peak-rate', type=float, default=PEAK_TRADES_PER_SEC, help='종목당 피크 체결률 (체결/초)')
+    parser.add_argument('--speed', type=float, default=None, help='합성 시세 속도 배율 직접 지정 (--load 대신)')
+    parser.add_argument('--throttle', type=float, default=0.0, help='CommRqData -200 반환 확률')
+    parser.add_argument('--disconnect-interval', type=float, default=0.0, help='평균 연결 끊김 간격 (초, 0=없음)')
+    parser.add_argument('--seed', type=int, default=0, help='합성 데이터 시드')
+    parser.add_argument('--keep', action='store_true', help='작업 디렉토리(CSV/로그) 보존')
+    return parser.parse_args()
+
+def nominal_trade_rate(stock_codes, profile_dir: str) -> float:
+    """속도 1배 합성 시세의 전 종목 체결률 (체결/초) - 모의 OCX와 같은 방식으로 샘플 특성을 종목에 순환 배정"""
+    from synthetic_market import MarketProfile, load_profiles
+
+    samples = load_profiles(profile_dir or None) or [MarketProfile.default("000000")]
+    rate = 0.0
+    for idx in range(len(stock_codes)):
+        gaps_ms = samples[idx % len(samples)].gaps_ms
+        rate += 1000.0 / max(sum(gaps_ms) / len(gaps_ms), 0.001)
+    return rate
+
+def main():
+    args = parse_args()
+
+    # config import 전에 환경 설정 (KiwoomConfig는 import 시점에 환경변수를 읽음)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ['KIWOOM_TRANSPORT'] = 'mock'
+    os.environ['KIWOOM_MOCK_SEED'] = str(args.seed)
+    os.environ['KIWOOM_MOCK_THROTTLE'] = str(args.throttle)
+    os.environ['KIWOOM_MOCK_DISCONNECT_INTERVAL'] = str(args.disconnect_interval)
+    os.environ['KIWOOM_MOCK_PROFILE_DIR'] = os.path.join(REPO_DIR, 'pure_websocket_data')
+
+    work_dir = tempfile.mkdtemp(prefix="soak_collector_")
+    os.chdir(work_dir)
+
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    from config import TARGET_STOCKS, DataConfig, KiwoomConfig
+    from main import KiwoomDataCollector
+
+    # 목표 체결률 → 합성 시세 속도 배율 (모의 OCX는 생성시 KiwoomConfig.MOCK_SPEED 사용)
+    base_rate = nominal_trade_rate(TARGET_STOCKS, KiwoomConfig.MOCK_PROFILE_DIR)
+    if args.speed:
+        target_rate = base_rate * args.speed
+        load_text = f"속도 {args.speed:g}배 직접 지정"
+    else:
+        target_rate = len(TARGET_STOCKS) * args.peak_rate * args.load
+        load_text = f"{len(TARGET_STOCKS)}종목 × 피크 {args.peak_rate:g}체결/s × {args.load:g}배"
+    KiwoomConfig.MOCK_SPEED = target_rate / base_rate
+
+    # 종료 타이머를 run() 전에 걸기 위해 QApplication 먼저 생성 (KiwoomClient는 기존 인스턴스 사용)
+    app = QApplication.instance() or QApplication(sys.argv)
+    os.makedirs(DataConfig.LOG_DIR, exist_ok=True)
+    collector = KiwoomDataCollector(TARGET_STOCKS)
+
+    errors = ErrorCounter()
+    logging.getLogger().addHandler(errors)
+
+    if args.disconnect_interval > 0:
+        # 외부 재시작 대신 프로세스 내 재연결 경로 사용 (check_connection_status는 끊김시 sys.exit)
+        collector.check_connection_status = lambda: collector.connection_monitor.check_connection()
+    QTimer.singleShot(int(args.duration * 1000), collector.stop)
+
+    started = time.time()
+    exit_code = 0
+    try:
+        collector.run()
+    except SystemExit as e:
+        exit_code = e.code or 0
+    elapsed = time.time() - started
+
+    # 결과
+    total_events = sum(collector.tick_counts.values())
+    print("\n" + "=" * 60)
+    print(f"부하 테스트 결과 ({elapsed:.1f}초, 종료코드 {exit_code})")
+    print("=" * 60)
+    print(f"목표 부하: {target_rate:,.0f} 체결/s ({load_text}, 합성 시세 속도 {KiwoomConfig.MOCK_SPEED:,.1f}배)")
+    print(f"처리 체결 틱: {collector.trade_count:,}개 ({collector.trade_count / elapsed:,.0f} ticks/s, "
+          f"목표 대비 {collector.trade_count / elapsed / target_rate * 100:.0f}%)")
+    print(f"처리 실시간 이벤트 (체결+호가): {total_events:,}개 ({total_events / elapsed:,.0f} events/s)")
+
+    client = collector.kiwoom_client
+    if client is not None:
+        for name, value in client.ocx.get_statistics().items():
+            print(f"모의 OCX {name}: {value:,.3f}" if isinstance(value, float) else f"모의 OCX {name}: {value:,}")
+        print(f"TR 상태: {client.tr_scheduler.get_status()}")
+
+    if collector.lag_monitor:
+        lag = collector.lag_monitor.get_statistics()
+        print(f"수신 지연 worst p99: {lag['worst_p99_ms']:.1f}ms, 경고 {lag['total_alerts']}회")
+
+    watchdog = collector.system_monitor.loop_watchdog if collector.system_monitor else None
+    if watchdog:
+        loop_stats = watchdog.get_statistics()
+        lag = loop_stats['lag']
+        print(f"이벤트 루프 지연 p50/p99/최대: {lag['p50_ms']:.0f}/{lag['p99_ms']:.0f}/{lag['max_ms']:.0f}ms "
+              f"(핑 {lag['count']:,}회), 정지 {loop_stats['stalls']}회")
+        if loop_stats['stalls']:
+            print(f"  정지 분포(ms): { {bucket: count for bucket, count in loop_stats['stall']['buckets'].items() if count} }")
+
+    print(f"ERROR 로그: {errors.count}건")
+    for sample in errors.samples:
+        print(f"  {sample}")
+
+    os.chdir(REPO_DIR)
+    if args.keep:
+        print(f"\n작업 디렉토리: {work_dir}")
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    # 오류 주입(시세과부하/끊김) 없이 ERROR 로그가 나오면 실패
+    injected = args.throttle > 0 or args.disconnect_interval > 0
+    return 1 if exit_code or (errors.count and not injected) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -33,6 +33,8 @@ class KiwoomConfig:
     SCREEN_NO_BASE = "0101"
     SCREEN_NO_REALTIME = "0150" 
     SCREEN_NO_TR = "0200"
+    SCREEN_NO_REAL_TRADE = "5000"   # 실시간 체결 화면 시작 번호 (화면당 최대 MAX_STOCKS_PER_SCREEN 종목)
+    SCREEN_NO_REAL_HOGA = "6000"    # 실시간 호가 화면 시작 번호
     
     # 계좌 설정 (환경변수에서 로드 또는 별도 파일)
     ACCOUNT_NO = os.getenv("KIWOOM_ACCOUNT", "")
@@ -45,6 +47,41 @@ class KiwoomConfig:
     # TR 제한 설정 (단순화된 사항)
     TR_INTERVAL_SECONDS = 60  # 동일 TR 60초 제한
     MAX_STOCKS_PER_SCREEN = 100  # 화면당 최대 종목 수
+    MAX_REAL_SCREENS = 50        # 실시간 화면 풀(체결/호가)별 최대 화면 수 (키움 화면번호 전체 200개 이내)
+
+    # 실시간 등록 (화면 단위 일괄 SetRealReg, 타이머로 간격 유지 - 이벤트 루프 비차단)
+    REALREG_INTERVAL_MS = 200    # SetRealReg 호출 간격 (ms)
+    REALREG_MAX_RETRIES = 3      # 화면별 등록 실패시 최대 시도 횟수
+    REALREG_VERIFY_SECONDS = 30  # 등록 후 틱 수신 확인 시점 (초) - 무수신 종목 1회 재등록
+
+    # TR 스케줄러 (토큰 버킷) - 키움 조회 제한: 초당 5회, 시간당 1000회
+    TR_PER_SECOND = 5
+    TR_PER_MINUTE = 100
+    TR_PER_HOUR = 1000
+    TR_BURST_PER_SECOND = 2      # 구간별 순간 최대 연속 요청 수 (구간 제한 이내에서 허용)
+    TR_BURST_PER_MINUTE = 20
+    TR_BURST_PER_HOUR = 100
+    TR_POLL_INTERVAL_MS = 100    # 스케줄러 poll 주기 (ms)
+    TR_JITTER_RATIO = 0.1        # 종목별 주기 지터 (±10%)
+    TR_MAX_RETRIES = 3           # 실패시 최대 시도 횟수
+    TR_BACKOFF_INITIAL = 1.0     # 시세과부하(-200) 첫 백오프 (초)
+    TR_BACKOFF_MAX = 60.0        # 최대 백오프 (초)
+    TR_MIN_RATE_SCALE = 0.1      # 시세과부하시 최저 요청속도 배율
+    TR_MAX_IN_FLIGHT = 4         # 동시 응답 대기 TR 수 (TR 화면번호 풀 크기)
+    TR_TIMEOUT_SECONDS = 10      # TR 응답 타임아웃 (초)
+
+    # OCX 전송 계층: "ocx" = 키움 OpenAPI+ (Windows), "mock" = 모의 OCX (mock_ocx, 헤드리스 부하 테스트)
+    TRANSPORT = os.getenv("KIWOOM_TRANSPORT", "ocx")
+
+    # 모의 OCX 설정 (TRANSPORT="mock")
+    MOCK_SPEED = float(os.getenv("KIWOOM_MOCK_SPEED", "1"))             # 실시간 이벤트 속도 배율 (10 = 샘플 대비 10배)
+    MOCK_SEED = int(os.getenv("KIWOOM_MOCK_SEED", "0"))
+    MOCK_PROFILE_DIR = os.getenv("KIWOOM_MOCK_PROFILE_DIR", "")       # 합성 시세 샘플 CSV 경로 (빈 값 = DataConfig.CSV_DIR)
+    MOCK_PUMP_INTERVAL_MS = 5                                            # 이벤트 전달 타이머 주기 (ms)
+    MOCK_PUMP_MAX_EVENTS = 500                                           # pump 1회 최대 실시간 이벤트 (밀려도 Qt 타이머가 돌도록)
+    MOCK_TR_DELAY = 0.2                                                  # TR 응답 지연 (초)
+    MOCK_THROTTLE_RATIO = float(os.getenv("KIWOOM_MOCK_THROTTLE", "0"))  # CommRqData -200 반환 확률
+    MOCK_DISCONNECT_INTERVAL = float(os.getenv("KIWOOM_MOCK_DISCONNECT_INTERVAL", "0"))  # 평균 끊김 간격 (초, 0=없음)
     
     # 재연결 설정
     MAX_RECONNECT_ATTEMPTS = 5  # 최대 재연결 시도 횟수
@@ -72,9 +109,79 @@ class DataConfig:
     MA5_WINDOW = 5
     RSI14_WINDOW = 14
     STOCH_WINDOW = 14
+    VOL_RATIO_WINDOW = 20  # vol_ratio 평균 체결량 창 (체결 수)
     
     # 수급 지표 업데이트 주기 (초)
     INVESTOR_UPDATE_INTERVAL = 60  # 1분마다 OPT10059 TR 호출
+
+    # 수급 TR 적응형 갱신 주기 (값 변화가 잦은 종목은 짧게, 정체 종목은 길게)
+    INVESTOR_MIN_INTERVAL = KiwoomConfig.TR_INTERVAL_SECONDS  # 최소 갱신 주기 (초) - 종목별 동일 TR 제한보다 짧을 수 없음
+    INVESTOR_MAX_INTERVAL = 600            # 최대 갱신 주기 (초) - TR 예산 초과시에만 넘어감
+    INVESTOR_TARGET_CHANGE_RATIO = 0.5     # 목표: 갱신 2회 중 1회는 값이 바뀌도록
+    INVESTOR_CHANGE_ALPHA = 0.3            # 변화율 EWMA 계수
+    INVESTOR_TR_BUDGET_PER_MINUTE = KiwoomConfig.TR_PER_HOUR * 0.8 / 60  # 수급 TR 분당 예산 (20%는 기타 TR 여유)
+
+    # 런타임 관심종목 (재시작 없이 종목 추가/삭제)
+    WATCHLIST_FILE = os.getenv("KIWOOM_WATCHLIST_FILE", "")               # 감시 파일 (빈 값 = 사용 안함)
+    WATCHLIST_POLL_MS = 2000                                             # 감시 파일 확인 주기 (ms)
+    WATCHLIST_PORT = int(os.getenv("KIWOOM_WATCHLIST_PORT", "0"))         # 로컬 제어 소켓 포트 (0 = 사용 안함)
+
+    # 장중 수급 시계열 저장 경로 (종목/일자별 바이너리, investor_snapshot_id로 틱 CSV와 조인)
+    INVESTOR_STORE_DIR = os.path.join(CSV_DIR, "investor_flow")
+
+    # 지표 계산기 상태 스냅샷 (같은 거래일 재시작시 복원 - 지표 워밍업 생략)
+    SNAPSHOT_FILE = os.path.join(CSV_DIR, "indicator_state.bin")
+    SNAPSHOT_INTERVAL = 30  # 주기 저장 간격 (초), 종료시에도 저장
+
+    # 스냅샷이 없을 때 당일 CSV 마지막 N행으로 지표 버퍼 워밍업 (z_vol이 틱 버퍼 전체를 쓰므로 버퍼 크기만큼)
+    BACKFILL_ROWS = MAX_TICK_BUFFER
+
+    # 다중 시간프레임 봉 (체결 틱 → OHLCV/VWAP, 빈 구간은 직전 종가로 채움)
+    BAR_TIMEFRAMES = [1, 10, 60]   # 봉 간격 (초), 빈 목록 = 사용 안함
+    BAR_FILL_EMPTY = True          # 체결 없는 구간도 봉 생성
+    BAR_MAX_FILL = 3600            # 마지막 체결 이후 채우는 최대 빈 봉 수 (시간프레임별, 이후 공백은 건너뜀)
+    BAR_FLUSH_MS = 1000            # 봉 마감 확인 타이머 주기 (ms)
+    BAR_DIR = os.path.join(CSV_DIR, "bars")
+
+    # 지표 행 로컬 배포 (CSV 꼬리 읽기 대신 전략 프로세스가 구독 - shm_bus.py)
+    SHM_BUS_ENABLED = True                 # 종목별 공유메모리 seqlock 링
+    SHM_BUS_PREFIX = "kiwoom_ind"          # 공유메모리 이름 접두사 ({접두사}_{종목코드})
+    SHM_BUS_CAPACITY = 1024                # 종목별 링 슬롯 수 (구독자가 이만큼 뒤처지면 건너뜀)
+    BUS_SOCKET_PORT = int(os.getenv("KIWOOM_BUS_PORT", "0"))  # TCP 폴백 포트 (127.0.0.1, 0 = 사용 안함)
+    BUS_SOCKET_FLUSH_MS = 20               # TCP 폴백 일괄 전송 주기 (ms)
+    BUS_SOCKET_MAX_BACKLOG = 4 * 1024 * 1024  # 연결별 전송 대기 한도 (바이트, 넘으면 연결 종료)
+    STATE_TABLE_ENABLED = True             # 전 종목 최신 상태 공유메모리 테이블 (위험관리/UI 조회용)
+    STATE_TABLE_NAME = "kiwoom_state"      # 공유메모리 이름
+    STATE_TABLE_CAPACITY = 256             # 최대 종목 수 (고정 슬롯)
+
+    # 타임스탬프 시계 재동기화 주기 (초) - perf_counter_ns를 벽시계에 재고정
+    CLOCK_RESYNC_SECONDS = 60
+
+    # 시세 지연 (거래소 체결시간 → 로컬 수신) 모니터링
+    FEED_LAG_ALERT_MS = 3000         # 지연 경보 임계값 (ms)
+    FEED_LAG_ALERT_INTERVAL = 30     # 종목별 경보 최소 간격 (초)
+    FEED_LAG_BUCKETS_MS = [100, 250, 500, 1000, 1500, 2000, 3000, 5000, 10000, 30000]  # 히스토그램 버킷 상한
+
+    # 이벤트 루프 정지 감시 (별도 스레드 - 루프가 멈춘 동안에도 감지, system_monitor.EventLoopWatchdog)
+    LOOP_WATCHDOG_ENABLED = True
+    LOOP_PING_INTERVAL_MS = 100      # 핑 주기 (ms)
+    LOOP_STALL_MS = 500              # 정지 판정 임계값 (핑 미처리 시간, ms)
+    LOOP_STALL_SAMPLE_MS = 10        # 정지 중 메인 스레드 스택 샘플링 주기 (ms)
+    LOOP_STALL_MAX_SAMPLES = 3000    # 정지 1건당 최대 샘플 수 (메모리 상한)
+    LOOP_STALL_MAX_REPORTS = 200     # 실행당 정지 리포트 파일 최대 개수
+    LOOP_STALL_DIR = os.path.join(LOG_DIR, "stalls")  # 정지 리포트 경로
+    LOOP_LAG_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000]  # 루프 지연/정지 히스토그램
+
+    # 내장 샘플링 프로파일러 (sampling_profiler.py - 평소 꺼짐, 시그널/제어 파일/제어 소켓으로 켜기)
+    PROFILER_AUTOSTART = os.getenv("KIWOOM_PROFILE", "0") == "1"       # 시작부터 켜기
+    PROFILER_RATE_HZ = 100                # 샘플링 주기 (Hz, 전 스레드)
+    PROFILER_WINDOW_SECONDS = 60          # 파일 기록 구간 (초)
+    PROFILER_MAX_STACKS = 5000            # 구간당 서로 다른 스택 수 상한 (넘으면 한도 초과 프레임으로 합산)
+    PROFILER_MAX_DEPTH = 64               # 스택 깊이 상한 (안쪽 프레임 우선)
+    PROFILER_DIR = os.path.join(LOG_DIR, "profiles")                   # 접힌 스택/요약 파일 경로
+    PROFILER_CONTROL_FILE = os.getenv("KIWOOM_PROFILE_FILE", "profiler.on")  # 있으면 켜짐 (첫 줄 = Hz, 빈 값 = 사용 안함)
+    PROFILER_CONTROL_POLL_SECONDS = 1.0   # 제어 파일 확인 주기 (초)
+    PROFILER_PORT = int(os.getenv("KIWOOM_PROFILER_PORT", "0"))        # 로컬 제어 소켓 포트 (0 = 사용 안함)
     
 # ============================================================================
 # FID 설정 (수정된 사항 - 최적화된 FID 리스트)
@@ -113,7 +220,7 @@ class RealDataFID:
         'change_price': 11,     # 전일대비
         'change_rate': 12,      # 등락율
         'volume': 13,           # 누적거래량
-        'trade_volume': 14,     # 거래량
+        'trade_volume': 15,     # 체결량 (부호 = 매수/매도 체결)
         'trade_time': 20,       # 체결시간(HHMMSS)
         'open_price': 16,       # 시가
         'high_price': 17,       # 고가
@@ -153,6 +260,10 @@ class IndicatorConfig:
     # stochastic 설정
     USE_HOGA_FOR_STOCH = False  # True: 호가로 범위 확대, False: 표준 방식
     
+    # 계산하지 않을 지표 (indicator_registry 지표 이름, 예: ['accel_delta', 'ret_1s'])
+    # 다른 활성 지표가 의존하면 계산은 하되 CSV 컬럼에서는 제외
+    DISABLED_INDICATORS: List[str] = []
+    
     # 기본 데이터 (4개)
     BASIC_FIELDS = [
         'time',           # 시간 (밀리초)
@@ -170,6 +281,13 @@ class IndicatorConfig:
         'stoch_d'        # 스토캐스틱 D
     ]
     
+    # 체결량 (누적거래량 'volume'과 별도 - 체결 1건 수량, FID 15 또는 누적거래량 차분)
+    TRADE_VOLUME_COLUMNS = ['trade_qty']
+    
+    # True: vol_ratio/z_vol/obv_delta를 기존처럼 누적거래량(volume)으로 계산 (이전 CSV와 비교용)
+    # False: 체결량(trade_qty) 시계열로 계산
+    CUMULATIVE_VOLUME_INDICATORS = False
+    
     # 볼륨 지표 (3개)
     VOLUME_INDICATORS = [
         'vol_ratio',     # 거래량 비율
@@ -189,6 +307,25 @@ class IndicatorConfig:
         'ret_1s'         # 1초 수익률
     ]
     
+    # 체결 흐름 지표 (4개) - 누적 상태로 틱당 O(1)
+    FLOW_INDICATORS = [
+        'trade_sign',    # 체결 방향 (+1 매수 / -1 매도, 직전 최우선 호가 기준 Lee-Ready)
+        'session_vwap',  # 당일 누적 VWAP
+        'rolling_vwap',  # 최근 VWAP_WINDOW_MS 구간 VWAP
+        'ofi'            # 주문 흐름 불균형 (Cont OFI, 직전 체결 이후 누적)
+    ]
+    
+    # 호가단위 정규화 지표 (4개) - tick_size.py KRX 주권 호가가격단위 기준 호가 수 (ETF/ETN 종목은 격자가 달라 부정확)
+    TICK_INDICATORS = [
+        'spread_ticks',     # 스프레드 (ask1 - bid1) 호가 수
+        'ask_depth_ticks',  # 매도 1호가 → BIDASK_LEVELS호가 호가 수
+        'bid_depth_ticks',  # 매수 1호가 → BIDASK_LEVELS호가 호가 수
+        'move_ticks'        # 직전 체결가 대비 변동 호가 수
+    ]
+    
+    # 구간 VWAP 창 (밀리초)
+    VWAP_WINDOW_MS = 60_000
+    
     # 호가 가격 (10개)
     HOGA_PRICES = [
         'ask1', 'ask2', 'ask3', 'ask4', 'ask5',
@@ -308,9 +445,36 @@ class IndicatorConfig:
     # bid3_qty~bid5_qty 누락 문제 해결: 전체 36개 지표 모두 포함
     BASIC_33_INDICATORS = EXACT_36_INDICATORS  # 전체 36개 지표 포함 (호가 잔량 10개 모두)
     ALL_INDICATORS_WITH_INVESTOR = BASIC_33_INDICATORS + INVESTOR_COLUMNS
-    
-    # CLAUDE.md 요구사항 준수: 33개 기본 지표 + 11개 수급 지표 = 총 44개 컬럼
-    ALL_INDICATORS = ALL_INDICATORS_WITH_INVESTOR
+
+    # 타임스탬프 컬럼 (2개) - 'time'(수신 ms)과 별도로 저장
+    TIMESTAMP_COLUMNS = [
+        'recv_time_ns',       # 로컬 수신시각 (Unix epoch 나노초, 단조 증가)
+        'exchange_time_ms'    # 거래소 체결시간 (FID 20 HHMMSS → Unix epoch 밀리초)
+    ]
+
+    # 정수로 저장하는 시간 컬럼 (float 변환시 나노초 정밀도 손실)
+    INTEGER_TIME_COLUMNS = ['time'] + TIMESTAMP_COLUMNS
+
+    # 수급 스냅샷 ID (investor_store 시계열 행 번호, 0 = TR 미수신)
+    INVESTOR_SNAPSHOT_COLUMNS = ['investor_snapshot_id']
+
+    # True: 틱마다 수급 11개 컬럼도 함께 저장 (기존 44개 컬럼 형식)
+    # False: 스냅샷 ID만 저장, 수급 값은 investor_store에서 조인 (행 폭 축소)
+    INLINE_INVESTOR_COLUMNS = False
+
+    # 가격 컬럼 (원 단위 정수 - KRX 가격은 호가단위 격자 위 정수, '56200.0' 대신 '56200')
+    PRICE_COLUMNS = ['current_price'] + HOGA_PRICES + ['spread']
+
+    # 정수로 저장하는 컬럼
+    INTEGER_COLUMNS = (INTEGER_TIME_COLUMNS + INVESTOR_SNAPSHOT_COLUMNS + ['trade_sign'] + PRICE_COLUMNS
+                       + TICK_INDICATORS)
+
+    # CLAUDE.md 요구사항 준수: 33개 기본 지표 (+ 수급 11개) + 스냅샷 ID + 타임스탬프 2개
+    ALL_INDICATORS = (
+        (ALL_INDICATORS_WITH_INVESTOR if INLINE_INVESTOR_COLUMNS else BASIC_33_INDICATORS)
+        + INVESTOR_SNAPSHOT_COLUMNS + TIMESTAMP_COLUMNS + FLOW_INDICATORS + TRADE_VOLUME_COLUMNS
+        + TICK_INDICATORS
+    )
 
 # ============================================================================
 # TR 코드 정의
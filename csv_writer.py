@@ -8,10 +8,11 @@ import csv
 import logging
 import threading
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 
 from config import DataConfig, IndicatorConfig, get_csv_filename
+from indicator_registry import REGISTRY
 
 class CSVWriter:
     """
@@ -42,8 +43,20 @@ class CSVWriter:
         # 디렉토리 생성
         self.ensure_directory()
         
-        # 36개 지표 헤더 정의 (CLAUDE.md 수정사항)
-        self.csv_headers = IndicatorConfig.ALL_INDICATORS
+        # 36개 지표 헤더 정의 (CLAUDE.md 수정사항) - 비활성 지표 제외, 사용자 등록 지표 컬럼은 뒤에 추가
+        disabled = set(IndicatorConfig.DISABLED_INDICATORS)
+        disabled.update(REGISTRY.disabled_columns(IndicatorConfig.DISABLED_INDICATORS))
+        self.csv_headers = [column for column in IndicatorConfig.ALL_INDICATORS if column not in disabled]
+        self.csv_headers += [
+            column for column in REGISTRY.get_plan(IndicatorConfig.DISABLED_INDICATORS).columns
+            if column not in self.csv_headers and column not in disabled
+        ]
+
+        # 정수로 저장할 시간 컬럼 (ms/ns)
+        self.integer_headers = set(IndicatorConfig.INTEGER_COLUMNS)
+
+        # 종목별 실제 파일 헤더 (기존 파일을 이어쓰는 경우 그 파일의 헤더 유지)
+        self.stock_headers: Dict[str, List[str]] = {}
         
         self.logger.info(f"CSVWriter 초기화: {self.base_dir}, 배치크기: {self.batch_size}")
     
@@ -76,14 +89,26 @@ class CSVWriter:
             with self.file_locks[stock_code]:
                 # 파일이 이미 존재하는지 확인
                 file_exists = os.path.exists(filepath)
-                
+
+                # 기존 파일은 그 파일의 헤더로 이어쓰기 (컬럼이 추가/변경되어도 열 정렬 유지)
+                fieldnames = self.csv_headers
+                if file_exists:
+                    existing_header = self._read_existing_header(filepath)
+                    if existing_header and existing_header != list(self.csv_headers):
+                        self.logger.warning(
+                            f"기존 CSV 헤더 유지 ({stock_code}): {len(existing_header)}컬럼 "
+                            f"(현재 설정 {len(self.csv_headers)}컬럼)"
+                        )
+                        fieldnames = existing_header
+                self.stock_headers[stock_code] = fieldnames
+
                 # 파일 핸들 생성 (append mode)
                 self.file_handles[stock_code] = open(filepath, 'a', newline='', encoding='utf-8-sig')
-                
+
                 # CSV writer 생성
                 self.csv_writers[stock_code] = csv.DictWriter(
                     self.file_handles[stock_code],
-                    fieldnames=self.csv_headers,
+                    fieldnames=fieldnames,
                     extrasaction='ignore'  # 추가 필드 무시
                 )
                 
@@ -105,6 +130,79 @@ class CSVWriter:
             self.logger.error(f"CSV 초기화 실패 ({stock_code}): {e}")
             return False
     
+    def _read_existing_header(self, filepath: str) -> Optional[List[str]]:
+        """기존 CSV 파일의 헤더 읽기 (첫 줄만)"""
+        try:
+            with open(filepath, 'r', newline='', encoding='utf-8-sig') as f:
+                header = next(csv.reader(f), None)
+            return header or None
+        except Exception as e:
+            self.logger.error(f"기존 CSV 헤더 읽기 실패: {filepath}, 오류: {e}")
+            return None
+
+    def read_tail_rows(self, stock_code: str, max_rows: int, block_size: int = 65536) -> List[Dict[str, str]]:
+        """
+        당일 CSV 파일의 마지막 max_rows행 읽기 (재시작시 지표 버퍼 워밍업용, 읽기 전용)
+        파일 끝에서부터 블록 단위로 역방향 탐색 - 전체 파싱 없음
+        마지막 줄이 줄바꿈 없이 잘려 있으면(비정상 종료) 제외
+
+        Returns:
+            List[Dict[str, str]]: 헤더 컬럼명 -> 문자열 값 (오래된 행부터, 파일 없으면 빈 목록)
+        """
+        filepath = self.get_csv_filepath(stock_code)
+        if max_rows <= 0 or not os.path.exists(filepath):
+            return []
+
+        try:
+            header = self._read_existing_header(filepath)
+            if not header:
+                return []
+
+            with open(filepath, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                position = f.tell()
+                data = b''
+                # 완전한 행 max_rows개 + 경계에 걸친 앞쪽 조각 1줄이 모일 때까지
+                while position > 0 and data.count(b'\n') <= max_rows:
+                    read_size = min(block_size, position)
+                    position -= read_size
+                    f.seek(position)
+                    data = f.read(read_size) + data
+
+            lines = data.split(b'\n')
+            if lines[-1]:
+                self.logger.warning(f"CSV 마지막 행 불완전 (워밍업에서 제외): {filepath}")
+            lines = lines[:-1]
+            # 파일 처음까지 읽었으면 헤더 줄, 아니면 잘린 앞쪽 조각 제외
+            lines = lines[1:]
+
+            text = [line.decode('utf-8', errors='replace').rstrip('\r') for line in lines[-max_rows:] if line.strip()]
+            return [dict(zip(header, values)) for values in csv.reader(text) if len(values) == len(header)]
+
+        except Exception as e:
+            self.logger.error(f"CSV 꼬리 읽기 실패 ({stock_code}): {e}")
+            return []
+
+    def iter_columns(self, stock_code: str, columns: List[str]) -> Iterator[Tuple[Optional[str], ...]]:
+        """
+        당일 CSV를 처음부터 한 번 읽으며 지정 컬럼 값만 (스트리밍, 읽기 전용)
+        파일에 없는 컬럼은 None, 파일이 없으면 빈 반복
+        """
+        filepath = self.get_csv_filepath(stock_code)
+        if not os.path.exists(filepath):
+            return
+
+        with open(filepath, 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                return
+            indexes = [header.index(column) if column in header else None for column in columns]
+            for values in reader:
+                if len(values) != len(header):
+                    continue  # 잘린 행
+                yield tuple(values[index] if index is not None else None for index in indexes)
+
     def write_indicators(self, stock_code: str, indicators: Dict) -> bool:
         """33개 지표를 CSV에 저장"""
         try:
@@ -157,8 +255,8 @@ class CSVWriter:
             
             # 데이터 타입 정제
             try:
-                if header == 'time':
-                    # 시간은 정수 (밀리초)
+                if header in self.integer_headers:
+                    # 시간(밀리초/나노초), 스냅샷 ID, 가격(원)은 정수
                     clean_data[header] = int(value) if value else 0
                 elif header == 'stock_code':
                     # 종목코드는 문자열
@@ -174,6 +272,8 @@ class CSVWriter:
                 # 변환 실패시 기본값
                 if header == 'time':
                     clean_data[header] = int(datetime.now().timestamp() * 1000)
+                elif header in self.integer_headers:
+                    clean_data[header] = 0
                 elif header == 'stock_code':
                     clean_data[header] = ""
                 elif 'qty' in header or header in ['volume']:
@@ -345,6 +445,13 @@ class BatchCSVWriter(CSVWriter):
             self.logger.error(f"배치 플러시 실패 ({stock_code}): {e}")
             return False
     
+    def close_stock_csv(self, stock_code: str):
+        """종목 버퍼 플러시 후 파일 닫기 (종목 제거시)"""
+        if self.buffers.get(stock_code):
+            with self.buffer_locks[stock_code]:
+                self._flush_buffer(stock_code)
+        super().close_stock_csv(stock_code)
+
     def flush_all_buffers(self):
         """모든 버퍼 플러시"""
         stock_codes = list(self.buffers.keys())
@@ -4,15 +4,23 @@ CLAUDE.md 기반 - 틱 기반 업데이트, 종목별 독립 상태 유지
 """
 
 import time
+import math
 import logging
 import numpy as np
 from collections import deque, defaultdict
-from typing import Dict, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 from datetime import datetime
 
 from config import (
     DataConfig, IndicatorConfig, TARGET_STOCKS
 )
+from investor_store import InvestorFlowStore
+from indicator_snapshot import IndicatorSnapshotStore
+from indicator_registry import REGISTRY, IndicatorRegistry, IndicatorSpec
+from bar_aggregator import BarAggregator
+from tick_size import ticks_between
+from sampling_profiler import tag_stock, clear_stock_tag
 
 class IndicatorCalculator:
     """
@@ -21,7 +29,13 @@ class IndicatorCalculator:
     - 종목별 독립 상태 관리
     - rolling window (deque) 사용
     """
-    
+
+    # 호가 버퍼 항목 키 (_extract_bid_ask_data 순서) - 상태 스냅샷 평탄화용
+    BID_ASK_KEYS = tuple(
+        [key for i in range(1, 6) for key in (f'ask{i}', f'ask{i}_qty', f'bid{i}', f'bid{i}_qty')]
+        + ['total_ask_qty', 'total_bid_qty']
+    )
+
     def __init__(self, stock_code: str, kiwoom_client=None):
         self.stock_code = stock_code
         self.kiwoom_client = kiwoom_client
@@ -60,12 +74,34 @@ class IndicatorCalculator:
         # 수급 데이터 (TR 기반)
         self.investor_net_data = {}
         self.prev_investor_net = {}
+        self.investor_manager = None  # InvestorNetManager (main에서 연결)
+        
+        # 체결 흐름 지표용 누적 상태 (틱당 O(1) 갱신)
+        self.session_pv = 0  # 당일 Σ 체결가 × 체결량 (세션 VWAP 분자, 정수 - 누적 오차 없음)
+        self.session_qty = 0
+        self.vwap_window = deque()  # (time, 체결가, 체결량) - 최근 VWAP_WINDOW_MS 구간
+        self.rolling_pv = 0
+        self.rolling_qty = 0
+        self.last_trade_sign = 0
+        self.ofi_book = (0, 0, 0, 0)  # 직전 최우선 호가 (bid1, bid1_qty, ask1, ask1_qty)
+        self.ofi_accum = 0.0  # 직전 체결 이후 호가 이벤트 OFI 누적
+        
+        # 체결량 시계열 (볼륨 지표용) - 정수 누적합/제곱합으로 O(1) 롤링 평균/분산 (부동소수 누적 오차 없음)
+        self.trade_qty_buffer = deque(maxlen=DataConfig.MAX_TICK_BUFFER)
+        self.trade_qty_sum = 0
+        self.trade_qty_sq_sum = 0
+        self.ratio_qty_buffer = deque(maxlen=DataConfig.VOL_RATIO_WINDOW)
+        self.ratio_qty_sum = 0
         
         # 기타 상태
         self.prev_day_high = 0
         self.session_start_price = 0
         self.last_update_time = 0
         
+        # 지표 계산 계획 (활성 지표 위상 정렬 - 설정별로 1회 생성되어 공유)
+        self.plan = REGISTRY.get_plan(IndicatorConfig.DISABLED_INDICATORS)
+        self.track_book_flow = 'ofi' in self.plan.names  # OFI 비활성이면 호가 이벤트 누적 생략
+        
     def update_tick_data(self, tick_data: Dict) -> Dict:
         """
         틱 데이터 업데이트 및 33개 지표 계산
@@ -80,24 +116,21 @@ class IndicatorCalculator:
             # Unix timestamp (밀리초)로 시간 처리 - kiwoom_client에서 이미 변환됨
             current_time = int(tick_data.get('time', int(time.time() * 1000)))
             
-            # kiwoom_client에서 이미 숫자로 변환된 값을 받음
-            current_price = float(tick_data.get('current_price', 0))
+            # kiwoom_client에서 이미 숫자로 변환된 값을 받음 (가격은 원 단위 정수)
+            current_price = int(tick_data.get('current_price', 0))
             current_volume = int(tick_data.get('volume', 0))
             
             if current_price <= 0:
                 return {}
             
             # 고가/저가 추출 (키움에서 제공되는 경우)
-            current_high = float(tick_data.get('high_price', current_price))
-            current_low = float(tick_data.get('low_price', current_price))
-            
             # 버퍼 업데이트
             self.price_buffer.append(current_price)
             self.volume_buffer.append(current_volume)
             self.time_buffer.append(current_time)
             # high/low 데이터 fallback 처리 개선
-            current_high = float(tick_data.get('high_price', current_price))  # fallback to current_price
-            current_low = float(tick_data.get('low_price', current_price))
+            current_high = int(tick_data.get('high_price', current_price))  # fallback to current_price
+            current_low = int(tick_data.get('low_price', current_price))
             self.high_buffer.append(current_high)
             self.low_buffer.append(current_low)
             
@@ -112,7 +145,8 @@ class IndicatorCalculator:
             # 33개 지표 계산
             indicators = self._calculate_all_indicators(tick_data)
             
-            # 상태 업데이트 (타입 보장)
+            # 상태 업데이트 (타입 보장) - 직전가는 전체 지표 계산 후 갱신 (RSI/OBV가 같은 직전가 사용)
+            self.prev_price = current_price
             self.prev_close = self.prev_price  # 이전 종가를 ATR 계산용으로 저장
             self.prev_volume = int(current_volume) if current_volume else 0
             self.last_update_time = current_time
@@ -138,9 +172,9 @@ class IndicatorCalculator:
             bid_qty_key = f'bid{i}_qty'     # 변경 없음
             
             # kiwoom_client에서 이미 숫자로 변환된 값을 받음
-            bid_ask[f'ask{i}'] = float(tick_data.get(ask_price_key, 0))
+            bid_ask[f'ask{i}'] = int(tick_data.get(ask_price_key, 0))
             bid_ask[f'ask{i}_qty'] = int(tick_data.get(ask_qty_key, 0))
-            bid_ask[f'bid{i}'] = float(tick_data.get(bid_price_key, 0))
+            bid_ask[f'bid{i}'] = int(tick_data.get(bid_price_key, 0))
             bid_ask[f'bid{i}_qty'] = int(tick_data.get(bid_qty_key, 0))
         
         # 총 호가 잔량 (kiwoom_client에서 이미 숫자로 변환됨)
@@ -150,86 +184,56 @@ class IndicatorCalculator:
         return bid_ask if any(v > 0 for v in bid_ask.values()) else None
     
     def _calculate_all_indicators(self, tick_data: Dict) -> Dict:
-        """33개 지표 전체 계산"""
-        # Unix timestamp (밀리초)로 시간 처리 - kiwoom_client에서 이미 변환됨
-        current_time = int(tick_data.get('time', int(time.time() * 1000)))
-        
-        # kiwoom_client에서 이미 숫자로 변환된 값을 받음
-        current_price = float(tick_data.get('current_price', 0))
-        current_volume = int(tick_data.get('volume', 0))
-        
-        indicators = {}
-        
-        # ====================================================================
-        # 1. 기본 데이터 (4개)
-        # ====================================================================
-        indicators['time'] = current_time
-        indicators['stock_code'] = self.stock_code
-        indicators['current_price'] = current_price
-        indicators['volume'] = current_volume
-        
-        # ====================================================================
-        # 2. 가격 지표 (5개)
-        # ====================================================================
-        indicators['ma5'] = self._calculate_ma5()
-        indicators['rsi14'] = self._calculate_rsi14(current_price)
-        indicators['disparity'] = self._calculate_disparity(current_price)
-        indicators['stoch_k'] = self._calculate_stoch_k(tick_data)
-        indicators['stoch_d'] = self._calculate_stoch_d()
-        
-        # ====================================================================
-        # 3. 볼륨 지표 (3개)
-        # ====================================================================
-        indicators['vol_ratio'] = self._calculate_vol_ratio(tick_data)
-        indicators['z_vol'] = self._calculate_z_vol(current_volume)
-        indicators['obv_delta'] = self._calculate_obv_delta(current_price, current_volume)
-        
-        # ====================================================================
-        # 4. Bid/Ask 지표 (2개)
-        # ====================================================================
-        indicators['spread'] = self._calculate_spread(tick_data)
-        indicators['bid_ask_imbalance'] = self._calculate_bid_ask_imbalance(tick_data)
-        
-        # ====================================================================
-        # 5. 기타 지표 (2개)
-        # ====================================================================
-        indicators['accel_delta'] = self._calculate_accel_delta(current_time, current_price)
-        indicators['ret_1s'] = self._calculate_ret_1s(current_time, current_price)
-        
-        # ====================================================================
-        # 6. 호가 가격 (10개) - modify2.md 수정: tick_data에서 직접 추출
-        # ====================================================================
-        # bid_ask_buffer 대신 tick_data에서 직접 가져옴 (병합된 데이터 사용)
+        """활성 지표 전체 계산 (indicator_registry 계산 계획 순서 - 중간값은 틱당 1회)"""
+        return self.plan.run(self, tick_data)
+    
+    # ========================================================================
+    # 기본 데이터 / 호가 / 수급 컬럼
+    # ========================================================================
+    
+    def _calculate_tick_fields(self, tick_data: Dict, values: Dict) -> Tuple:
+        """기본 데이터 4개 + 수신시각(ns) / 거래소 체결시간(ms) 별도 컬럼"""
+        # Unix timestamp (밀리초) / 숫자 값 - kiwoom_client에서 이미 변환됨
+        return (
+            int(tick_data.get('time', int(time.time() * 1000))),
+            self.stock_code,
+            int(tick_data.get('current_price', 0)),
+            int(tick_data.get('volume', 0)),
+            int(tick_data.get('recv_time_ns', 0)),
+            int(tick_data.get('exchange_time_ms', 0)),
+        )
+    
+    def _calculate_hoga_prices(self, tick_data: Dict, values: Dict) -> Dict:
+        """호가 가격 10개 - modify2.md 수정: bid_ask_buffer 대신 tick_data(병합된 데이터)에서 직접 추출"""
+        prices = {}
         for i in range(1, 6):
-            ask_value = float(tick_data.get(f'ask{i}', 0))
-            bid_value = float(tick_data.get(f'bid{i}', 0))
-            indicators[f'ask{i}'] = ask_value
-            indicators[f'bid{i}'] = bid_value
+            ask_value = int(tick_data.get(f'ask{i}', 0))
+            bid_value = int(tick_data.get(f'bid{i}', 0))
+            prices[f'ask{i}'] = ask_value
+            prices[f'bid{i}'] = bid_value
             
             # 🔍 호가 디버깅 (첫 5틱만)
             if len(self.price_buffer) <= 5:
                 self.logger.info(f"🎯 [지표계산] {self.stock_code}: ask{i}={ask_value}, bid{i}={bid_value} (tick_data에서 추출)")
-        
-        # ====================================================================
-        # 7. 호가 잔량 (10개) - modify2.md 수정: tick_data에서 직접 추출, 전체 10개 포함
-        # ====================================================================
+        return prices
+    
+    def _calculate_hoga_quantities(self, tick_data: Dict, values: Dict) -> Dict:
+        """호가 잔량 10개 - modify2.md 수정: tick_data에서 직접 추출"""
+        quantities = {}
         for i in range(1, 6):
-            indicators[f'ask{i}_qty'] = int(tick_data.get(f'ask{i}_qty', 0))
-            indicators[f'bid{i}_qty'] = int(tick_data.get(f'bid{i}_qty', 0))
-        
-        # ====================================================================
-        # 8. 수급 통합 지표 (11개) - CLAUDE.md 요구사항: 개별 컬럼으로 저장
-        # ====================================================================
-        investor_indicators = self._calculate_investor_individual_indicators()
-        indicators.update(investor_indicators)
-        
-        return indicators
+            quantities[f'ask{i}_qty'] = int(tick_data.get(f'ask{i}_qty', 0))
+            quantities[f'bid{i}_qty'] = int(tick_data.get(f'bid{i}_qty', 0))
+        return quantities
+    
+    def _calculate_investor_snapshot_id(self, tick_data: Dict, values: Dict) -> int:
+        """수급 스냅샷 ID (investor_store 시계열 행 번호, 0 = TR 미수신)"""
+        return self.investor_manager.get_version(self.stock_code) if self.investor_manager else 0
     
     # ========================================================================
     # 가격 지표 계산 함수들
     # ========================================================================
     
-    def _calculate_ma5(self) -> float:
+    def _calculate_ma5(self, tick_data: Dict, values: Dict) -> float:
         """5틱 이동평균"""
         if len(self.price_buffer) == 0:
             return 0.0
@@ -237,8 +241,9 @@ class IndicatorCalculator:
         available_data = min(len(self.price_buffer), 5)
         return float(np.mean(list(self.price_buffer)[-available_data:]))
     
-    def _calculate_rsi14(self, current_price: float) -> float:
+    def _calculate_rsi14(self, tick_data: Dict, values: Dict) -> float:
         """14틱 RSI (간소화된 방식)"""
+        current_price = values['current_price']
         if len(self.price_buffer) < 2:
             return 50.0  # 기본값
         
@@ -279,14 +284,14 @@ class IndicatorCalculator:
         
         return float(rsi)
     
-    def _calculate_disparity(self, current_price: float) -> float:
-        """이격도 (현재가 / MA5 * 100)"""
-        ma5 = self._calculate_ma5()
+    def _calculate_disparity(self, tick_data: Dict, values: Dict) -> float:
+        """이격도 (현재가 / MA5 * 100) - 이번 틱 ma5 재사용"""
+        ma5 = values['ma5']
         if ma5 == 0:
             return 100.0
-        return float((current_price / ma5) * 100)
+        return float((values['current_price'] / ma5) * 100)
     
-    def _calculate_stoch_k(self, tick_data: Dict) -> float:
+    def _calculate_stoch_k(self, tick_data: Dict, values: Dict) -> float:
         """스토캐스틱 K (적절한 high/low 히스토리 사용)"""
         if len(self.high_buffer) < DataConfig.STOCH_WINDOW or len(self.low_buffer) < DataConfig.STOCH_WINDOW:
             return np.nan  # 개선: 데이터 부족시 NaN 반환
@@ -299,12 +304,12 @@ class IndicatorCalculator:
             lowest_low = min(recent_lows)
             
             # 현재가
-            current_price = float(tick_data.get('current_price', 0))
+            current_price = values['current_price']
             
             # 선택적 호가 통합으로 범위 확대
             if IndicatorConfig.USE_HOGA_FOR_STOCH:
-                ask5 = float(tick_data.get('ask5', highest_high))  # fallback to current high
-                bid5 = float(tick_data.get('bid5', lowest_low))
+                ask5 = int(tick_data.get('ask5', highest_high))  # fallback to current high
+                bid5 = int(tick_data.get('bid5', lowest_low))
                 highest_high = max(highest_high, ask5)
                 lowest_low = min(lowest_low, bid5)
             
@@ -324,7 +329,7 @@ class IndicatorCalculator:
             self.logger.error(f"Stoch K 계산 실패: {e}")
             return np.nan  # 개선: 오류시 NaN 반환
     
-    def _calculate_stoch_d(self) -> float:
+    def _calculate_stoch_d(self, tick_data: Dict, values: Dict) -> float:
         """스토캐스틱 D (K의 3틱 이동평균)"""
         if len(self.stoch_k_buffer) < 3:
             return np.nan  # 개선: 데이터 부족시 NaN 반환
@@ -334,10 +339,31 @@ class IndicatorCalculator:
     # 볼륨 지표 계산 함수들
     # ========================================================================
     
-    def _calculate_vol_ratio(self, tick_data: Dict) -> float:
-        """볼륨 비율 (modify2.md 제안: 현재/평균 거래량)"""
+    def _calculate_vol_ratio(self, tick_data: Dict, values: Dict) -> float:
+        """볼륨 비율 - 이번 체결량 / 최근 VOL_RATIO_WINDOW 체결 평균 (이번 체결 포함)"""
+        qty = values['trade_qty']
+        count = len(self.ratio_qty_buffer)
+        if qty == 0 or count < 2 or self.ratio_qty_sum == 0:
+            return 1.0
+        return float(qty * count / self.ratio_qty_sum)
+    
+    def _calculate_z_vol(self, tick_data: Dict, values: Dict) -> float:
+        """체결량 Z-Score - 최근 MAX_TICK_BUFFER 체결 기준 (체결 없는 틱은 0)"""
+        qty = values['trade_qty']
+        count = len(self.trade_qty_buffer)
+        if qty == 0 or count < 10:
+            return 0.0
+        
+        # 분산 = (nΣx² - (Σx)²) / n² - 분자는 정수 연산이라 정확
+        variance_numer = self.trade_qty_sq_sum * count - self.trade_qty_sum * self.trade_qty_sum
+        if variance_numer <= 0:
+            return 0.0
+        return float((qty * count - self.trade_qty_sum) / math.sqrt(variance_numer))
+    
+    def _calculate_vol_ratio_cumulative(self, tick_data: Dict, values: Dict) -> float:
+        """볼륨 비율 (modify2.md 제안: 현재/평균 거래량) - 호환 모드: 누적거래량 기준"""
         try:
-            current_volume = int(tick_data.get('volume', 0))
+            current_volume = values['volume']
             
             if current_volume == 0 or len(self.volume_buffer) < 2:
                 return 1.0
@@ -361,8 +387,9 @@ class IndicatorCalculator:
             self.logger.error(f"vol_ratio 계산 실패: {e}")
             return 1.0
     
-    def _calculate_z_vol(self, current_volume: int) -> float:
-        """거래량 Z-Score"""
+    def _calculate_z_vol_cumulative(self, tick_data: Dict, values: Dict) -> float:
+        """거래량 Z-Score - 호환 모드: 누적거래량 기준"""
+        current_volume = values['volume']
         if len(self.volume_buffer) < 10:
             return 0.0
         
@@ -375,8 +402,10 @@ class IndicatorCalculator:
         
         return float((current_volume - mean_vol) / std_vol)
     
-    def _calculate_obv_delta(self, current_price: float, current_volume: int) -> float:
-        """OBV 변화량 - 수정 버전"""
+    def _calculate_obv_delta(self, tick_data: Dict, values: Dict) -> float:
+        """OBV 변화량 - 수정 버전 (직전가 prev_price는 update_tick_data가 전체 계산 후 갱신, 호환 모드면 누적거래량)"""
+        current_price = values['current_price']
+        current_volume = values['volume' if IndicatorConfig.CUMULATIVE_VOLUME_INDICATORS else 'trade_qty']
         if self.prev_price == 0:
             self.prev_obv = 0  # 초기화 수정: current_volume 대신 0으로 시작 (누적 방지)
             obv_delta = 0.0
@@ -392,9 +421,6 @@ class IndicatorCalculator:
             obv_delta = new_obv - self.prev_obv  # 진짜 delta 계산
             self.prev_obv = new_obv
         
-        # 업데이트 시점 수정: 계산 후 바로 prev_price 업데이트 (순서 문제 해결)
-        self.prev_price = current_price
-        
         # 에지 케이스: volume=0 시 delta=0 강제
         if current_volume == 0:
             obv_delta = 0.0
@@ -406,36 +432,55 @@ class IndicatorCalculator:
     # Bid/Ask 지표 계산 함수들
     # ========================================================================
     
-    def _calculate_spread(self, tick_data: Dict) -> float:
-        """스프레드 (ask1 - bid1) - tick_data에서 직접 계산"""
+    def _calculate_spread(self, tick_data: Dict, values: Dict) -> int:
+        """스프레드 (ask1 - bid1, 원) - tick_data에서 직접 계산"""
         try:
             # tick_data에서 직접 호가 가격 추출
-            ask1_price = float(tick_data.get('ask1', 0))
-            bid1_price = float(tick_data.get('bid1', 0))
+            ask1_price = int(tick_data.get('ask1', 0))
+            bid1_price = int(tick_data.get('bid1', 0))
             
             if ask1_price > 0 and bid1_price > 0:
-                spread = ask1_price - bid1_price
-                return float(spread)
+                return ask1_price - bid1_price
             
-            return 0.0
+            return 0
             
         except Exception as e:
             self.logger.error(f"spread 계산 실패: {e}")
-            return 0.0
+            return 0
+    
+    def _calculate_spread_ticks(self, tick_data: Dict, values: Dict) -> int:
+        """스프레드 호가 수 (KRX 호가단위 기준 - 종목 간 비교 가능, 호가 없으면 0)"""
+        ask1 = int(tick_data.get('ask1', 0))
+        bid1 = int(tick_data.get('bid1', 0))
+        if ask1 <= 0 or bid1 <= 0:
+            return 0
+        return ticks_between(bid1, ask1)
     
-    def _calculate_bid_ask_imbalance(self, tick_data: Dict) -> float:
-        """호가 불균형 (bid_qty - ask_qty) / total - tick_data에서 직접 계산"""
+    def _calculate_book_depth_ticks(self, tick_data: Dict, values: Dict) -> Tuple[int, int]:
+        """호가 깊이 (1호가 → 최종 호가 호가 수: 매도, 매수) - 호가 사이 빈 가격이 있으면 호가 단계 수보다 큼"""
+        levels = IndicatorConfig.BIDASK_LEVELS
+        ask1 = int(tick_data.get('ask1', 0))
+        bid1 = int(tick_data.get('bid1', 0))
+        ask_last = int(tick_data.get(f'ask{levels}', 0))
+        bid_last = int(tick_data.get(f'bid{levels}', 0))
+        ask_depth = ticks_between(ask1, ask_last) if ask1 > 0 and ask_last > 0 else 0
+        bid_depth = ticks_between(bid_last, bid1) if bid1 > 0 and bid_last > 0 else 0
+        return ask_depth, bid_depth
+    
+    def _calculate_book_totals(self, tick_data: Dict, values: Dict) -> Tuple[int, int]:
+        """호가 잔량 합계 (매수, 매도) - 설정된 호가 단계까지, 공유 중간값"""
+        total_bid = 0
+        total_ask = 0
+        for i in range(1, IndicatorConfig.BIDASK_LEVELS + 1):
+            total_bid += int(tick_data.get(f'bid{i}_qty', 0))
+            total_ask += int(tick_data.get(f'ask{i}_qty', 0))
+        return total_bid, total_ask
+    
+    def _calculate_bid_ask_imbalance(self, tick_data: Dict, values: Dict) -> float:
+        """호가 불균형 (bid_qty - ask_qty) / total - 호가 잔량 합계 중간값 사용"""
         try:
-            # tick_data에서 직접 호가잔량 추출
-            total_bid = 0
-            total_ask = 0
-            
-            # 설정 가능한 호가 단계 사용
-            for i in range(1, IndicatorConfig.BIDASK_LEVELS + 1):
-                bid_qty = int(tick_data.get(f'bid{i}_qty', 0))
-                ask_qty = int(tick_data.get(f'ask{i}_qty', 0))
-                total_bid += bid_qty
-                total_ask += ask_qty
+            total_bid = values['book_bid_total']
+            total_ask = values['book_ask_total']
             
             total = total_bid + total_ask
             if total == 0:
@@ -459,8 +504,16 @@ class IndicatorCalculator:
     # 기타 지표 계산 함수들
     # ========================================================================
     
-    def _calculate_accel_delta(self, current_time: int, current_price: float) -> float:
+    def _calculate_move_ticks(self, tick_data: Dict, values: Dict) -> int:
+        """직전 체결가 대비 가격 변동 호가 수 (직전가 prev_price는 update_tick_data가 전체 계산 후 갱신)"""
+        if self.prev_price <= 0:
+            return 0
+        return ticks_between(self.prev_price, values['current_price'])
+    
+    def _calculate_accel_delta(self, tick_data: Dict, values: Dict) -> float:
         """가속도 변화: 3틱 2차 diff / time_diff, EMA smoothing."""
+        current_time = values['time']
+        current_price = values['current_price']
         # deque 업데이트: (time, price) 튜플 추가
         self.accel_deque.append((current_time, current_price))
         
@@ -489,8 +542,9 @@ class IndicatorCalculator:
         
         return float(smoothed_accel)
     
-    def _calculate_ret_1s(self, current_time: int, current_price: float) -> float:
+    def _calculate_ret_1s(self, tick_data: Dict, values: Dict) -> float:
         """1초 수익률: 1초 버킷 내 시작 vs 끝 가격 pct_change, time_diff scaling."""
+        current_time = values['time']
         if len(self.time_buffer) < 2:
             return 0.0
 
@@ -528,45 +582,153 @@ class IndicatorCalculator:
 
         return float(scaled_ret * 100)  # % 단위
     
-    def _calculate_investor_individual_indicators(self) -> dict:
-        """수급 지표 11개 개별 계산 (CLAUDE.md 요구사항: 개별 컬럼으로 저장)"""
-        investor_indicators = {}
-        
-        # CSV 컬럼명과 매핑 (modify2.md 수정: 실제 CSV 헤더와 일치)
-        investor_columns = [
-            'indiv_net_vol', 'foreign_net_vol', 'inst_net_vol', 'pension_net_vol', 
-            'trust_net_vol', 'insurance_net_vol', 'private_fund_net_vol', 
-            'bank_net_vol', 'state_net_vol', 'other_net_vol', 'prog_net_vol'
-        ]
-        
-        # InvestorNetManager에서 최신 데이터 가져옴 (연동 구현)
-        if hasattr(self, 'investor_manager') and self.investor_manager:
-            csv_data = self.investor_manager.get_csv_data(self.stock_code)
-            
-            # CSV 컬럼명을 InvestorNetManager 키에 매핑
-            key_mapping = {
-                'indiv_net_vol': 'net_individual',
-                'foreign_net_vol': 'net_foreign', 
-                'inst_net_vol': 'net_institution',
-                'pension_net_vol': 'net_pension',
-                'trust_net_vol': 'net_investment',
-                'insurance_net_vol': 'net_insurance',
-                'private_fund_net_vol': 'net_private_fund',
-                'bank_net_vol': 'net_bank',
-                'state_net_vol': 'net_state',
-                'other_net_vol': 'net_other_corp',
-                'prog_net_vol': 'net_program'
-            }
-            
-            for column in investor_columns:
-                mapped_key = key_mapping.get(column, column)
-                investor_indicators[column] = csv_data.get(mapped_key, 0.0)
+    # ========================================================================
+    # 체결 흐름 지표 (VWAP / 체결 방향 / OFI) - 누적 상태로 틱당 O(1)
+    # ========================================================================
+    
+    def _calculate_trade_qty(self, tick_data: Dict, values: Dict) -> int:
+        """
+        체결 1건 수량 - 누적거래량(FID 13) 차분 (첫 체결/누적값 초기화시 FID 15 체결량)
+        누락된 체결 이벤트가 있어도 차분이면 수량 합계가 누적거래량과 일치
+        체결 시계열 버퍼/누적합 갱신 (체결 없는 틱은 제외)
+        """
+        current_volume = values['volume']
+        if self.prev_volume <= 0 or current_volume < self.prev_volume:
+            qty = int(tick_data.get('trade_volume', 0))
         else:
-            # fallback: TR 데이터가 없을 때 0으로 초기화
-            for column in investor_columns:
-                investor_indicators[column] = 0.0
+            qty = current_volume - self.prev_volume
+        
+        if qty > 0:
+            self._push_trade_qty(qty)
+        return qty
+    
+    def _push_trade_qty(self, qty: int):
+        """체결량 창 2개에 추가 (가득 차면 밀려나는 값을 누적합에서 뺌)"""
+        buffer = self.trade_qty_buffer
+        if len(buffer) == buffer.maxlen:
+            old = buffer[0]
+            self.trade_qty_sum -= old
+            self.trade_qty_sq_sum -= old * old
+        buffer.append(qty)
+        self.trade_qty_sum += qty
+        self.trade_qty_sq_sum += qty * qty
+        
+        buffer = self.ratio_qty_buffer
+        if len(buffer) == buffer.maxlen:
+            self.ratio_qty_sum -= buffer[0]
+        buffer.append(qty)
+        self.ratio_qty_sum += qty
+    
+    def _calculate_trade_sign(self, tick_data: Dict, values: Dict) -> int:
+        """
+        체결 방향 (+1 매수 주도 / -1 매도 주도 / 0 체결량 없음) - Lee-Ready
+        체결 틱에는 호가 필드가 없으므로 tick_data의 ask1/bid1은 체결 직전 최우선 호가 (latest_orderbook)
+        호가 밖/위: 호가 비교, 스프레드 안: 중간가 비교, 중간가/호가 없음: 틱 규칙 (직전가 대비, 같으면 직전 방향)
+        """
+        if values['trade_qty'] <= 0:
+            return 0
+        
+        price = values['current_price']
+        ask1 = int(tick_data.get('ask1', 0))
+        bid1 = int(tick_data.get('bid1', 0))
+        
+        sign = 0
+        if ask1 > bid1 > 0:
+            if price >= ask1:
+                sign = 1
+            elif price <= bid1:
+                sign = -1
+            else:
+                mid = (ask1 + bid1) / 2
+                sign = 1 if price > mid else -1 if price < mid else 0
+        
+        if sign == 0 and self.prev_price > 0:
+            if price > self.prev_price:
+                sign = 1
+            elif price < self.prev_price:
+                sign = -1
+            else:
+                sign = self.last_trade_sign
         
-        return investor_indicators
+        self.last_trade_sign = sign
+        return sign
+    
+    def _calculate_session_vwap(self, tick_data: Dict, values: Dict) -> float:
+        """당일 누적 VWAP (체결 전 0건이면 현재가)"""
+        qty = values['trade_qty']
+        if qty > 0:
+            self.session_pv += values['current_price'] * qty
+            self.session_qty += qty
+        return self.session_pv / self.session_qty if self.session_qty else values['current_price']
+    
+    def _calculate_rolling_vwap(self, tick_data: Dict, values: Dict) -> float:
+        """최근 VWAP_WINDOW_MS 구간 VWAP - 창 밖 체결은 앞에서 빼는 정수 누적합 (분할 상환 O(1))"""
+        price = values['current_price']
+        qty = values['trade_qty']
+        current_time = values['time']
+        if qty > 0:
+            self.vwap_window.append((current_time, price, qty))
+            self.rolling_pv += price * qty
+            self.rolling_qty += qty
+        
+        cutoff = current_time - IndicatorConfig.VWAP_WINDOW_MS
+        window = self.vwap_window
+        while window and window[0][0] <= cutoff:
+            _, old_price, old_qty = window.popleft()
+            self.rolling_pv -= old_price * old_qty
+            self.rolling_qty -= old_qty
+        
+        return self.rolling_pv / self.rolling_qty if self.rolling_qty else price
+    
+    def _book_flow(self, book: Dict) -> float:
+        """직전 최우선 호가 대비 Cont OFI 기여분 (매수 잔량 증가/매도 잔량 감소 = 양수)"""
+        bid = int(book.get('bid1', 0))
+        ask = int(book.get('ask1', 0))
+        if bid <= 0 or ask <= 0:
+            return 0.0
+        bid_qty = int(book.get('bid1_qty', 0))
+        ask_qty = int(book.get('ask1_qty', 0))
+        
+        prev_bid, prev_bid_qty, prev_ask, prev_ask_qty = self.ofi_book
+        self.ofi_book = (bid, bid_qty, ask, ask_qty)
+        if prev_bid <= 0:
+            return 0.0
+        
+        flow = 0
+        if bid >= prev_bid:
+            flow += bid_qty
+        if bid <= prev_bid:
+            flow -= prev_bid_qty
+        if ask <= prev_ask:
+            flow -= ask_qty
+        if ask >= prev_ask:
+            flow += prev_ask_qty
+        return float(flow)
+    
+    def update_book_flow(self, book: Dict):
+        """호가 이벤트마다 OFI 누적 (병합기에서 버려지는 중간 호가도 반영, O(1))"""
+        if self.track_book_flow:
+            self.ofi_accum += self._book_flow(book)
+    
+    def _calculate_ofi(self, tick_data: Dict, values: Dict) -> float:
+        """
+        주문 흐름 불균형 (Cont OFI) - 직전 체결 이후 호가 이벤트 누적 + 이번 틱 호가
+        행 합계 = 구간 OFI (CSV 재생 워밍업처럼 호가 이벤트가 없으면 행 간 호가 차이)
+        """
+        ofi = self.ofi_accum + self._book_flow(tick_data)
+        self.ofi_accum = 0.0
+        return ofi
+    
+    def _calculate_investor_individual_indicators(self, tick_data: Dict, values: Dict) -> Mapping:
+        """
+        수급 지표 11개 (CLAUDE.md 요구사항: 개별 컬럼으로 저장)
+        InvestorNetManager가 TR 갱신 때 만들어 둔 읽기 전용 행 조각을 그대로 반환 (틱마다 재구성하지 않음)
+        """
+        if self.investor_manager:
+            return self.investor_manager.get_row(self.stock_code)
+        
+        # fallback: TR 데이터가 없을 때 0
+        return InvestorNetManager.EMPTY_ROW
     
     # ========================================================================
     # 수급 데이터 업데이트 (TR 기반)
@@ -585,7 +747,7 @@ class IndicatorCalculator:
     
     def set_prev_day_high(self, high_price: float):
         """전일 고가 설정"""
-        self.prev_day_high = float(high_price)
+        self.prev_day_high = int(high_price)
     
     def get_buffer_status(self) -> Dict:
         """버퍼 상태 조회"""
@@ -598,6 +760,220 @@ class IndicatorCalculator:
             'last_price': self.prev_price
         }
 
+    # ========================================================================
+    # 상태 스냅샷 (웜 재시작)
+    # ========================================================================
+
+    def get_state(self) -> Dict:
+        """계산기 상태 (indicator_snapshot 필드 구성 - 버퍼는 오래된 값부터)"""
+        return {
+            'prev_price': int(self.prev_price),
+            'prev_volume': int(self.prev_volume),
+            'prev_obv': float(self.prev_obv),
+            'prev_accel': float(self.prev_accel),
+            'prev_close': int(self.prev_close),
+            'prev_day_high': int(self.prev_day_high),
+            'session_start_price': int(self.session_start_price),
+            'last_update_time': int(self.last_update_time),
+            'session_pv': int(self.session_pv),
+            'session_qty': int(self.session_qty),
+            'last_trade_sign': int(self.last_trade_sign),
+            'ofi_accum': float(self.ofi_accum),
+            'ofi_bid': int(self.ofi_book[0]),
+            'ofi_bid_qty': int(self.ofi_book[1]),
+            'ofi_ask': int(self.ofi_book[2]),
+            'ofi_ask_qty': int(self.ofi_book[3]),
+            'price_buffer': self.price_buffer,
+            'volume_buffer': self.volume_buffer,
+            'time_buffer': self.time_buffer,
+            'high_buffer': self.high_buffer,
+            'low_buffer': self.low_buffer,
+            'rsi_gains': self.rsi_gains,
+            'rsi_losses': self.rsi_losses,
+            'stoch_k_buffer': self.stoch_k_buffer,
+            'atr_buffer': self.atr_buffer,
+            'accel_times': [t for t, _ in self.accel_deque],
+            'accel_prices': [p for _, p in self.accel_deque],
+            'bid_ask_rows': [book.get(key, 0) for book in self.bid_ask_buffer for key in self.BID_ASK_KEYS],
+            'vwap_times': [t for t, _, _ in self.vwap_window],
+            'vwap_prices': [p for _, p, _ in self.vwap_window],
+            'vwap_qtys': [q for _, _, q in self.vwap_window],
+            'trade_qty_buffer': self.trade_qty_buffer,
+            'investor_net_data': self.investor_net_data,
+            'prev_investor_net': self.prev_investor_net,
+        }
+
+    def set_state(self, state: Dict):
+        """스냅샷 상태 복원 (버퍼 최대 길이는 현재 설정 유지 - 넘치는 오래된 값은 버림)"""
+        for name in ('prev_obv', 'prev_accel', 'ofi_accum'):
+            setattr(self, name, state[name])
+        for name in ('prev_price', 'prev_volume', 'prev_close', 'prev_day_high', 'session_start_price',
+                     'last_update_time', 'session_pv', 'session_qty', 'last_trade_sign'):
+            setattr(self, name, int(state[name]))
+        self.ofi_book = tuple(int(state[name]) for name in ('ofi_bid', 'ofi_bid_qty', 'ofi_ask', 'ofi_ask_qty'))
+
+        for name in ('price_buffer', 'volume_buffer', 'time_buffer', 'high_buffer', 'low_buffer',
+                     'rsi_gains', 'rsi_losses', 'stoch_k_buffer', 'atr_buffer'):
+            buffer = getattr(self, name)
+            setattr(self, name, deque(state[name], maxlen=buffer.maxlen))
+
+        self.accel_deque = deque(zip(state['accel_times'], state['accel_prices']), maxlen=self.accel_deque.maxlen)
+
+        # 구간 VWAP 누적합은 창에서 다시 계산
+        self.vwap_window = deque(zip(state['vwap_times'], state['vwap_prices'], state['vwap_qtys']))
+        self.rolling_pv = sum(price * qty for _, price, qty in self.vwap_window)
+        self.rolling_qty = sum(qty for _, _, qty in self.vwap_window)
+
+        # 체결량 창 2개는 체결량 버퍼 하나에서 재구성
+        self.trade_qty_buffer = deque(maxlen=self.trade_qty_buffer.maxlen)
+        self.ratio_qty_buffer = deque(maxlen=self.ratio_qty_buffer.maxlen)
+        self.trade_qty_sum = self.trade_qty_sq_sum = self.ratio_qty_sum = 0
+        for qty in state['trade_qty_buffer']:
+            self._push_trade_qty(int(qty))
+
+        width = len(self.BID_ASK_KEYS)
+        rows = state['bid_ask_rows']
+        self.bid_ask_buffer = deque(
+            (dict(zip(self.BID_ASK_KEYS, rows[i:i + width]))
+             for i in range(0, len(rows) - len(rows) % width, width)),
+            maxlen=self.bid_ask_buffer.maxlen
+        )
+
+        self.investor_net_data = dict(state['investor_net_data'])
+        self.prev_investor_net = dict(state['prev_investor_net'])
+
+def register_builtin_indicators(registry: IndicatorRegistry = REGISTRY):
+    """
+    내장 지표 등록 (계산 순서는 의존성으로 결정 - CSV 컬럼 순서와 무관)
+    창 상태 버퍼(price/volume/time/high/low/bid_ask)는 update_tick_data가 계획 실행 전에 갱신
+    """
+    calc = IndicatorCalculator
+    
+    # 볼륨 지표: 체결량 시계열 기준 (호환 모드면 기존 누적거래량 버퍼 기준)
+    if IndicatorConfig.CUMULATIVE_VOLUME_INDICATORS:
+        vol_ratio, vol_ratio_state = calc._calculate_vol_ratio_cumulative, ['volume_buffer']
+        z_vol, z_vol_state = calc._calculate_z_vol_cumulative, ['volume_buffer']
+    else:
+        vol_ratio, vol_ratio_state = calc._calculate_vol_ratio, ['ratio_qty_buffer']
+        z_vol, z_vol_state = calc._calculate_z_vol, ['trade_qty_buffer']
+    
+    specs = [
+        # 기본 데이터 + 타임스탬프
+        IndicatorSpec('tick', calc._calculate_tick_fields,
+                      outputs=IndicatorConfig.BASIC_FIELDS + IndicatorConfig.TIMESTAMP_COLUMNS),
+        
+        # 가격 지표
+        IndicatorSpec('ma5', calc._calculate_ma5, requires=['tick'], state=['price_buffer']),
+        IndicatorSpec('rsi14', calc._calculate_rsi14, requires=['tick'],
+                      state=['rsi_gains', 'rsi_losses', 'prev_price']),
+        IndicatorSpec('disparity', calc._calculate_disparity, requires=['tick', 'ma5']),
+        IndicatorSpec('stoch_k', calc._calculate_stoch_k, requires=['tick'],
+                      state=['high_buffer', 'low_buffer', 'stoch_k_buffer']),
+        IndicatorSpec('stoch_d', calc._calculate_stoch_d, requires=['stoch_k'], state=['stoch_k_buffer']),
+        
+        # 체결량 (누적거래량 차분 - 볼륨/흐름 지표 공유 시계열)
+        IndicatorSpec('trade_qty', calc._calculate_trade_qty, requires=['tick'],
+                      state=['prev_volume', 'trade_qty_buffer', 'ratio_qty_buffer']),
+        
+        # 볼륨 지표
+        IndicatorSpec('vol_ratio', vol_ratio, requires=['tick', 'trade_qty'], state=vol_ratio_state),
+        IndicatorSpec('z_vol', z_vol, requires=['tick', 'trade_qty'], state=z_vol_state),
+        IndicatorSpec('obv_delta', calc._calculate_obv_delta, requires=['tick', 'trade_qty'],
+                      state=['prev_obv', 'prev_price']),
+        
+        # Bid/Ask 지표
+        IndicatorSpec('book_totals', calc._calculate_book_totals,
+                      outputs=['book_bid_total', 'book_ask_total'], intermediate=True),
+        IndicatorSpec('spread', calc._calculate_spread),
+        IndicatorSpec('bid_ask_imbalance', calc._calculate_bid_ask_imbalance, requires=['book_totals']),
+        
+        # 호가단위 정규화 (KRX 호가가격단위 기준 호가 수)
+        IndicatorSpec('spread_ticks', calc._calculate_spread_ticks),
+        IndicatorSpec('book_depth_ticks', calc._calculate_book_depth_ticks,
+                      outputs=['ask_depth_ticks', 'bid_depth_ticks']),
+        IndicatorSpec('move_ticks', calc._calculate_move_ticks, requires=['tick'], state=['prev_price']),
+        
+        # 기타 지표
+        IndicatorSpec('accel_delta', calc._calculate_accel_delta, requires=['tick'],
+                      state=['accel_deque', 'prev_accel']),
+        IndicatorSpec('ret_1s', calc._calculate_ret_1s, requires=['tick'], state=['time_buffer', 'price_buffer']),
+        
+        # 체결 흐름 지표 (VWAP / 체결 방향 / OFI)
+        IndicatorSpec('trade_sign', calc._calculate_trade_sign, requires=['tick', 'trade_qty'],
+                      state=['last_trade_sign', 'prev_price']),
+        IndicatorSpec('session_vwap', calc._calculate_session_vwap, requires=['tick', 'trade_qty'],
+                      state=['session_pv', 'session_qty']),
+        IndicatorSpec('rolling_vwap', calc._calculate_rolling_vwap, requires=['tick', 'trade_qty'],
+                      state=['vwap_window', 'rolling_pv', 'rolling_qty']),
+        IndicatorSpec('ofi', calc._calculate_ofi, state=['ofi_book', 'ofi_accum']),
+        
+        # 호가 가격/잔량
+        IndicatorSpec('hoga_prices', calc._calculate_hoga_prices, outputs=IndicatorConfig.HOGA_PRICES),
+        IndicatorSpec('hoga_quantities', calc._calculate_hoga_quantities, outputs=IndicatorConfig.HOGA_QUANTITIES),
+        
+        # 수급 (CLAUDE.md 요구사항: 개별 컬럼 - 설정시에만) + 스냅샷 ID
+        IndicatorSpec('investor_snapshot_id', calc._calculate_investor_snapshot_id),
+    ]
+    if IndicatorConfig.INLINE_INVESTOR_COLUMNS:
+        specs.append(IndicatorSpec('investor', calc._calculate_investor_individual_indicators,
+                                   outputs=IndicatorConfig.INVESTOR_COLUMNS))
+    
+    for spec in specs:
+        registry.register(spec, replace=True)
+
+register_builtin_indicators()
+
+class OrderBookCoalescer:
+    """
+    호가 이벤트 병합기 (last-writer-wins)
+    - 체결 틱 사이에 들어온 호가는 종목별 최신 1건만 보관
+    - 체결 틱이 호가를 필요로 할 때만 저장소에 반영 (lazy)
+    - 덮어쓴(병합된) 호가 건수 집계
+    """
+
+    def __init__(self):
+        # 종목별 미반영 최신 호가 (kiwoom_client가 호가 20필드를 모두 채워 보냄)
+        self.pending: Dict[str, Dict] = {}
+
+        # 통계
+        self.received_counts: Dict[str, int] = defaultdict(int)
+        self.merged_counts: Dict[str, int] = defaultdict(int)
+
+    def put(self, stock_code: str, book: Dict):
+        """호가 보관 - 이전 미반영 호가는 버림 (O(1), 로깅 없음)"""
+        if stock_code in self.pending:
+            self.merged_counts[stock_code] += 1
+        self.pending[stock_code] = book
+        self.received_counts[stock_code] += 1
+
+    def take(self, stock_code: str) -> Optional[Dict]:
+        """미반영 최신 호가 꺼내기 (없으면 None)"""
+        return self.pending.pop(stock_code, None)
+
+    def discard(self, stock_code: str):
+        """종목 제거시 미반영 호가/통계 정리"""
+        self.pending.pop(stock_code, None)
+        self.received_counts.pop(stock_code, None)
+        self.merged_counts.pop(stock_code, None)
+
+    def get_statistics(self) -> Dict:
+        """병합 통계 조회"""
+        total_received = sum(self.received_counts.values())
+        total_merged = sum(self.merged_counts.values())
+        return {
+            'total_received': total_received,
+            'total_merged': total_merged,
+            'merge_ratio': total_merged / total_received if total_received else 0.0,
+            'pending_stocks': len(self.pending),
+            'by_stock': {
+                stock_code: {
+                    'received': count,
+                    'merged': self.merged_counts.get(stock_code, 0)
+                }
+                for stock_code, count in self.received_counts.items()
+            }
+        }
+
 class DataProcessor:
     """
     전체 데이터 처리 관리자
@@ -606,8 +982,8 @@ class DataProcessor:
     - TR 데이터 처리
     """
     
-    def __init__(self, target_stocks: List[str] = None, kiwoom_client=None):
-        self.target_stocks = target_stocks or TARGET_STOCKS
+    def __init__(self, target_stocks: List[str] = None, kiwoom_client=None, snapshot_file: str = None):
+        self.target_stocks = list(target_stocks or TARGET_STOCKS)
         self.kiwoom_client = kiwoom_client
         self.logger = logging.getLogger(__name__)
         
@@ -618,11 +994,25 @@ class DataProcessor:
         
         # modify.md 분석: 종목별 최신 호가 저장소 (데이터 흐름 단절 해결)
         self.latest_orderbook: Dict[str, Dict] = {}
-        
+
+        # 호가 이벤트 병합기 (체결 틱 사이의 호가는 최신 1건만 유지)
+        self.orderbook_coalescer = OrderBookCoalescer()
+
         # 콜백 함수
         self.indicator_callback: Optional[callable] = None
+
+        # 전 종목 최신 상태 공유메모리 테이블 (main에서 연결, shm_bus.ShmStateTable)
+        self.state_table = None
+        
+        # 다중 시간프레임 봉 (체결 틱마다 증분 갱신, 싱크는 main에서 연결)
+        self.bar_aggregator = BarAggregator()
+        
+        # 계산기 상태 스냅샷 (같은 거래일이면 복원 → 지표 워밍업 생략)
+        self.snapshot_store = IndicatorSnapshotStore(snapshot_file)
+        self.restored_stocks = self.restore_snapshot()
         
-        self.logger.info(f"DataProcessor 초기화: {len(self.calculators)}개 종목 + 호가저장소")
+        self.logger.info(f"DataProcessor 초기화: {len(self.calculators)}개 종목 + 호가저장소 "
+                         f"(상태 복원 {len(self.restored_stocks)}종목)")
     
     def process_realdata(self, stock_code: str, real_type: str, tick_data: Dict) -> Optional[Dict]:
         """modify.md 분석 반영: 실시간 데이터 처리 + 호가 데이터 병합"""
@@ -630,12 +1020,16 @@ class DataProcessor:
             self.logger.warning(f"등록되지 않은 종목: {stock_code}")
             return None
         
+        # 프로파일러 종목 귀속 (처리 중 샘플을 이 종목으로 집계)
+        tag_stock(stock_code)
         try:
             # CLAUDE.md 규칙: 체결 이벤트만 CSV 저장, 호가 이벤트는 메모리만 업데이트
             if real_type in ["주식호가", "주식호가잔량"]:
-                # 호가 이벤트: 메모리만 업데이트, CSV 저장 안함
-                self.logger.debug(f"📊 [호가업데이트] {stock_code}: {real_type} - 메모리만 갱신")
-                self._update_orderbook_only(stock_code, tick_data)
+                # 호가 이벤트: OFI만 즉시 누적, 병합기에 최신값만 보관 → 체결 틱에서 lazy 반영 (CSV 저장 안함)
+                self.calculators[stock_code].update_book_flow(tick_data)
+                self.orderbook_coalescer.put(stock_code, tick_data)
+                if self.state_table:
+                    self.state_table.update_book(stock_code, tick_data)
                 return None  # CSV 저장하지 않음
             
             elif real_type == "주식체결":
@@ -648,16 +1042,15 @@ class DataProcessor:
                 # 기타 이벤트 로그
                 self.logger.debug(f"📡 [기타이벤트] {stock_code}: {real_type}")
             
-            # 모든 데이터를 저장소에 업데이트
-            if stock_code not in self.latest_orderbook:
-                self.latest_orderbook[stock_code] = {}
-            
+            # 미반영 호가를 먼저 저장소에 반영 (체결 틱이 필요로 할 때만)
+            orderbook = self._apply_pending_orderbook(stock_code)
+
             # 현재 틱 데이터를 저장소에 병합
-            self.latest_orderbook[stock_code].update(tick_data)
-            self.latest_orderbook[stock_code]['timestamp'] = time.time()
-            
+            orderbook.update(tick_data)
+            orderbook['timestamp'] = time.time()
+
             # 최종 데이터로 지표 계산 (저장소의 모든 데이터 사용)
-            final_data = self.latest_orderbook[stock_code].copy()
+            final_data = orderbook.copy()
             
             # 디버깅 로그 (처음 5번만)
             if len(self.calculators[stock_code].price_buffer) < 5:
@@ -666,6 +1059,13 @@ class DataProcessor:
             # 지표 계산 및 CSV 저장
             indicators = self.calculators[stock_code].update_tick_data(final_data)
             
+            # 봉 갱신 (체결만)
+            if real_type == "주식체결":
+                self.bar_aggregator.on_trade(stock_code, final_data)
+            
+            if indicators and self.state_table:
+                self.state_table.update(stock_code, indicators)
+            
             if indicators and self.indicator_callback:
                 self.indicator_callback(stock_code, indicators)
             
@@ -676,6 +1076,8 @@ class DataProcessor:
             import traceback
             self.logger.error(f"상세 오류: {traceback.format_exc()}")
             return None
+        finally:
+            clear_stock_tag()
     
     def process_tr_data(self, tr_code: str, tr_data: Dict):
         """TR 데이터 처리 (수급 데이터, 전일고가 등)"""
@@ -701,7 +1103,163 @@ class DataProcessor:
     def set_indicator_callback(self, callback: callable):
         """지표 콜백 함수 설정"""
         self.indicator_callback = callback
+
+    def set_state_table(self, state_table):
+        """최신 상태 테이블 설정 (체결마다 지표 행, 호가 이벤트마다 호가 갱신)"""
+        self.state_table = state_table
+
+    def add_stock(self, stock_code: str, investor_manager=None) -> IndicatorCalculator:
+        """종목 추가 - 계산기 생성 (이미 있으면 기존 계산기/워밍업 상태 유지)"""
+        calculator = self.calculators.get(stock_code)
+        if calculator is None:
+            calculator = IndicatorCalculator(stock_code, self.kiwoom_client)
+            calculator.investor_manager = investor_manager
+            self.calculators[stock_code] = calculator
+            self.logger.info(f"종목 추가: {stock_code} (계산기 {len(self.calculators)}개)")
+
+        if stock_code not in self.target_stocks:
+            self.target_stocks.append(stock_code)
+        return calculator
+
+    def remove_stock(self, stock_code: str) -> bool:
+        """종목 제거 - 계산기/호가 저장소 정리 (다른 종목 상태는 유지)"""
+        if stock_code in self.target_stocks:
+            self.target_stocks.remove(stock_code)
+
+        if self.calculators.pop(stock_code, None) is None:
+            return False
+
+        self.latest_orderbook.pop(stock_code, None)
+        self.orderbook_coalescer.discard(stock_code)
+        self.bar_aggregator.remove_stock(stock_code)
+        if self.state_table:
+            self.state_table.remove_stock(stock_code)
+        self.logger.info(f"종목 제거: {stock_code} (계산기 {len(self.calculators)}개)")
+        return True
     
+    def save_snapshot(self) -> bool:
+        """전체 계산기 상태 스냅샷 저장 (주기 타이머/종료시 호출)"""
+        return self.snapshot_store.save(
+            {stock_code: calculator.get_state() for stock_code, calculator in self.calculators.items()})
+
+    def restore_snapshot(self) -> List[str]:
+        """
+        같은 거래일 스냅샷으로 계산기 상태 복원 (현재 대상 종목만)
+        마지막 호가도 저장소에 복원 - 재시작 직후 호가 이벤트 전 체결 틱도 호가 0 없이 계산
+
+        Returns:
+            List[str]: 복원된 종목
+        """
+        states = self.snapshot_store.load()
+        restored = []
+        for stock_code, state in states.items():
+            calculator = self.calculators.get(stock_code)
+            if calculator is None:
+                continue
+            try:
+                calculator.set_state(state)
+                if calculator.bid_ask_buffer:
+                    self.latest_orderbook[stock_code] = dict(calculator.bid_ask_buffer[-1])
+                restored.append(stock_code)
+            except Exception as e:
+                self.logger.error(f"계산기 상태 복원 실패 ({stock_code}): {e}")
+                self.calculators[stock_code] = IndicatorCalculator(stock_code, self.kiwoom_client)
+        return restored
+
+    def backfill_stock(self, stock_code: str, rows: List[Dict[str, str]]) -> int:
+        """
+        저장된 CSV 행으로 계산기 버퍼 워밍업
+        행의 가격/거래량/호가로 틱을 재생해 상태만 쌓음 - 콜백 없음 (CSV 재기록 안함)
+        계산기 상태보다 새로운 행만 재생 → 스냅샷 복원 종목은 스냅샷 저장 이후(최대 SNAPSHOT_INTERVAL) 체결만 보충
+
+        Args:
+            rows: CSVWriter.read_tail_rows 결과 (오래된 행부터)
+
+        Returns:
+            int: 재생된 행 수
+        """
+        calculator = self.calculators.get(stock_code)
+        if calculator is None or not rows:
+            return 0
+
+        # 계산기가 이미 반영한 마지막 체결 (같은 ms 체결은 누적거래량으로 구분)
+        last_time = calculator.last_update_time
+        last_volume = calculator.prev_volume
+        restored = last_time > 0
+        if restored and float(rows[0].get('time') or 0) > last_time:
+            self.logger.warning(f"CSV 꼬리가 스냅샷 이후 체결을 모두 포함하지 못함 ({len(rows)}행): {stock_code}")
+
+        replayed = 0
+        for row in rows:
+            try:
+                tick_data = {
+                    key: int(float(value)) if key in IndicatorConfig.INTEGER_COLUMNS else float(value)
+                    for key, value in row.items() if key != 'stock_code' and value
+                }
+            except ValueError:
+                continue  # 손상된 행 건너뜀
+            if tick_data.get('current_price', 0) <= 0:
+                continue
+            row_time = int(tick_data.get('time', 0))
+            if row_time < last_time or (row_time == last_time and int(tick_data.get('volume', 0)) <= last_volume):
+                continue  # 스냅샷에 이미 반영된 체결
+            calculator.update_tick_data(tick_data)
+            replayed += 1
+
+        if replayed and calculator.bid_ask_buffer:
+            self.latest_orderbook[stock_code] = dict(calculator.bid_ask_buffer[-1])
+
+        if restored:
+            self.logger.info(f"♻️ 스냅샷 이후 체결 보충: {stock_code} - CSV {replayed}행 재생")
+        else:
+            self.logger.info(f"♻️ 지표 버퍼 워밍업: {stock_code} - CSV {replayed}행 재생")
+        return replayed
+
+    def seed_session_vwap(self, stock_code: str, rows: Iterable[Tuple]) -> int:
+        """
+        콜드 워밍업 후 세션 VWAP 누적값을 당일 CSV 전체로 다시 계산
+        꼬리 재생(BACKFILL_ROWS)만으로는 세션 처음부터의 Σ가격×수량이 빠짐 → 파일 처음부터 1회 순방향 합산
+        계산기가 마지막으로 반영한 체결(time, volume)까지만 합산
+
+        Args:
+            rows: CSVWriter.iter_columns(종목, ['time', 'volume', 'current_price', 'trade_qty']) 결과
+                  (trade_qty가 없는 이전 형식 파일은 누적거래량 차분)
+
+        Returns:
+            int: 합산된 체결 행 수
+        """
+        calculator = self.calculators.get(stock_code)
+        if calculator is None or calculator.last_update_time <= 0:
+            return 0
+
+        last_time = calculator.last_update_time
+        last_volume = calculator.prev_volume
+        session_pv = 0
+        session_qty = 0
+        prev_volume = 0
+        counted = 0
+        for time_value, volume_value, price_value, qty_value in rows:
+            try:
+                row_time = int(float(time_value))
+                volume = int(float(volume_value or 0))
+                price = int(float(price_value or 0))
+                qty = int(float(qty_value)) if qty_value is not None else max(volume - prev_volume, 0)
+            except ValueError:
+                continue
+            if row_time > last_time or (row_time == last_time and volume > last_volume):
+                break
+            prev_volume = volume
+            if price > 0 and qty > 0:
+                session_pv += price * qty
+                session_qty += qty
+                counted += 1
+
+        # 손상 행이 많아 꼬리 재생보다 적게 합산되면 기존 값 유지
+        if session_qty >= calculator.session_qty:
+            calculator.session_pv = session_pv
+            calculator.session_qty = session_qty
+        return counted
+
     def get_all_status(self) -> Dict:
         """전체 상태 조회"""
         status = {
@@ -711,19 +1269,27 @@ class DataProcessor:
         
         for stock_code, calc in self.calculators.items():
             status['calculators'][stock_code] = calc.get_buffer_status()
-        
+
+        status['orderbook'] = self.orderbook_coalescer.get_statistics()
+
         return status
-    
-    def _update_orderbook_only(self, stock_code: str, tick_data: Dict):
-        """호가 이벤트 전용: 메모리만 업데이트, CSV 저장 안함"""
-        if stock_code not in self.latest_orderbook:
-            self.latest_orderbook[stock_code] = {}
-        
-        # 호가 데이터를 저장소에 업데이트
-        self.latest_orderbook[stock_code].update(tick_data)
-        self.latest_orderbook[stock_code]['timestamp'] = time.time()
-        
-        self.logger.debug(f"호가 저장소 업데이트 완료: {stock_code}")
+
+    def get_latest_orderbook(self, stock_code: str) -> Dict:
+        """종목 최신 호가 조회 (미반영 호가 포함)"""
+        return self._apply_pending_orderbook(stock_code)
+
+    def _apply_pending_orderbook(self, stock_code: str) -> Dict:
+        """병합기의 미반영 호가를 저장소에 반영 후 저장소 반환"""
+        orderbook = self.latest_orderbook.get(stock_code)
+        if orderbook is None:
+            orderbook = self.latest_orderbook[stock_code] = {}
+
+        pending = self.orderbook_coalescer.take(stock_code)
+        if pending is not None:
+            orderbook.update(pending)
+            orderbook['timestamp'] = time.time()
+
+        return orderbook
 
 if __name__ == "__main__":
     # 테스트
@@ -758,8 +1324,26 @@ if __name__ == "__main__":
 class InvestorNetManager:
     """수급 데이터 관리 - 단순하고 명확한 구조 (CLAUDE.md)"""
     
+    # CSV 수급 컬럼 -> 내부 키 (IndicatorConfig.INVESTOR_COLUMNS 순서)
+    COLUMN_KEYS = (
+        ('indiv_net_vol', 'individual'),
+        ('foreign_net_vol', 'foreign'),
+        ('inst_net_vol', 'institution'),
+        ('pension_net_vol', 'pension'),
+        ('trust_net_vol', 'investment'),
+        ('insurance_net_vol', 'insurance'),
+        ('private_fund_net_vol', 'private_fund'),
+        ('bank_net_vol', 'bank'),
+        ('state_net_vol', 'state'),
+        ('other_net_vol', 'other_corp'),
+        ('prog_net_vol', 'program')
+    )
+    
+    # TR 수신 전 행 조각 (읽기 전용)
+    EMPTY_ROW = MappingProxyType({column: 0 for column in IndicatorConfig.INVESTOR_COLUMNS})
+    
     def __init__(self, stock_codes):
-        self.stock_codes = stock_codes
+        self.stock_codes = list(stock_codes)
         self.logger = logging.getLogger(__name__)
         
         # 종목별 현재 수급 데이터 (TR에서 받은 최신 누적값)
@@ -774,6 +1358,15 @@ class InvestorNetManager:
             'round': 0
         })
         
+        # 종목별 틱 첨부용 수급 행 조각 (TR 갱신 때 1회 생성, 읽기 전용) 및 버전 (= 스냅샷 ID)
+        self.rows: Dict[str, Mapping] = {}
+        self.versions: Dict[str, int] = defaultdict(int)
+        
+        # 장중 수급 시계열 (당일 기록이 있으면 복원하여 스냅샷 ID 이어감)
+        self.flow_store = InvestorFlowStore(stock_codes)
+        for stock_code in stock_codes:
+            self._restore_from_store(stock_code)
+        
     def _get_empty_dict(self):
         """빈 수급 딕셔너리 반환"""
         return {
@@ -806,12 +1399,12 @@ class InvestorNetManager:
             'foreign': int(tr_data.get('foreign_net', 0)),
             'institution': int(tr_data.get('inst_net', 0)),
             'pension': int(tr_data.get('pension_net', 0)),
-            'investment': int(tr_data.get('investment_net', 0)),
+            'investment': int(tr_data.get('trust_net', 0)),
             'insurance': int(tr_data.get('insurance_net', 0)),
             'private_fund': int(tr_data.get('private_fund_net', 0)),
             'bank': int(tr_data.get('bank_net', 0)),
             'state': int(tr_data.get('state_net', 0)),
-            'other_corp': int(tr_data.get('other_corp_net', 0)),
+            'other_corp': int(tr_data.get('other_net', 0)),
             'program': int(tr_data.get('prog_net', 0))  # 내외국인 데이터 (프로그램 아님)
         }
         
@@ -819,6 +1412,10 @@ class InvestorNetManager:
         self.last_update_info[stock_code]['time'] = time.time()
         self.last_update_info[stock_code]['round'] += 1
         
+        # 4. 틱 첨부용 행 조각 갱신 + 시계열 기록 (스냅샷 ID = 버전)
+        self._materialize_row(stock_code)
+        self.versions[stock_code] = self.flow_store.append(stock_code, self.rows[stock_code])
+        
         # 업데이트 로깅 (0이 아닌 값만)
         non_zero_items = {k: v for k, v in self.current_net_vol[stock_code].items() if v != 0}
         if non_zero_items:
@@ -827,6 +1424,68 @@ class InvestorNetManager:
         else:
             self.logger.warning(f"⚠️ {stock_code} - 모든 수급값이 0")
     
+    def record_unchanged(self, stock_code, tr_data):
+        """값이 그대로인 TR 응답 - 델타/행 조각 재계산 없이 시계열에 갱신 1행만 추가"""
+        if stock_code not in self.rows:
+            self.update_from_tr(stock_code, tr_data)
+            return
+        
+        self.last_update_info[stock_code]['time'] = time.time()
+        self.last_update_info[stock_code]['round'] += 1
+        self.versions[stock_code] = self.flow_store.append(stock_code, self.rows[stock_code])
+    
+    def _materialize_row(self, stock_code):
+        """현재 누적값으로 CSV 수급 컬럼 행 조각 생성 (읽기 전용)"""
+        current = self.current_net_vol[stock_code]
+        self.rows[stock_code] = MappingProxyType({column: current[key] for column, key in self.COLUMN_KEYS})
+    
+    def _restore_from_store(self, stock_code):
+        """당일 시계열의 마지막 스냅샷으로 현재값/행 조각/버전 복원 (재시작시)"""
+        count = self.flow_store.count(stock_code)
+        if count == 0:
+            return
+        
+        snapshot = self.flow_store.get_snapshot(stock_code, count)
+        self.current_net_vol[stock_code] = {key: snapshot[column] for column, key in self.COLUMN_KEYS}
+        if count >= 2:
+            previous = self.flow_store.get_snapshot(stock_code, count - 1)
+            self.previous_net_vol[stock_code] = {key: previous[column] for column, key in self.COLUMN_KEYS}
+        
+        self._materialize_row(stock_code)
+        self.versions[stock_code] = count
+        self.last_update_info[stock_code]['time'] = snapshot['time_ms'] / 1000
+        self.last_update_info[stock_code]['round'] = count
+    
+    def add_stock(self, stock_code):
+        """종목 추가 - 당일 수급 시계열 복원 (이미 있으면 무시)"""
+        if stock_code in self.flow_store.times:
+            return
+        if stock_code not in self.stock_codes:
+            self.stock_codes.append(stock_code)
+        self.flow_store.load(stock_code, datetime.now().strftime('%Y%m%d'))
+        self._restore_from_store(stock_code)
+
+    def remove_stock(self, stock_code):
+        """종목 제거 - 메모리 상태 정리 (디스크 시계열은 유지)"""
+        if stock_code in self.stock_codes:
+            self.stock_codes.remove(stock_code)
+        for state in (self.current_net_vol, self.previous_net_vol, self.last_update_info,
+                      self.rows, self.versions):
+            state.pop(stock_code, None)
+        self.flow_store.unload(stock_code)
+
+    def get_flow_velocity(self, stock_code, column, minutes) -> float:
+        """최근 N분 수급 속도 (분당 순매수량 변화, column은 INVESTOR_COLUMNS 중 하나)"""
+        return self.flow_store.flow_velocity(stock_code, column, minutes)
+    
+    def get_row(self, stock_code) -> Mapping:
+        """틱 첨부용 수급 행 조각 (CSV 컬럼명 -> 누적 순매수량, TR 수신 전이면 EMPTY_ROW)"""
+        return self.rows.get(stock_code, self.EMPTY_ROW)
+    
+    def get_version(self, stock_code) -> int:
+        """수급 행 조각 버전 = 당일 수급 시계열 스냅샷 ID (TR 갱신마다 1 증가, 0이면 미수신)"""
+        return self.versions.get(stock_code, 0)
+    
     def get_data_for_tick(self, stock_code):
         """틱마다 현재 저장된 값 반환"""
         current = self.current_net_vol.get(stock_code, self._get_empty_dict())
@@ -0,0 +1,150 @@
+"""
+지표 레지스트리 (의존성 DAG)
+각 지표가 입력(선행 지표/중간값), 창 상태(계산기 속성), 출력 컬럼을 선언하고
+시작시 활성 지표만 위상 정렬한 계산 계획을 1회 생성 → 틱마다 계획 순서대로 실행
+- 공유 중간값 (ma5, 호가 잔량 합계 등)은 틱당 1회 계산
+- 비활성 지표 (IndicatorConfig.DISABLED_INDICATORS)는 활성 지표가 의존하지 않으면 계획에서 제외 (비용 0)
+- 사용자 지표: 계산기 생성 전에 REGISTRY.register(IndicatorSpec(...))
+"""
+
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+class IndicatorSpec:
+    """
+    지표 선언
+
+    Args:
+        name: 지표 이름 (의존성/비활성 설정에서 사용)
+        compute: fn(calculator, tick_data, values) → 출력 1개면 값, 여러 개면 출력 순서 시퀀스 또는 {컬럼: 값}
+                 values에는 이번 틱에서 먼저 계산된 지표/중간값이 들어 있음
+        outputs: 출력 컬럼 (기본: name 1개)
+        requires: 먼저 계산되어야 하는 지표 이름
+        state: 지표가 갱신하는 계산기 창 상태 속성 (스냅샷/문서용)
+        intermediate: True면 출력을 지표 행에 남기지 않음 (공유 중간값)
+    """
+
+    def __init__(self, name: str, compute: Callable, outputs: Sequence[str] = None,
+                 requires: Sequence[str] = (), state: Sequence[str] = (), intermediate: bool = False):
+        self.name = name
+        self.compute = compute
+        self.outputs: Tuple[str, ...] = tuple(outputs) if outputs else (name,)
+        self.requires: Tuple[str, ...] = tuple(requires)
+        self.state: Tuple[str, ...] = tuple(state)
+        self.intermediate = intermediate
+
+    def __repr__(self) -> str:
+        return f"IndicatorSpec({self.name!r}, outputs={list(self.outputs)}, requires={list(self.requires)})"
+
+class IndicatorPlan:
+    """위상 정렬된 계산 계획 (틱마다 steps 순서대로 실행)"""
+
+    def __init__(self, specs: List[IndicatorSpec]):
+        self.specs = specs
+        self.names = frozenset(spec.name for spec in specs)
+        # (계산 함수, 출력 컬럼, 단일 출력 컬럼 또는 None)
+        self.steps = [(spec.compute, spec.outputs, spec.outputs[0] if len(spec.outputs) == 1 else None)
+                      for spec in specs]
+        self.intermediates = tuple(column for spec in specs if spec.intermediate for column in spec.outputs)
+        self.columns = [column for spec in specs if not spec.intermediate for column in spec.outputs]
+
+    def run(self, calculator, tick_data: Dict) -> Dict:
+        """계획 실행 → 지표 행 (중간값 제외)"""
+        values = {}
+        for compute, outputs, single in self.steps:
+            result = compute(calculator, tick_data, values)
+            if single is not None:
+                values[single] = result
+            elif isinstance(result, Mapping):
+                values.update(result)
+            else:
+                values.update(zip(outputs, result))
+
+        for column in self.intermediates:
+            del values[column]
+        return values
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+class IndicatorRegistry:
+    """지표 선언 모음 + 계산 계획 생성 (설정별 캐시)"""
+
+    def __init__(self):
+        self.specs: Dict[str, IndicatorSpec] = {}  # 등록 순서 유지 (위상 정렬 동순위 순서)
+        self.plans: Dict[frozenset, IndicatorPlan] = {}
+
+    def register(self, spec: IndicatorSpec, replace: bool = False) -> IndicatorSpec:
+        """
+        지표 등록
+
+        Raises:
+            ValueError: 이름 중복 (replace=False) 또는 다른 지표와 출력 컬럼 중복
+        """
+        if spec.name in self.specs and not replace:
+            raise ValueError(f"이미 등록된 지표: {spec.name}")
+
+        for other in self.specs.values():
+            if other.name != spec.name and set(other.outputs) & set(spec.outputs):
+                raise ValueError(f"출력 컬럼 중복: {spec.name} ↔ {other.name} "
+                                 f"({sorted(set(other.outputs) & set(spec.outputs))})")
+
+        self.specs[spec.name] = spec
+        self.plans.clear()
+        return spec
+
+    def unregister(self, name: str):
+        """지표 제거 (없으면 무시)"""
+        if self.specs.pop(name, None) is not None:
+            self.plans.clear()
+
+    def get_plan(self, disabled: Iterable[str] = ()) -> IndicatorPlan:
+        """비활성 지표를 뺀 계산 계획 (같은 설정이면 캐시 재사용)"""
+        key = frozenset(disabled)
+        plan = self.plans.get(key)
+        if plan is None:
+            plan = self.plans[key] = IndicatorPlan(self.build_order(key))
+        return plan
+
+    def build_order(self, disabled: Iterable[str] = ()) -> List[IndicatorSpec]:
+        """
+        활성 지표 + 의존 지표를 위상 정렬
+
+        Raises:
+            ValueError: 등록되지 않은 의존 지표 또는 순환 의존
+        """
+        disabled = set(disabled)
+
+        # 활성 지표에서 의존성을 따라 필요한 지표 수집 (비활성이어도 의존되면 포함)
+        needed = set()
+        stack = [name for name in self.specs if name not in disabled]
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            spec = self.specs.get(name)
+            if spec is None:
+                raise ValueError(f"등록되지 않은 지표 의존: {name}")
+            needed.add(name)
+            stack.extend(spec.requires)
+
+        # Kahn 위상 정렬 (동순위는 등록 순서)
+        order = []
+        done = set()
+        pending = [name for name in self.specs if name in needed]
+        while pending:
+            ready = [name for name in pending if all(dep in done for dep in self.specs[name].requires)]
+            if not ready:
+                raise ValueError(f"지표 순환 의존: {pending}")
+            for name in ready:
+                order.append(self.specs[name])
+                done.add(name)
+            pending = [name for name in pending if name not in done]
+        return order
+
+    def disabled_columns(self, disabled: Iterable[str]) -> List[str]:
+        """비활성 지표의 출력 컬럼 (CSV 헤더에서 제외)"""
+        return [column for name in disabled if name in self.specs for column in self.specs[name].outputs]
+
+# 기본 레지스트리 (내장 지표는 data_processor에서 등록)
+REGISTRY = IndicatorRegistry()
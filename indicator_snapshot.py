@@ -0,0 +1,235 @@
+"""
+지표 계산기 상태 스냅샷 (웜 재시작)
+종목별 IndicatorCalculator 상태(링 버퍼, OBV, 가속도 EMA, 스토캐스틱 K 버퍼, 수급 스냅샷)를
+하나의 바이너리 파일로 주기적/종료시 저장 → 같은 거래일 재시작시 복원 (RSI/스토캐스틱/z_vol 워밍업 생략)
+"""
+
+import os
+import time
+import zlib
+import struct
+import logging
+from array import array
+from datetime import datetime
+from typing import Dict
+
+from config import DataConfig
+
+# 파일 형식 (little-endian)
+#   헤더: 매직, 버전, 거래일(YYYYMMDD), 저장시각(epoch ms), 종목수
+#   종목: 코드 길이 + 코드, 스칼라 필드, 배열 필드(개수 + 값), 사전 필드(개수 + (키 길이, 키, 값))
+#   끝: 본문 CRC32 (잘린/손상 파일은 통째로 무시)
+FILE_MAGIC = b'IDS1'
+FILE_VERSION = 4
+HEADER_STRUCT = struct.Struct('<4sHIqI')
+CRC_STRUCT = struct.Struct('<I')
+COUNT_STRUCT = struct.Struct('<I')
+
+# 스칼라 상태 (이름, struct 형식) - 가격은 원 단위 정수 ('q')
+SCALAR_FIELDS = (
+    ('prev_price', 'q'),
+    ('prev_volume', 'q'),
+    ('prev_obv', 'd'),
+    ('prev_accel', 'd'),
+    ('prev_close', 'q'),
+    ('prev_day_high', 'q'),
+    ('session_start_price', 'q'),
+    ('last_update_time', 'q'),
+    ('session_pv', 'q'),
+    ('session_qty', 'q'),
+    ('last_trade_sign', 'q'),
+    ('ofi_accum', 'd'),
+    ('ofi_bid', 'q'),
+    ('ofi_bid_qty', 'q'),
+    ('ofi_ask', 'q'),
+    ('ofi_ask_qty', 'q'),
+)
+SCALAR_STRUCT = struct.Struct('<' + ''.join(fmt for _, fmt in SCALAR_FIELDS))
+
+# 배열 상태 (이름, array 형식) - 링 버퍼는 오래된 값부터
+ARRAY_FIELDS = (
+    ('price_buffer', 'q'),
+    ('volume_buffer', 'q'),
+    ('time_buffer', 'q'),
+    ('high_buffer', 'q'),
+    ('low_buffer', 'q'),
+    ('rsi_gains', 'd'),
+    ('rsi_losses', 'd'),
+    ('stoch_k_buffer', 'd'),
+    ('atr_buffer', 'd'),
+    ('accel_times', 'q'),
+    ('accel_prices', 'q'),
+    ('bid_ask_rows', 'q'),  # 호가 버퍼 평탄화 (IndicatorCalculator.BID_ASK_KEYS 순서 - 가격/잔량 모두 정수)
+    ('vwap_times', 'q'),    # 구간 VWAP 창 (time, 체결가, 체결량)
+    ('vwap_prices', 'q'),
+    ('vwap_qtys', 'q'),
+    ('trade_qty_buffer', 'q'),  # 체결량 시계열 (누적합은 복원시 재계산)
+)
+
+# 사전 상태 (수급 TR 원본값 - 숫자 항목만)
+DICT_FIELDS = ('investor_net_data', 'prev_investor_net')
+
+def trading_date(timestamp: float = None) -> str:
+    """거래일 (YYYYMMDD, 로컬 날짜)"""
+    return datetime.fromtimestamp(timestamp if timestamp is not None else time.time()).strftime('%Y%m%d')
+
+def encode_state(stock_code: str, state: Dict) -> bytes:
+    """계산기 상태 1종목 → 바이트"""
+    code = stock_code.encode('ascii')
+    parts = [struct.pack('<B', len(code)), code,
+             SCALAR_STRUCT.pack(*(state[name] for name, _ in SCALAR_FIELDS))]
+
+    for name, typecode in ARRAY_FIELDS:
+        values = array(typecode, state[name])
+        parts.append(COUNT_STRUCT.pack(len(values)))
+        parts.append(values.tobytes())
+
+    for name in DICT_FIELDS:
+        items = [(str(key).encode('utf-8'), float(value)) for key, value in state[name].items()
+                 if isinstance(value, (int, float))]
+        parts.append(COUNT_STRUCT.pack(len(items)))
+        for key, value in items:
+            parts.append(struct.pack(f'<B{len(key)}sd', len(key), key, value))
+
+    return b''.join(parts)
+
+def decode_state(view: memoryview, offset: int):
+    """바이트 → (종목코드, 계산기 상태, 다음 offset)"""
+    (code_len,) = struct.unpack_from('<B', view, offset)
+    offset += 1
+    stock_code = bytes(view[offset:offset + code_len]).decode('ascii')
+    offset += code_len
+
+    state = dict(zip((name for name, _ in SCALAR_FIELDS), SCALAR_STRUCT.unpack_from(view, offset)))
+    offset += SCALAR_STRUCT.size
+
+    for name, typecode in ARRAY_FIELDS:
+        (count,) = COUNT_STRUCT.unpack_from(view, offset)
+        offset += COUNT_STRUCT.size
+        values = array(typecode)
+        size = count * values.itemsize
+        values.frombytes(view[offset:offset + size])
+        state[name] = values
+        offset += size
+
+    for name in DICT_FIELDS:
+        (count,) = COUNT_STRUCT.unpack_from(view, offset)
+        offset += COUNT_STRUCT.size
+        items = {}
+        for _ in range(count):
+            (key_len,) = struct.unpack_from('<B', view, offset)
+            key = bytes(view[offset + 1:offset + 1 + key_len]).decode('utf-8')
+            (value,) = struct.unpack_from('<d', view, offset + 1 + key_len)
+            items[key] = int(value) if value.is_integer() else value
+            offset += 1 + key_len + 8
+        state[name] = items
+
+    return stock_code, state, offset
+
+class IndicatorSnapshotStore:
+    """
+    계산기 상태 스냅샷 파일 (DataConfig.SNAPSHOT_FILE)
+    - save: 임시 파일에 쓴 뒤 os.replace (저장 중 종료되어도 이전 스냅샷 유지)
+    - load: 같은 거래일 스냅샷만 반환 (전일 상태는 복원하지 않음)
+    """
+
+    def __init__(self, filepath: str = None):
+        self.logger = logging.getLogger(__name__)
+        self.filepath = filepath or DataConfig.SNAPSHOT_FILE
+
+        # 통계
+        self.save_count = 0
+        self.last_save_ms = 0.0
+        self.last_size = 0
+
+    def save(self, states: Dict[str, Dict]) -> bool:
+        """종목별 상태 저장 (종목코드 -> IndicatorCalculator.get_state())"""
+        start = time.perf_counter()
+        try:
+            body = b''.join(encode_state(stock_code, state) for stock_code, state in states.items())
+            header = HEADER_STRUCT.pack(FILE_MAGIC, FILE_VERSION, int(trading_date()),
+                                        int(time.time() * 1000), len(states))
+            data = header + body
+            data += CRC_STRUCT.pack(zlib.crc32(data))
+
+            directory = os.path.dirname(self.filepath)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_file = f"{self.filepath}.tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.filepath)
+
+            self.save_count += 1
+            self.last_save_ms = (time.perf_counter() - start) * 1000
+            self.last_size = len(data)
+            self.logger.debug(f"지표 상태 스냅샷 저장: {len(states)}종목, {len(data):,}바이트, {self.last_save_ms:.1f}ms")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"지표 상태 스냅샷 저장 실패: {e}")
+            return False
+
+    def load(self, date: str = None) -> Dict[str, Dict]:
+        """
+        스냅샷 복원
+
+        Args:
+            date: 거래일 (YYYYMMDD), None이면 오늘
+
+        Returns:
+            Dict[str, Dict]: 종목코드 -> 상태 (파일 없음/다른 거래일/손상이면 빈 dict)
+        """
+        if not os.path.exists(self.filepath):
+            return {}
+
+        start = time.perf_counter()
+        try:
+            with open(self.filepath, 'rb') as f:
+                data = f.read()
+
+            if len(data) < HEADER_STRUCT.size + CRC_STRUCT.size:
+                self.logger.warning(f"지표 상태 스냅샷 손상 (크기 {len(data)}), 무시: {self.filepath}")
+                return {}
+
+            (crc,) = CRC_STRUCT.unpack_from(data, len(data) - CRC_STRUCT.size)
+            if zlib.crc32(data[:-CRC_STRUCT.size]) != crc:
+                self.logger.warning(f"지표 상태 스냅샷 CRC 불일치, 무시: {self.filepath}")
+                return {}
+
+            magic, version, saved_date, saved_ms, count = HEADER_STRUCT.unpack_from(data, 0)
+            if magic != FILE_MAGIC or version != FILE_VERSION:
+                self.logger.warning(f"지표 상태 스냅샷 형식 불일치, 무시: {self.filepath}")
+                return {}
+
+            date = date or trading_date()
+            if str(saved_date) != date:
+                self.logger.info(f"지표 상태 스냅샷 거래일 다름 ({saved_date} ≠ {date}), 콜드 스타트")
+                return {}
+
+            view = memoryview(data)
+            offset = HEADER_STRUCT.size
+            states = {}
+            for _ in range(count):
+                stock_code, state, offset = decode_state(view, offset)
+                states[stock_code] = state
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            age_sec = time.time() - saved_ms / 1000
+            self.logger.info(f"♻️ 지표 상태 스냅샷 로드: {len(states)}종목, {elapsed_ms:.1f}ms (저장 {age_sec:.0f}초 전)")
+            return states
+
+        except Exception as e:
+            self.logger.error(f"지표 상태 스냅샷 로드 실패: {e}")
+            return {}
+
+    def get_statistics(self) -> Dict:
+        """저장 통계"""
+        return {
+            'filepath': self.filepath,
+            'saves': self.save_count,
+            'last_save_ms': self.last_save_ms,
+            'last_size': self.last_size
+        }
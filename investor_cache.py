@@ -0,0 +1,136 @@
+"""
+수급(OPT10059) 캐시
+(종목, 일자) 키로 최신 수급값 보관, 종목별 값 변화율 추적
+변화율 기반 적응형 갱신 주기 계산 - 전체 수급 TR 예산 이내로 조정
+"""
+
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from config import DataConfig, KiwoomConfig
+
+# 수급 비교에서 제외할 키 (값이 아닌 메타 정보)
+META_KEYS = ('stock_code', 'total_net')
+
+class InvestorFlowCache:
+    """
+    수급 캐시 + 적응형 갱신 주기
+    - 같은 (종목, 일자) 값이 그대로면 변경 없음으로 판단 → 스냅샷/델타 재계산 생략
+    - 종목별 변화율(EWMA) p에 대해 주기 = 기본주기 × 목표변화율 / p
+      (매번 바뀌는 종목은 짧게, 거의 안 바뀌는 종목은 길게)
+    - 전체 종목 분당 요청 수가 예산을 넘으면 모든 주기를 같은 비율로 늘림
+    """
+
+    def __init__(self, budget_per_minute: float = None):
+        self.logger = logging.getLogger(__name__)
+
+        self.budget_per_minute = budget_per_minute or DataConfig.INVESTOR_TR_BUDGET_PER_MINUTE
+
+        # (종목, 일자) -> 캐시 항목
+        self.entries: Dict[Tuple[str, str], Dict] = {}
+
+        # 종목별 변화율 EWMA (0~1, 처음엔 1 = 최소 주기로 시작)
+        self.change_ratio: Dict[str, float] = {}
+
+        # 종목별 희망 주기 (예산 적용 전)
+        self.desired_intervals: Dict[str, float] = {}
+
+        # 통계
+        self.update_count = 0
+        self.unchanged_count = 0
+
+    def register(self, stock_code: str):
+        """종목 등록 (예산 계산 대상)"""
+        if stock_code not in self.desired_intervals:
+            self.change_ratio[stock_code] = 1.0
+            self.desired_intervals[stock_code] = self._desired_interval(1.0)
+
+    def remove(self, stock_code: str):
+        """종목 제거"""
+        self.change_ratio.pop(stock_code, None)
+        self.desired_intervals.pop(stock_code, None)
+        for key in [key for key in self.entries if key[0] == stock_code]:
+            del self.entries[key]
+
+    def update(self, stock_code: str, tr_data: Dict, date: str = None) -> bool:
+        """
+        TR 응답 반영
+
+        Returns:
+            bool: 캐시된 값과 다르면 True (새 일자의 첫 응답 포함)
+        """
+        date = date or datetime.now().strftime('%Y%m%d')
+        values = tuple(sorted((k, v) for k, v in tr_data.items() if k not in META_KEYS))
+        now = time.time()
+
+        self.register(stock_code)
+        self.update_count += 1
+
+        key = (stock_code, date)
+        entry = self.entries.get(key)
+        changed = entry is None or entry['values'] != values
+
+        if entry is None:
+            # 일자가 바뀌면 이전 일자 항목 정리
+            for old_key in [k for k in self.entries if k[0] == stock_code]:
+                del self.entries[old_key]
+            entry = {'values': values, 'fetched_at': now, 'changed_at': now,
+                     'fetch_count': 0, 'change_count': 0}
+            self.entries[key] = entry
+
+        entry['fetch_count'] += 1
+        entry['fetched_at'] = now
+        if changed:
+            entry['values'] = values
+            entry['changed_at'] = now
+            entry['change_count'] += 1
+        else:
+            self.unchanged_count += 1
+
+        alpha = DataConfig.INVESTOR_CHANGE_ALPHA
+        ratio = alpha * (1.0 if changed else 0.0) + (1 - alpha) * self.change_ratio[stock_code]
+        self.change_ratio[stock_code] = ratio
+        self.desired_intervals[stock_code] = self._desired_interval(ratio)
+
+        return changed
+
+    def get(self, stock_code: str, date: str = None) -> Optional[Dict]:
+        """캐시된 수급값 (없으면 None)"""
+        date = date or datetime.now().strftime('%Y%m%d')
+        entry = self.entries.get((stock_code, date))
+        return dict(entry['values']) if entry else None
+
+    def _desired_interval(self, ratio: float) -> float:
+        """변화율 → 희망 갱신 주기 (최소/최대 주기로 제한)"""
+        if ratio <= 0:
+            return DataConfig.INVESTOR_MAX_INTERVAL
+        # 주기 갱신은 SimpleTRManager.can_request를 거치지 않음 → 종목별 동일 TR 제한을 여기서 보장
+        min_interval = max(DataConfig.INVESTOR_MIN_INTERVAL, KiwoomConfig.TR_INTERVAL_SECONDS)
+        interval = DataConfig.INVESTOR_UPDATE_INTERVAL * DataConfig.INVESTOR_TARGET_CHANGE_RATIO / ratio
+        return min(DataConfig.INVESTOR_MAX_INTERVAL, max(min_interval, interval))
+
+    def budget_scale(self) -> float:
+        """분당 예산 대비 희망 요청량 비율 (1 이하면 예산 이내)"""
+        demand = sum(60.0 / interval for interval in self.desired_intervals.values())
+        return max(1.0, demand / self.budget_per_minute)
+
+    def next_interval(self, stock_code: str) -> float:
+        """종목의 다음 갱신 주기 (초) - 예산 초과시 전 종목 동일 비율로 늘림"""
+        self.register(stock_code)
+        return self.desired_intervals[stock_code] * self.budget_scale()
+
+    def get_statistics(self) -> Dict:
+        """캐시 통계"""
+        scale = self.budget_scale()
+        return {
+            'stocks': len(self.desired_intervals),
+            'updates': self.update_count,
+            'unchanged': self.unchanged_count,
+            'budget_per_minute': self.budget_per_minute,
+            'demand_per_minute': sum(60.0 / iv for iv in self.desired_intervals.values()) / scale
+            if self.desired_intervals else 0.0,
+            'budget_scale': scale,
+            'intervals': {code: iv * scale for code, iv in self.desired_intervals.items()}
+        }
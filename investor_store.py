@@ -0,0 +1,196 @@
+"""
+장중 수급(OPT10059) 시계열 저장소
+종목별로 TR 갱신마다 1행 (수신시각 + 11개 수급 누적값) 을 배열에 추가하고 디스크에 append
+틱 CSV에는 스냅샷 ID만 기록 → 수급 값은 이 저장소에서 조인
+"""
+
+import os
+import time
+import struct
+import logging
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from config import DataConfig, IndicatorConfig
+
+# 파일 형식: 헤더(매직, 컬럼수) + 레코드(time_ms, 값 × 컬럼수) 반복, 모두 little-endian int64
+FILE_MAGIC = b'IFS1'
+HEADER_FORMAT = '<4sH'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+class InvestorFlowStore:
+    """
+    종목별 수급 스냅샷 시계열
+    - 스냅샷 ID: 해당 일자 1부터 증가 (ID = 행 번호 + 1, 0 = 미수신)
+    - 메모리: array('q') 2개 (시각, 값 평탄화) - 스냅샷당 96바이트
+    - 디스크: {INVESTOR_STORE_DIR}/{종목}_{YYYYMMDD}.bin 에 레코드 append (재시작시 복원)
+    """
+
+    def __init__(self, stock_codes: List[str] = None, base_dir: str = None):
+        self.logger = logging.getLogger(__name__)
+
+        self.base_dir = base_dir or DataConfig.INVESTOR_STORE_DIR
+        self.columns = list(IndicatorConfig.INVESTOR_COLUMNS)
+        self.column_index = {column: idx for idx, column in enumerate(self.columns)}
+        self.width = len(self.columns)
+        self.record_struct = struct.Struct(f'<{self.width + 1}q')
+
+        # 종목별 배열 및 현재 일자
+        self.times: Dict[str, array] = {}
+        self.values: Dict[str, array] = {}
+        self.dates: Dict[str, str] = {}
+
+        os.makedirs(self.base_dir, exist_ok=True)
+
+        today = datetime.now().strftime('%Y%m%d')
+        for stock_code in stock_codes or []:
+            self.load(stock_code, today)
+
+    def get_filepath(self, stock_code: str, date: str) -> str:
+        """종목/일자별 저장 파일 경로"""
+        return os.path.join(self.base_dir, f"{stock_code}_{date}.bin")
+
+    # ------------------------------------------------------------------------
+    # 기록/복원
+    # ------------------------------------------------------------------------
+
+    def load(self, stock_code: str, date: str) -> int:
+        """디스크에서 해당 일자 시계열 복원 (파일 없으면 빈 시계열)"""
+        self.times[stock_code] = array('q')
+        self.values[stock_code] = array('q')
+        self.dates[stock_code] = date
+
+        filepath = self.get_filepath(stock_code, date)
+        if not os.path.exists(filepath):
+            return 0
+
+        try:
+            with open(filepath, 'rb') as f:
+                magic, width = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+                if magic != FILE_MAGIC or width != self.width:
+                    self.logger.warning(f"수급 시계열 파일 형식 불일치, 무시: {filepath}")
+                    return 0
+
+                data = f.read()
+
+            # 마지막 레코드가 잘린 경우(비정상 종료) 온전한 레코드까지만 사용
+            usable = len(data) - len(data) % self.record_struct.size
+            for record in self.record_struct.iter_unpack(data[:usable]):
+                self.times[stock_code].append(record[0])
+                self.values[stock_code].extend(record[1:])
+
+            count = len(self.times[stock_code])
+            self.logger.info(f"수급 시계열 복원: {stock_code} {date} - {count}개 스냅샷")
+            return count
+
+        except Exception as e:
+            self.logger.error(f"수급 시계열 복원 실패 ({stock_code}): {e}")
+            self.times[stock_code] = array('q')
+            self.values[stock_code] = array('q')
+            return 0
+
+    def append(self, stock_code: str, row: Mapping, time_ms: int = None) -> int:
+        """
+        스냅샷 1행 추가 (메모리 + 디스크)
+
+        Args:
+            row: 수급 컬럼명 -> 누적 순매수량 (InvestorNetManager 행 조각)
+            time_ms: 수신시각 (epoch ms), None이면 현재
+
+        Returns:
+            int: 스냅샷 ID (해당 일자 1부터)
+        """
+        time_ms = int(time_ms if time_ms is not None else time.time() * 1000)
+        date = datetime.fromtimestamp(time_ms / 1000).strftime('%Y%m%d')
+        if self.dates.get(stock_code) != date:
+            self.load(stock_code, date)
+
+        record = [time_ms] + [int(row.get(column, 0)) for column in self.columns]
+        self.times[stock_code].append(time_ms)
+        self.values[stock_code].extend(record[1:])
+
+        try:
+            filepath = self.get_filepath(stock_code, date)
+            new_file = not os.path.exists(filepath)
+            with open(filepath, 'ab') as f:
+                if new_file:
+                    f.write(struct.pack(HEADER_FORMAT, FILE_MAGIC, self.width))
+                f.write(self.record_struct.pack(*record))
+        except Exception as e:
+            self.logger.error(f"수급 시계열 저장 실패 ({stock_code}): {e}")
+
+        return len(self.times[stock_code])
+
+    def unload(self, stock_code: str):
+        """종목 메모리 해제 (디스크 파일 유지 - 다시 load하면 복원)"""
+        self.times.pop(stock_code, None)
+        self.values.pop(stock_code, None)
+        self.dates.pop(stock_code, None)
+
+    # ------------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------------
+
+    def count(self, stock_code: str) -> int:
+        """스냅샷 수 (= 마지막 스냅샷 ID)"""
+        return len(self.times.get(stock_code, ()))
+
+    def get_snapshot(self, stock_code: str, snapshot_id: int) -> Optional[Dict]:
+        """스냅샷 ID로 행 조회 (time_ms + 수급 컬럼)"""
+        if not 1 <= snapshot_id <= self.count(stock_code):
+            return None
+
+        idx = snapshot_id - 1
+        offset = idx * self.width
+        snapshot = dict(zip(self.columns, self.values[stock_code][offset:offset + self.width]))
+        snapshot['time_ms'] = self.times[stock_code][idx]
+        return snapshot
+
+    def get_series(self, stock_code: str, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        """컬럼 시계열 (시각 ms 배열, 값 배열) - 복사본 (버퍼 뷰를 남기면 array 확장 불가)"""
+        times = np.frombuffer(self.times.get(stock_code, array('q')), dtype=np.int64).copy()
+        values = np.frombuffer(self.values.get(stock_code, array('q')), dtype=np.int64).copy()
+        if len(times) == 0:
+            return times, values
+        return times, values.reshape(-1, self.width)[:, self.column_index[column]]
+
+    def value_at(self, stock_code: str, column: str, time_ms: int) -> Optional[int]:
+        """time_ms 시점에 유효했던 값 (그 이전 마지막 스냅샷, 없으면 None)"""
+        times = self.times.get(stock_code)
+        if not times:
+            return None
+        idx = bisect_right(times, time_ms) - 1
+        if idx < 0:
+            return None
+        return self.values[stock_code][idx * self.width + self.column_index[column]]
+
+    def flow_velocity(self, stock_code: str, column: str, minutes: float) -> float:
+        """
+        최근 N분 수급 속도 (분당 순매수량 변화)
+        마지막 스냅샷과 N분 전 시점에 유효했던 스냅샷(없으면 첫 스냅샷)의 차이 / 실제 경과 분
+        """
+        times = self.times.get(stock_code)
+        if not times or len(times) < 2:
+            return 0.0
+
+        last_idx = len(times) - 1
+        ref_idx = max(0, bisect_right(times, times[last_idx] - minutes * 60000) - 1)
+        elapsed_min = (times[last_idx] - times[ref_idx]) / 60000
+        if elapsed_min <= 0:
+            return 0.0
+
+        col = self.column_index[column]
+        values = self.values[stock_code]
+        delta = values[last_idx * self.width + col] - values[ref_idx * self.width + col]
+        return delta / elapsed_min
+
+    def get_statistics(self) -> Dict:
+        """저장소 통계"""
+        return {
+            'stocks': len(self.times),
+            'snapshots': {stock_code: len(times) for stock_code, times in self.times.items()}
+        }
@@ -8,21 +8,49 @@ import time
 import logging
 import asyncio
 from datetime import datetime
-from queue import Queue, Empty
+from concurrent.futures import Future
 from typing import Dict, List, Callable, Optional
-from collections import defaultdict
+from collections import defaultdict, deque
 
 from PyQt5.QtWidgets import QApplication, QWidget
-from PyQt5.QAxContainer import QAxWidget  
 from PyQt5.QtCore import QEventLoop, QTimer
 
+try:
+    from PyQt5.QAxContainer import QAxWidget  # Windows 전용 (ActiveX)
+except ImportError:
+    QAxWidget = None
+
 from config import (
     TARGET_STOCKS, KiwoomConfig, DataConfig, RealDataFID, TRCode, OptimizedFID
 )
+from tick_clock import TickClock
+from investor_cache import InvestorFlowCache
+from screen_allocator import ScreenPool
+from tr_scheduler import (
+    TRScheduler, PRIORITY_DEFAULT, PRIORITY_INVESTOR, PRIORITY_PREV_HIGH, TR_ERROR_MESSAGES
+)
 
 # 자동 로그인 비활성화
 SECURE_LOGIN_AVAILABLE = False
 
+def create_ocx(parent: QWidget, stock_codes: List[str] = None, transport: str = None):
+    """
+    OCX 전송 방식 선택 (KiwoomConfig.TRANSPORT)
+    - "ocx": 키움 OpenAPI+ ActiveX (Windows)
+    - "mock": mock_ocx.MockKiwoomOCX (합성 시세, 헤드리스 부하 테스트)
+    """
+    transport = (transport or KiwoomConfig.TRANSPORT).lower()
+    if transport == "mock":
+        from mock_ocx import MockKiwoomOCX
+        return MockKiwoomOCX.from_config(stock_codes or TARGET_STOCKS)
+
+    if transport != "ocx":
+        raise ValueError(f"알 수 없는 전송 방식: {transport} (ocx / mock)")
+    if QAxWidget is None:
+        raise RuntimeError("PyQt5.QAxContainer를 사용할 수 없습니다 (Windows 전용) - "
+                           "KIWOOM_TRANSPORT=mock 으로 모의 OCX를 사용하세요")
+    return QAxWidget("KHOPENAPI.KHOpenAPICtrl.1", parent)
+
 class KiwoomClient:
     """
     키움 OpenAPI+ 클라이언트
@@ -32,7 +60,12 @@ class KiwoomClient:
     - 자동 재연결/재등록
     """
     
-    def __init__(self):
+    def __init__(self, ocx=None, stock_codes: List[str] = None):
+        """
+        Args:
+            ocx: OCX 대체 객체 (테스트용 mock_ocx.MockKiwoomOCX 등), None이면 KiwoomConfig.TRANSPORT로 생성
+            stock_codes: 모의 전송 방식에서 합성 시세를 만들 종목 (None이면 TARGET_STOCKS)
+        """
         # QApplication 설정
         self.app = QApplication.instance()
         if self.app is None:
@@ -45,7 +78,7 @@ class KiwoomClient:
         self.window.hide()
         
         # OCX 컨트롤 생성 (숨겨진 윈도우를 부모로)
-        self.ocx = QAxWidget("KHOPENAPI.KHOpenAPICtrl.1", self.window)
+        self.ocx = ocx if ocx is not None else create_ocx(self.window, stock_codes)
         
         # 연결 상태
         self.connected = False
@@ -58,21 +91,43 @@ class KiwoomClient:
         
         # 이벤트 루프
         self.login_event_loop = None
-        self.tr_event_loops = {}  # TR별 이벤트 루프
         
         # 계좌 정보
         self.account_list = []
         self.user_info = {}
         
-        # TR 요청 큐 및 제한 관리
-        self.tr_queue = Queue()
-        self.tr_request_times = []  # 요청 시간 추적
-        self.tr_results = {}        # TR 결과 저장
-        self.screen_to_stock = {}   # screen_no -> stock_code 매핑
+        # TR 요청 스케줄러 (토큰 버킷 + 우선순위 큐) 및 결과 관리
+        self.tr_scheduler = TRScheduler()
+        self.tr_request_seq = 0     # TR 작업 키/rq_name 생성용
+
+        # 응답 대기 TR (rq_name -> 요청정보) 및 TR 화면번호 풀
+        self.pending_trs: Dict[str, Dict] = {}
+        self.free_tr_screens = [
+            f"{int(KiwoomConfig.SCREEN_NO_TR) + i:04d}" for i in range(KiwoomConfig.TR_MAX_IN_FLIGHT)
+        ]
+        self.tr_scheduler.dispatch_gate = lambda: bool(self.free_tr_screens)
         
         # 실시간 등록 상태
         self.registered_stocks = set()
-        self.screen_numbers = {}    # 화면번호 관리
+        self.trade_screens = ScreenPool(KiwoomConfig.SCREEN_NO_REAL_TRADE)  # 체결 화면 배정
+        self.hoga_screens = ScreenPool(KiwoomConfig.SCREEN_NO_REAL_HOGA)    # 호가 화면 배정
+        self.realreg_stocks: List[str] = []          # 마지막 등록 요청 종목 (재연결시 재등록 대상)
+        self.realreg_queue = deque()                 # 등록 대기 화면
+        self.realreg_done_fids = defaultdict(int)    # 종목별 등록 성공 화면 수 (체결/호가)
+        self.realreg_timer = QTimer()
+        self.realreg_timer.setSingleShot(True)
+        self.realreg_timer.timeout.connect(self._register_next_screen)
+        self.realreg_started_ns = 0
+        self.realreg_verified = False
+        self.reregister_on_connect = False           # 재연결(OnEventConnect) 후 자동 재등록
+
+        # (재)연결 → 첫 틱 지표
+        self.connected_ns = 0
+        self.first_tick_ns: Dict[str, int] = {}
+        self.realreg_metrics: Dict[str, Optional[float]] = {
+            'last_registration_ms': None, 'connect_to_first_tick_ms': None,
+            'connect_to_all_ticks_ms': None, 'silent_stocks': None
+        }
         
         # 전일고가 데이터 저장
         self.prev_day_high = {}
@@ -83,6 +138,9 @@ class KiwoomClient:
         # 실시간 호가 데이터
         self.ask1 = {}
         self.bid1 = {}
+
+        # 이벤트 타임스탬프 시계 (단조 나노초)
+        self.clock = TickClock()
         
         # 콜백 함수들
         self.realdata_callback: Optional[Callable] = None
@@ -98,10 +156,10 @@ class KiwoomClient:
         # 이벤트 연결
         self.setup_events()
         
-        # TR 요청 관리 타이머
+        # TR 요청 관리 타이머 (스케줄러 poll)
         self.tr_timer = QTimer()
         self.tr_timer.timeout.connect(self.process_tr_queue)
-        self.tr_timer.start(1000)  # 1초마다 큐 처리
+        self.tr_timer.start(KiwoomConfig.TR_POLL_INTERVAL_MS)
         
     def setup_logging(self):
         """로깅 설정"""
@@ -224,7 +282,15 @@ class KiwoomClient:
             self.logger.info("키움 서버 연결 성공")
             self.connected = True
             self.reconnect_count = 0  # 재연결 카운트 리셋
+            self.connected_ns = self.clock.now_ns()
+            self.realreg_metrics['connect_to_first_tick_ms'] = None
+            self.realreg_metrics['connect_to_all_ticks_ms'] = None
             self.get_account_info()
+
+            if self.reregister_on_connect:
+                self.reregister_on_connect = False
+                self.logger.info("재연결 성공. 실시간 데이터 재등록...")
+                self.register_realdata()
         else:
             error_msgs = {
                 -100: "사용자 정보 교환 실패",
@@ -275,86 +341,209 @@ class KiwoomClient:
     # ========================================================================
     
     def register_realdata(self, stocks: List[str] = None) -> bool:
-        """실시간 데이터 등록"""
+        """
+        실시간 데이터 등록 (비차단)
+        - 화면당 최대 MAX_STOCKS_PER_SCREEN 종목을 ';'로 묶어 체결/호가 화면별 SetRealReg 1회
+        - 호출 간격은 QTimer로 유지 (time.sleep 없음) → 등록 중에도 이벤트 수신 계속
+        - 반환코드 확인 후 실패 화면 재시도, REALREG_VERIFY_SECONDS 후 무수신 종목 1회 재등록
+
+        Returns:
+            bool: 등록 작업 예약 성공 여부 (결과는 로그/get_status의 realreg 항목)
+        """
         if not self.connected:
             self.logger.error("연결되지 않음")
             return False
             
         if stocks is None:
-            stocks = TARGET_STOCKS
+            stocks = self.realreg_stocks or TARGET_STOCKS
             
         try:
-            # 종목을 화면별로 분할 (화면당 최대 100종목)
-            screen_groups = []
-            for i in range(0, len(stocks), KiwoomConfig.MAX_STOCKS_PER_SCREEN):
-                group = stocks[i:i + KiwoomConfig.MAX_STOCKS_PER_SCREEN]
-                screen_groups.append(group)
-            
-            # modify.md 방안 2: 완전 별도 화면번호 체계
-            success_count = 0
-            SCREEN_BASE_TRADE = "5000"  # 체결용
-            SCREEN_BASE_HOGA = "6000"   # 호가용
-            
-            for idx, group in enumerate(screen_groups):
-                stock_codes = ";".join(group)
-                
-                # 종목별 개별 등록 (modify.md 권장)
-                for stock_idx, stock_code in enumerate(group):
-                    # 1. 기존 등록 제거 (중요!)
-                    self.ocx.dynamicCall("SetRealRemove(QString, QString)", "ALL", stock_code)
-                    time.sleep(0.05)
-                    
-                    # 첫 번째 종목인지 확인 (전체 종목 중 첫 번째)
-                    is_first = (idx == 0 and stock_idx == 0)
-                    reg_type = "0" if is_first else "1"
-                    
-                    # 2. 체결 데이터 등록 (완전 별도 화면)
-                    screen_trade = f"{SCREEN_BASE_TRADE}{idx:02d}{stock_idx:01d}"
-                    basic_fid = OptimizedFID.BASIC_FID
-                    self.logger.info(f"📊 [체결등록] 화면={screen_trade}, 종목={stock_code}, FID={basic_fid}, 타입={reg_type}")
-                    ret1 = self.ocx.dynamicCall(
-                        "SetRealReg(QString, QString, QString, QString)",
-                        screen_trade, stock_code, basic_fid, reg_type
-                    )
-                    
-                    time.sleep(0.1)  # API 제한 방지
-                    
-                    # 3. 호가 데이터 별도 화면 등록 (중요!)
-                    screen_hoga = f"{SCREEN_BASE_HOGA}{idx:02d}{stock_idx:01d}"
-                    hoga_fid = OptimizedFID.USE_ORDER_BOOK_FID
-                    self.logger.info(f"📈 [호가등록] 화면={screen_hoga}, 종목={stock_code}, FID={hoga_fid}, 타입={reg_type}")
-                    ret2 = self.ocx.dynamicCall(
-                        "SetRealReg(QString, QString, QString, QString)",
-                        screen_hoga, stock_code, hoga_fid, reg_type
-                    )
-                    
-                    time.sleep(0.1)  # 안정성 대기
-                    
-                    # 등록 결과 확인
-                    if ret1 == 0 and ret2 == 0:
-                        self.screen_numbers[screen_trade] = [stock_code]  # 체결 화면
-                        self.screen_numbers[screen_hoga] = [stock_code]   # 호가 화면
-                        self.registered_stocks.add(stock_code)
-                        success_count += 1
-                        self.logger.info(f"✅ [등록성공] {stock_code}: 체결({screen_trade}) + 호가({screen_hoga})")
-                    else:
-                        self.logger.error(f"❌ [등록실패] {stock_code}: 체결={ret1}, 호가={ret2}")
-                        
-                    # 과도한 요청 방지
-                    time.sleep(0.2)
-            
-            self.logger.info(f"전체 실시간 등록: {success_count}/{len(stocks)} 성공")
-            return success_count == len(stocks)
+            self.realreg_stocks = list(dict.fromkeys(stocks))
+            self.realreg_queue.clear()
+            self.realreg_timer.stop()
+
+            # 기존 화면 등록 해제 (해제는 제한 대상 아님 - 즉시 호출)
+            for screen_no in self.trade_screens.clear() + self.hoga_screens.clear():
+                self.ocx.dynamicCall("SetRealRemove(QString, QString)", screen_no, "ALL")
+            self.registered_stocks.clear()
+            self.realreg_done_fids.clear()
+
+            # 화면당 최대 100종목으로 배정 - 체결/호가 별도 화면
+            self.trade_screens.assign(self.realreg_stocks)
+            self.hoga_screens.assign(self.realreg_stocks)
+            self._queue_registration(self.realreg_stocks)
+
+            self.realreg_started_ns = self.clock.now_ns()
+            self.realreg_verified = False
+            self.logger.info(f"실시간 등록 시작: {len(self.realreg_stocks)}종목, 화면 {len(self.realreg_queue)}개")
+            self.realreg_timer.start(0)
+            return True
             
         except Exception as e:
             self.logger.error(f"실시간 등록 중 예외: {e}")
             return False
+
+    def add_realdata(self, stocks: List[str]) -> bool:
+        """
+        실시간 종목 추가 (기존 등록 유지) - 여유 있는 화면에 배정 후 해당 화면에 추가 등록
+
+        Returns:
+            bool: 등록 작업 예약 성공 여부
+        """
+        if not self.connected:
+            self.logger.error("연결되지 않음")
+            return False
+
+        new_stocks = [code for code in dict.fromkeys(stocks) if code not in self.trade_screens]
+        if not new_stocks:
+            return True
+
+        try:
+            self.trade_screens.assign(new_stocks)
+            self.hoga_screens.assign(new_stocks)
+        except ValueError as e:
+            self.logger.error(f"실시간 종목 추가 실패: {e}")
+            for stock_code in new_stocks:
+                self.trade_screens.remove(stock_code)
+                self.hoga_screens.remove(stock_code)
+            return False
+
+        self.realreg_stocks.extend(new_stocks)
+        self._queue_registration(new_stocks)
+        self.logger.info(f"실시간 종목 추가: {len(new_stocks)}종목 {new_stocks[:10]}")
+        if not self.realreg_timer.isActive():
+            self.realreg_timer.start(0)
+        return True
+
+    def remove_realdata(self, stocks: List[str]) -> int:
+        """
+        실시간 종목 해제 (다른 종목 등록 유지) - 빈 자리는 이후 추가 종목에 재사용
+
+        Returns:
+            int: 해제한 종목 수
+        """
+        removed = 0
+        for stock_code in dict.fromkeys(stocks):
+            for pool in (self.trade_screens, self.hoga_screens):
+                screen_no = pool.remove(stock_code)
+                if screen_no:
+                    try:
+                        self.ocx.dynamicCall("SetRealRemove(QString, QString)", screen_no, stock_code)
+                    except Exception as e:
+                        self.logger.error(f"SetRealRemove 예외 ({screen_no}, {stock_code}): {e}")
+
+            if stock_code in self.realreg_stocks:
+                self.realreg_stocks.remove(stock_code)
+                removed += 1
+            self.registered_stocks.discard(stock_code)
+            self.realreg_done_fids.pop(stock_code, None)
+            self.first_tick_ns.pop(stock_code, None)
+
+        # 대기 중인 등록 작업에서도 제외
+        removed_set = set(stocks)
+        for step in self.realreg_queue:
+            step['stocks'] = [code for code in step['stocks'] if code not in removed_set]
+
+        if removed:
+            self.logger.info(f"실시간 종목 해제: {removed}종목")
+        return removed
+
+    def _queue_registration(self, stocks: List[str]):
+        """배정된 화면별로 SetRealReg 작업 추가 (체결 화면 → 호가 화면 순)"""
+        for screen_no, group in self.trade_screens.group_by_screen(stocks).items():
+            self.realreg_queue.append({'screen_no': screen_no, 'stocks': group,
+                                       'fid_list': OptimizedFID.BASIC_FID, 'attempts': 0})
+        for screen_no, group in self.hoga_screens.group_by_screen(stocks).items():
+            self.realreg_queue.append({'screen_no': screen_no, 'stocks': group,
+                                       'fid_list': OptimizedFID.USE_ORDER_BOOK_FID, 'attempts': 0})
+
+    def _register_next_screen(self):
+        """등록 대기 화면 1개 SetRealReg (realreg_timer 콜백)"""
+        if not self.realreg_queue:
+            return
+
+        step = self.realreg_queue.popleft()
+        step['attempts'] += 1
+        screen_no, group = step['screen_no'], step['stocks']
+        if not group:  # 대기 중 전 종목 해제됨
+            self.realreg_timer.start(0)
+            return
+
+        try:
+            # 기존 화면은 해제했으므로 항상 "1"(추가) - "0"은 같은 종목의 다른 화면 FID까지 해제될 수 있음
+            ret = self.ocx.dynamicCall(
+                "SetRealReg(QString, QString, QString, QString)",
+                screen_no, ";".join(group), step['fid_list'], "1"
+            )
+        except Exception as e:
+            self.logger.error(f"SetRealReg 예외 (화면={screen_no}): {e}")
+            ret = -1
+
+        if ret == 0:
+            for stock_code in group:
+                self.realreg_done_fids[stock_code] += 1
+                if self.realreg_done_fids[stock_code] == 2:  # 체결 + 호가
+                    self.registered_stocks.add(stock_code)
+            self.logger.info(f"📊 [실시간등록] 화면={screen_no}, {len(group)}종목, FID={step['fid_list']}")
+        elif step['attempts'] < KiwoomConfig.REALREG_MAX_RETRIES:
+            self.logger.warning(f"⚠️ [등록재시도] 화면={screen_no}: 반환코드 {ret} ({step['attempts']}회)")
+            self.realreg_queue.append(step)
+        else:
+            self.logger.error(f"❌ [등록실패] 화면={screen_no}, {len(group)}종목: 반환코드 {ret}")
+
+        if self.realreg_queue:
+            self.realreg_timer.start(KiwoomConfig.REALREG_INTERVAL_MS)
+            return
+
+        elapsed_ms = (self.clock.now_ns() - self.realreg_started_ns) / 1_000_000
+        self.realreg_metrics['last_registration_ms'] = elapsed_ms
+        self.logger.info(f"전체 실시간 등록: {len(self.registered_stocks)}/{len(self.realreg_stocks)} 성공 "
+                         f"({elapsed_ms:.0f}ms)")
+        if not self.realreg_verified:
+            QTimer.singleShot(KiwoomConfig.REALREG_VERIFY_SECONDS * 1000, self._verify_realdata)
+
+    def _verify_realdata(self):
+        """등록 후 틱 미수신 종목 확인 → 1회 재등록 (추가 등록, 기존 화면 유지)"""
+        elapsed = (self.clock.now_ns() - self.realreg_started_ns) / 1e9
+        if self.realreg_verified or self.realreg_queue or elapsed < KiwoomConfig.REALREG_VERIFY_SECONDS:
+            return  # 이미 확인했거나, 그 사이 새 등록이 시작됨 (새 등록의 타이머가 확인)
+        self.realreg_verified = True
+
+        silent = [code for code in self.realreg_stocks
+                  if self.first_tick_ns.get(code, 0) < self.realreg_started_ns]
+        self.realreg_metrics['silent_stocks'] = len(silent)
+        if not silent:
+            self.logger.info(f"✅ 실시간 수신 확인: 전 종목 ({len(self.realreg_stocks)}개)")
+            return
+
+        self.logger.warning(f"⚠️ 실시간 미수신 {len(silent)}종목, 재등록: {silent[:10]}")
+        for stock_code in silent:
+            self.ocx.dynamicCall("SetRealRemove(QString, QString)", "ALL", stock_code)
+            self.registered_stocks.discard(stock_code)
+            self.realreg_done_fids[stock_code] = 0
+        self._queue_registration(silent)
+        self.realreg_timer.start(0)
+
+    def _record_first_tick(self, stock_code: str, recv_ns: int):
+        """종목별 (재)연결 후 첫 틱 시각 및 연결→첫 틱 지연 기록"""
+        self.first_tick_ns[stock_code] = recv_ns
+        if self.connected_ns and self.realreg_metrics.get('connect_to_first_tick_ms') is None:
+            latency_ms = (recv_ns - self.connected_ns) / 1_000_000
+            self.realreg_metrics['connect_to_first_tick_ms'] = latency_ms
+            self.logger.info(f"⏱️ 연결→첫 틱: {latency_ms:.0f}ms ({stock_code})")
+
+        if (self.realreg_metrics.get('connect_to_all_ticks_ms') is None and self.connected_ns
+                and all(self.first_tick_ns.get(code, 0) >= self.connected_ns for code in self.realreg_stocks)):
+            latency_ms = (recv_ns - self.connected_ns) / 1_000_000
+            self.realreg_metrics['connect_to_all_ticks_ms'] = latency_ms
+            self.logger.info(f"⏱️ 연결→전 종목 첫 틱: {latency_ms:.0f}ms ({len(self.registered_stocks)}종목)")
     
     def on_receive_real_data(self, stock_code: str, real_type: str, real_data: str):
         """실시간 데이터 수신 처리"""
         try:
-            # 전문가 진단: 모든 real_type 상세 로깅
-            self.logger.info(f"📡 [실시간수신] {stock_code}: real_type='{real_type}' (raw_data_len={len(real_data)})")
+            # 전문가 진단: 모든 real_type 상세 로깅 (이벤트마다 발생하므로 DEBUG)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"📡 [실시간수신] {stock_code}: real_type='{real_type}' (raw_data_len={len(real_data)})")
             
             # 실시간 데이터 수신 카운터 추가
             if not hasattr(self, 'realdata_count'):
@@ -370,13 +559,14 @@ class KiwoomClient:
             if real_type not in known_types:
                 self.logger.warning(f"⚠️  [미지타입] {stock_code}: '{real_type}' - 새로운 이벤트 타입!")
             
-            # 현재 시간을 Unix timestamp (밀리초 단위)로 생성
-            from datetime import datetime
-            now = datetime.now()
-            current_time = int(now.timestamp() * 1000)  # Unix timestamp in milliseconds
-            
+            # 수신 시각: 벽시계에 고정된 단조 나노초 (time 컬럼은 기존과 같은 ms 단위)
+            recv_ns = self.clock.now_ns()
+
+            if self.first_tick_ns.get(stock_code, 0) < self.connected_ns:
+                self._record_first_tick(stock_code, recv_ns)
+
             # 데이터 추출
-            data = {'time': current_time, 'stock_code': stock_code}
+            data = {'time': recv_ns // 1_000_000, 'recv_time_ns': recv_ns, 'stock_code': stock_code}
             
             if real_type == "주식체결":
                 # 주가 데이터 추출
@@ -388,28 +578,33 @@ class KiwoomClient:
                         self.logger.debug(f"FID {fid} 추출 오류: {ex}")
                         data[field] = 0
                 
+                # 거래소 체결시간 (FID 20 HHMMSS) → epoch ms
+                data['exchange_time_ms'] = self.clock.exchange_time_ms(data.get('trade_time'), recv_ns)
+
                 # 현재가 로그
                 current_price = data.get('current_price', 0)
                 if current_price > 0:
                     self.logger.info(f"[체결] {stock_code}: {current_price:,}원")
                         
             elif real_type in ["주식호가", "주식호가잔량"]:
-                # modify.md 방안 3: 디버깅 강화 - raw 데이터 전체 덤프
-                self.logger.info(f"🎯 [호가이벤트수신] {stock_code}: real_type='{real_type}'")
-                self.logger.debug(f"📊 RAW 호가 데이터 전체: {str(real_data)[:200]}...")
-                
+                # 호가 이벤트는 체결보다 훨씬 잦으므로 상세 로그는 DEBUG 레벨에서만 생성
+                debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+                if debug_enabled:
+                    self.logger.debug(f"🎯 [호가이벤트수신] {stock_code}: real_type='{real_type}'")
+                    self.logger.debug(f"📊 RAW 호가 데이터 전체: {str(real_data)[:200]}...")
+
                 for field, fid in RealDataFID.STOCK_HOGA.items():
                     try:
-                        raw_value = self.ocx.dynamicCall("GetCommRealData(QString, int)", stock_code, fid)
-                        
-                        # modify.md 방안 3: 다양한 방식으로 FID 테스트
                         raw_value_int = self.ocx.dynamicCall("GetCommRealData(QString, int)", stock_code, fid)
-                        raw_value_str = self.ocx.dynamicCall("GetCommRealData(QString, QString)", stock_code, str(fid))
-                        
-                        self.logger.info(f"🔍 [FID검증] FID {fid} ({field}): int='{raw_value_int}', str='{raw_value_str}'")
-                        
-                        # 더 안전한 값 선택 (비어있지 않은 값 우선)
-                        raw_value = raw_value_int if raw_value_int.strip() else raw_value_str
+
+                        # 더 안전한 값 선택 (비어있지 않은 값 우선, 비어있을 때만 QString FID 재조회)
+                        if raw_value_int.strip():
+                            raw_value = raw_value_int
+                        else:
+                            raw_value = self.ocx.dynamicCall("GetCommRealData(QString, QString)", stock_code, str(fid))
+
+                        if debug_enabled:
+                            self.logger.debug(f"🔍 [FID검증] FID {fid} ({field}): raw='{raw_value}'")
                         
                         # 호가 데이터 파싱 개선: 0 fallback 방지
                         cleaned_value = raw_value.strip().replace('+', '').replace('-', '') if raw_value else ''
@@ -425,14 +620,11 @@ class KiwoomClient:
                             self.prev_hoga[stock_code][field] = parsed_value
                         
                         data[field] = parsed_value
-                        
+
                         # 파싱 결과 로깅
-                        self.logger.info(f"    → cleaned='{cleaned_value}' → parsed={parsed_value}")
-                        
-                        # 실제 데이터 발견시 강조
-                        if parsed_value != 0:
-                            self.logger.info(f"💡 [데이터발견] FID {fid} ({field}): {parsed_value}")
-                            
+                        if debug_enabled:
+                            self.logger.debug(f"    → cleaned='{cleaned_value}' → parsed={parsed_value}")
+
                     except Exception as ex:
                         self.logger.error(f"호가 FID {fid}({field}) 추출/파싱 오류: {ex}")
                         data[field] = 0
@@ -446,9 +638,10 @@ class KiwoomClient:
                 if bid1_price > 0:
                     self.bid1[stock_code] = bid1_price
                 
-                # 호가 데이터 수신 로그 (항상 출력)
-                self.logger.info(f"[호가결과] {stock_code}: 매도1호가 {ask1_price:,}원, 매수1호가 {bid1_price:,}원")
-                
+                # 호가 데이터 수신 로그
+                if debug_enabled:
+                    self.logger.debug(f"[호가결과] {stock_code}: 매도1호가 {ask1_price:,}원, 매수1호가 {bid1_price:,}원")
+
                 # 호가 데이터가 모두 0인 경우 경고
                 if ask1_price == 0 and bid1_price == 0:
                     self.logger.warning(f"[호가경고] {stock_code}: 호가 데이터가 모두 0입니다.")
@@ -477,9 +670,9 @@ class KiwoomClient:
                 
             # 숫자 변환
             if 'price' in field or field in ['current_price', 'open_price', 'high_price', 'low_price']:
-                return abs(float(clean_value))  # 가격은 절댓값
+                return abs(int(clean_value))  # 가격은 원 단위 정수 절댓값 (부호 = 등락)
             elif 'qty' in field or field in ['volume', 'trade_volume']:
-                return int(clean_value)
+                return abs(int(clean_value))  # 체결량(FID 15)은 부호 = 매수/매도 체결
             elif 'time' in field:
                 return clean_value
             else:
@@ -492,122 +685,159 @@ class KiwoomClient:
     # TR 요청 관리 (큐잉 및 제한)
     # ========================================================================
     
-    def request_tr(self, tr_code: str, inputs: Dict[str, str], screen_no: str = None) -> bool:
-        """TR 요청 (큐에 추가)"""
-        if screen_no is None:
-            screen_no = f"{KiwoomConfig.SCREEN_NO_TR}{self.tr_queue.qsize():03d}"
-            
+    def request_tr(self, tr_code: str, inputs: Dict[str, str], screen_no: str = None,
+                   priority: int = PRIORITY_DEFAULT) -> bool:
+        """TR 요청 (스케줄러에 1회성 작업으로 등록, 결과는 tr_callback으로 전달)"""
+        self.request_tr_async(tr_code, inputs, priority=priority)
+        return True
+
+    def request_tr_async(self, tr_code: str, inputs: Dict[str, str],
+                         priority: int = PRIORITY_DEFAULT) -> Future:
+        """
+        비동기 TR 요청 - 응답을 기다리지 않고 Future 반환
+
+        Returns:
+            Future: 응답 수신시 파싱 결과(dict), 타임아웃/재시도 초과시 예외로 완료
+        """
+        self.tr_request_seq += 1
+        stock_code = inputs.get('종목코드', '')  # 종목코드 추가로 TR 결과 연결
+
+        future = Future()
         request = {
             'tr_code': tr_code,
             'inputs': inputs,
-            'screen_no': screen_no,
             'timestamp': time.time(),
-            'stock_code': inputs.get('종목코드', '')  # 종목코드 추가로 TR 결과 연결
+            'stock_code': stock_code,
+            'future': future
         }
-        
-        self.tr_queue.put(request)
-        self.logger.debug(f"TR 요청 큐 추가: {tr_code} (큐 크기: {self.tr_queue.qsize()})")
-        return True
-    
+
+        def send():
+            if future.cancelled():
+                return 0  # 발송 전 취소 - 요청 없이 완료 처리
+            return self.send_tr_request(request)
+
+        def drop():
+            if not future.done():
+                future.set_exception(RuntimeError(f"TR 요청 실패 (재시도 한도 초과): {tr_code} {stock_code}"))
+
+        key = f"{tr_code}:{stock_code}:{self.tr_request_seq}"
+        self.tr_scheduler.submit(key, send, priority=priority, stock_code=stock_code, on_drop=drop)
+        self.logger.debug(f"TR 요청 등록: {tr_code} (대기 작업: {self.tr_scheduler.pending_count()})")
+        return future
+
     def process_tr_queue(self):
-        """TR 큐 처리 (초당 1회 제한)"""
-        if not self.connected or self.tr_queue.empty():
-            return
-            
-        # 요청 제한 체크
-        current_time = time.time()
-        
-        # 1분 이내 요청 수 체크
-        self.tr_request_times = [t for t in self.tr_request_times if current_time - t < 60]
-        if len(self.tr_request_times) >= KiwoomConfig.TR_PER_MINUTE:
-            self.logger.warning("분당 TR 요청 제한 도달")
-            return
-            
-        # 1초 이내 요청 체크
-        recent_requests = [t for t in self.tr_request_times if current_time - t < 1]
-        if len(recent_requests) >= KiwoomConfig.TR_PER_SECOND:
-            return  # 1초 대기
-            
+        """TR 스케줄러 처리 (타임아웃 정리 후 토큰 버킷이 허용하는 만큼 우선순위 순 발송)"""
         try:
-            request = self.tr_queue.get_nowait()
-            self.send_tr_request(request)
-            self.tr_request_times.append(current_time)
-            
-        except Empty:
-            pass
+            self.expire_pending_trs()
+
+            if not self.connected:
+                return
+
+            self.tr_scheduler.poll()
         except Exception as e:
             self.logger.error(f"TR 큐 처리 오류: {e}")
-    
-    def send_tr_request(self, request: Dict):
-        """실제 TR 요청 전송"""
+
+    def send_tr_request(self, request: Dict) -> int:
+        """
+        실제 TR 요청 전송 (응답을 기다리지 않음)
+        응답은 on_receive_tr_data에서 rq_name으로 찾아 처리
+
+        Returns:
+            int: CommRqData 반환코드 (0=성공)
+        """
         tr_code = request['tr_code']
         inputs = request['inputs']
-        screen_no = request['screen_no']
-        
+        stock_code = request.get('stock_code', '')
+
+        if not self.free_tr_screens:
+            self.logger.warning(f"TR 화면번호 부족 - 요청 보류: {tr_code} {stock_code}")
+            return -1
+
+        self.tr_request_seq += 1
+        rq_name = f"{tr_code}_{stock_code}_{self.tr_request_seq}"
+        screen_no = self.free_tr_screens.pop()
+
         try:
             # 입력값 설정
             for key, value in inputs.items():
                 self.ocx.dynamicCall("SetInputValue(QString, QString)", key, str(value))
-            
-            # screen_no -> stock_code 매핑 저장
-            stock_code = request.get('stock_code', '')
-            if stock_code:
-                self.screen_to_stock[screen_no] = stock_code
-            
-            # 이벤트 루프 생성
-            self.tr_event_loops[screen_no] = QEventLoop()
-            
+
             # TR 요청
             ret = self.ocx.dynamicCall(
                 "CommRqData(QString, QString, int, QString)",
-                f"{tr_code}_REQ", tr_code, 0, screen_no
+                rq_name, tr_code, 0, screen_no
             )
-            
+
             if ret == 0:
-                self.logger.debug(f"TR 요청 성공: {tr_code}")
-                # 타임아웃 설정 (10초)
-                QTimer.singleShot(10000, lambda: self.tr_timeout(screen_no))
-                self.tr_event_loops[screen_no].exec_()
+                self.logger.debug(f"TR 요청 성공: {tr_code} ({rq_name}, 화면 {screen_no})")
+                self.pending_trs[rq_name] = {
+                    'tr_code': tr_code,
+                    'stock_code': stock_code,
+                    'screen_no': screen_no,
+                    'future': request.get('future'),
+                    'deadline': time.monotonic() + KiwoomConfig.TR_TIMEOUT_SECONDS
+                }
             else:
+                self.free_tr_screens.append(screen_no)
                 self.logger.error(f"TR 요청 실패: {tr_code} (코드: {ret})")
-                
+
+            return ret
+
         except Exception as e:
+            self.free_tr_screens.append(screen_no)
             self.logger.error(f"TR 요청 전송 오류: {e}")
-    
-    def tr_timeout(self, screen_no: str):
-        """TR 타임아웃 처리"""
-        if screen_no in self.tr_event_loops and self.tr_event_loops[screen_no].isRunning():
-            self.logger.warning(f"TR 타임아웃: {screen_no}")
-            self.tr_event_loops[screen_no].exit()
-    
+            return -1
+
+    def expire_pending_trs(self):
+        """응답 타임아웃 TR 정리 (화면번호 반환, Future 예외 완료)"""
+        if not self.pending_trs:
+            return
+
+        now = time.monotonic()
+        expired = [rq_name for rq_name, pending in self.pending_trs.items() if pending['deadline'] <= now]
+        for rq_name in expired:
+            pending = self.pending_trs.pop(rq_name)
+            self.free_tr_screens.append(pending['screen_no'])
+            self.logger.warning(f"TR 타임아웃: {rq_name} (화면 {pending['screen_no']})")
+
+            future = pending['future']
+            if future is not None and not future.done():
+                future.set_exception(TimeoutError(f"TR 응답 타임아웃: {rq_name}"))
+
     def on_receive_tr_data(self, screen_no: str, rq_name: str, tr_code: str, record_name: str, inquiry: str):
-        """TR 데이터 수신 처리"""
+        """TR 데이터 수신 처리 (rq_name으로 요청 매칭)"""
         try:
-            self.logger.debug(f"TR 데이터 수신: {tr_code}")
-            
-            # 종목코드 추출
-            stock_code = self.screen_to_stock.get(screen_no, "")
-            
+            self.logger.debug(f"TR 데이터 수신: {tr_code} ({rq_name})")
+
+            pending = self.pending_trs.pop(rq_name, None)
+            if pending:
+                self.free_tr_screens.append(pending['screen_no'])
+                stock_code = pending['stock_code']
+            else:
+                # 타임아웃 이후 도착한 응답 - rq_name 형식({tr_code}_{stock_code}_{seq})에서 종목코드 추출
+                parts = rq_name.split('_')
+                stock_code = parts[1] if len(parts) >= 3 else ""
+
+            data = {}
+
             # 수급 데이터 처리
             if tr_code == TRCode.INVESTOR_NET_VOL:
                 data = self.parse_investor_data(tr_code, rq_name)
                 data['stock_code'] = stock_code
-                self.tr_results[screen_no] = data
-                
+
             # 전일고가 데이터 처리
             elif tr_code == TRCode.DAILY_STOCK:
                 data = self.parse_prev_day_high_data(tr_code, rq_name, stock_code)
                 data['stock_code'] = stock_code
-                self.tr_results[screen_no] = data
-                
+
+            # 요청자 Future 완료
+            if pending and pending['future'] is not None and not pending['future'].done():
+                pending['future'].set_result(data)
+
             # 콜백 함수 호출
             if self.tr_callback:
-                self.tr_callback(tr_code, self.tr_results.get(screen_no, {}))
-            
-            # 이벤트 루프 종료
-            if screen_no in self.tr_event_loops and self.tr_event_loops[screen_no].isRunning():
-                self.tr_event_loops[screen_no].exit()
-                
+                self.tr_callback(tr_code, data)
+
         except Exception as e:
             self.logger.error(f"TR 데이터 처리 오류: {e}")
     
@@ -703,7 +933,7 @@ class KiwoomClient:
             }
             
             self.logger.info(f"전일고가 요청: {stock_code}")
-            return self.request_tr(TRCode.DAILY_STOCK, inputs)
+            return self.request_tr(TRCode.DAILY_STOCK, inputs, priority=PRIORITY_PREV_HIGH)
             
         except Exception as e:
             self.logger.error(f"전일고가 요청 실패 ({stock_code}): {e}")
@@ -795,8 +1025,13 @@ class KiwoomClient:
         return {
             'connected': self.connected,
             'registered_stocks_count': len(self.registered_stocks),
-            'tr_queue_size': self.tr_queue.qsize(),
+            'tr_queue_size': self.tr_scheduler.pending_count(),
+            'tr_in_flight': len(self.pending_trs),
+            'tr_scheduler': self.tr_scheduler.get_status(),
             'reconnect_count': self.reconnect_count,
+            'realreg_pending_screens': len(self.realreg_queue),
+            'realtime_screens': len(self.trade_screens.screens) + len(self.hoga_screens.screens),
+            'realreg': dict(self.realreg_metrics),
             'user_info': self.user_info,
             'account_list': self.account_list
         }
@@ -834,102 +1069,124 @@ if __name__ == "__main__":
 # ============================================================================
 
 class SimpleTRManager:
-    """단순화된 TR 요청 관리 (QTimer 방식)"""
+    """수급 TR(OPT10059) 주기 요청 관리 - KiwoomClient.tr_scheduler 주기 작업으로 등록"""
     
     def __init__(self, kiwoom_client):
         self.kiwoom = kiwoom_client
+        self.scheduler = kiwoom_client.tr_scheduler
         self.last_opt10059 = {}  # 종목별 마지막 요청 시간만
-        self.timers = {}  # 종목별 QTimer 관리
+        self.flow_cache = InvestorFlowCache()  # 값 변화 감지 + 종목별 적응형 주기
         self.logger = logging.getLogger(__name__)
         
     def can_request(self, stock_code):
         """60초 제한 체크"""
         if stock_code in self.last_opt10059:
-            if time.time() - self.last_opt10059[stock_code] < 60:
+            if time.time() - self.last_opt10059[stock_code] < KiwoomConfig.TR_INTERVAL_SECONDS:
                 return False
         return True
     
+    @staticmethod
+    def job_key(stock_code):
+        """종목별 OPT10059 스케줄러 작업 키"""
+        return f"OPT10059:{stock_code}"
+    
     def request_opt10059(self, stock_code):
-        """OPT10059 요청 (투자자별 일별 매매동향)"""
+        """OPT10059 즉시 요청 예약 (스케줄러 경유, 주기 작업이면 다음 due를 앞당김)"""
         if not self.can_request(stock_code):
             return False
-            
-        try:
-            # OPT10059 입력값 설정 (키움 공식 문서 기준)
-            self.kiwoom.ocx.dynamicCall("SetInputValue(QString, QString)", "일자", "")  # 빈값=최근일자
-            self.kiwoom.ocx.dynamicCall("SetInputValue(QString, QString)", "종목코드", stock_code)
-            self.kiwoom.ocx.dynamicCall("SetInputValue(QString, QString)", "금액수량구분", "2")  # 1=금액, 2=수량
-            self.kiwoom.ocx.dynamicCall("SetInputValue(QString, QString)", "매매구분", "0")  # 0=순매수
-            self.kiwoom.ocx.dynamicCall("SetInputValue(QString, QString)", "단위구분", "1")  # 1=단위(천주)
-            
-            self.logger.info(f"📊 [OPT10059 요청] 종목={stock_code}, 수량/순매수/천주단위")
-            
-            # 요청 실행
-            screen_no = f"5959"  # 고정 화면번호 사용
-            req_name = f"OPT10059_{stock_code}_{int(time.time())}"
-            
-            result = self.kiwoom.ocx.dynamicCall(
-                "CommRqData(QString, QString, int, QString)",
-                req_name, "OPT10059", 0, screen_no
-            )
-            
-            if result == 0:
-                self.last_opt10059[stock_code] = time.time()
-                self.logger.info(f"✅ OPT10059 요청 성공: {stock_code}")
-                return True
-            else:
-                error_msg = {
-                    -200: "시세과부하",
-                    -201: "조회전문작성실패",
-                    -202: "전문작성초기화실패"
-                }.get(result, f"알수없는오류({result})")
-                self.logger.error(f"❌ OPT10059 요청 실패: {stock_code} - {error_msg}")
-                return False
-                
-        except Exception as e:
-            self.logger.error(f"❌ [OPT10059 요청오류] {stock_code}: {e}", exc_info=True)
-            return False
+        
+        if self.scheduler.reschedule(self.job_key(stock_code), 0):
+            return True
+        
+        self.scheduler.submit(self.job_key(stock_code),
+                              lambda sc=stock_code: self._send_opt10059(sc),
+                              priority=PRIORITY_INVESTOR, stock_code=stock_code)
+        return True
     
-    def request_with_retry(self, stock_code):
-        """에러 시에도 Timer 체인 유지"""
-        try:
-            if self.can_request(stock_code):
-                self.request_opt10059(stock_code)
-        except Exception as e:
-            self.logger.error(f"TR 실패 {stock_code}: {e}")
-        finally:
-            # 에러 여부 관계없이 다음 타이머 예약
-            from PyQt5.QtCore import QTimer
-            QTimer.singleShot(60000, 
-                lambda sc=stock_code: self.request_with_retry(sc))
-    
-    def schedule_next_request(self, stock_code):
-        """종목별 60초 타이머 시작"""
-        from PyQt5.QtCore import QTimer
-        
-        if stock_code in self.timers:
-            self.timers[stock_code].stop()
-            
-        timer = QTimer()
-        timer.timeout.connect(
-            lambda sc=stock_code: self.request_with_retry(sc))
-        timer.setSingleShot(True)
-        timer.start(60000)  # 60초
-        self.timers[stock_code] = timer
+    def _send_opt10059(self, stock_code) -> int:
+        """OPT10059 실제 전송 (투자자별 일별 매매동향) - CommRqData 반환코드 반환, 응답은 비동기 수신"""
+        # OPT10059 입력값 (키움 공식 문서 기준)
+        inputs = {
+            "일자": "",              # 빈값=최근일자
+            "종목코드": stock_code,
+            "금액수량구분": "2",      # 1=금액, 2=수량
+            "매매구분": "0",          # 0=순매수
+            "단위구분": "1"           # 1=단위(천주)
+        }
+        
+        self.logger.info(f"📊 [OPT10059 요청] 종목={stock_code}, 수량/순매수/천주단위")
+        
+        result = self.kiwoom.send_tr_request({
+            'tr_code': TRCode.INVESTOR_NET_VOL,
+            'inputs': inputs,
+            'stock_code': stock_code
+        })
+        
+        if result == 0:
+            self.last_opt10059[stock_code] = time.time()
+            self.logger.info(f"✅ OPT10059 요청 성공: {stock_code}")
+        else:
+            error_msg = TR_ERROR_MESSAGES.get(result, f"알수없는오류({result})")
+            self.logger.error(f"❌ OPT10059 요청 실패: {stock_code} - {error_msg}")
+        return result
     
     def initialize_requests(self, stock_codes):
-        """프로그램 시작 시 즉시 TR 요청"""
-        from PyQt5.QtCore import QTimer
+        """종목별 OPT10059 주기 작업 등록 (첫 요청은 종목 순서대로 분산, 이후 지터 주기)"""
+        spacing = 1.0 / KiwoomConfig.TR_PER_SECOND
+        
+        for stock_code in stock_codes:
+            self.flow_cache.register(stock_code)
         
         for i, stock_code in enumerate(stock_codes):
-            # 동시 요청 방지를 위한 지연
-            QTimer.singleShot(i * 200, 
-                lambda sc=stock_code: self.request_opt10059(sc))
+            self.scheduler.submit(self.job_key(stock_code),
+                                  lambda sc=stock_code: self._send_opt10059(sc),
+                                  priority=PRIORITY_INVESTOR,
+                                  delay=i * spacing,
+                                  interval=self.flow_cache.next_interval(stock_code),
+                                  stock_code=stock_code)
+        
+        self.logger.info(f"수급 TR 주기 작업 등록: {len(stock_codes)}종목, "
+                         f"초기 {self.flow_cache.next_interval(stock_codes[0]) if stock_codes else 0:.0f}초 주기 (적응형)")
+    
+    def add_stocks(self, stock_codes):
+        """장중 추가 종목 수급 주기 작업 등록 (기존 종목 작업 유지)"""
+        new_codes = [code for code in stock_codes if self.job_key(code) not in self.scheduler.jobs]
+        if new_codes:
+            self.initialize_requests(new_codes)
+
+    def remove_stocks(self, stock_codes):
+        """제거 종목 수급 주기 작업 취소 및 캐시 정리"""
+        for stock_code in stock_codes:
+            self.scheduler.cancel(self.job_key(stock_code))
+            self.flow_cache.remove(stock_code)
+
+    def on_investor_data(self, stock_code, tr_data) -> bool:
+        """
+        OPT10059 응답 반영 - 캐시 비교 후 종목 갱신 주기 조정
+        
+        Returns:
+            bool: 수급값이 바뀌었으면 True (False면 스냅샷 갱신 불필요)
+        """
+        changed = self.flow_cache.update(stock_code, tr_data)
+        interval = self.flow_cache.next_interval(stock_code)
+        self.scheduler.set_interval(self.job_key(stock_code), interval)
+        
+        if not changed:
+            self.logger.debug(f"수급 변화 없음: {stock_code} - 다음 갱신 {interval:.0f}초 후")
+        return changed
+    
+    def start_scheduler(self):
+        """TR 발송 재개 (장 시작/재연결)"""
+        self.scheduler.resume()
+    
+    def stop_scheduler(self):
+        """TR 발송 중지 (장 마감) - 등록된 주기 작업은 유지"""
+        self.scheduler.pause()
             
     def cleanup(self):
-        """종료 시 타이머 정리"""
-        for timer in self.timers.values():
-            timer.stop()
+        """종료 시 수급 작업 정리"""
+        for key in [k for k in self.scheduler.jobs if k.startswith("OPT10059:")]:
+            self.scheduler.cancel(key)
 
 
 class ConnectionMonitor:
@@ -954,14 +1211,15 @@ class ConnectionMonitor:
             if state == 0:  # 연결 끊김
                 self.logger.warning("연결 끊김 감지! 재연결 시도...")
                 self.kiwoom.ocx.dynamicCall("CommTerminate()")
+                self.kiwoom.connected = False
                 
-                # 재로그인
+                # 재로그인 - 실시간 재등록은 OnEventConnect 수신 후 (on_event_connect)
+                self.kiwoom.reregister_on_connect = True
                 result = self.kiwoom.ocx.dynamicCall("CommConnect()")
                 if result == 0:
-                    self.logger.info("재연결 성공")
-                    # 실시간 재등록
-                    self.re_register_all()
+                    self.logger.info("재연결 요청 완료 (로그인 응답 대기)")
                 else:
+                    self.kiwoom.reregister_on_connect = False
                     self.logger.error(f"재연결 실패: {result}")
                     
         except Exception as e:
@@ -970,9 +1228,11 @@ class ConnectionMonitor:
     def re_register_all(self):
         """실시간 데이터 재등록"""
         try:
-            if hasattr(self.kiwoom, 'register_realdata'):
-                self.kiwoom.register_realdata()
-                self.logger.info("실시간 데이터 재등록 완료")
+            if not self.kiwoom.connected:
+                # 로그인 응답(OnEventConnect) 후 재등록
+                self.kiwoom.reregister_on_connect = True
+            elif self.kiwoom.register_realdata():
+                self.logger.info("실시간 데이터 재등록 요청 완료")
         except Exception as e:
             self.logger.error(f"실시간 데이터 재등록 실패: {e}")
                 
@@ -0,0 +1,183 @@
+"""
+지연(latency) 측정 모듈
+거래소 체결시간 대비 로컬 수신시각 지연 추적 - 종목별 히스토그램, 임계값 경보
+"""
+
+import time
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from config import DataConfig
+
+class LatencyHistogram:
+    """
+    고정 버킷 지연 히스토그램 (ms)
+    - 버킷 경계는 상한값 (value <= bound 인 첫 버킷에 집계)
+    - 마지막 버킷은 최대 경계 초과분 (overflow)
+    - 메모리 고정, 기록 O(log 버킷수)
+    """
+
+    def __init__(self, bounds_ms: List[float] = None):
+        self.bounds_ms = list(bounds_ms or DataConfig.FEED_LAG_BUCKETS_MS)
+        self.reset()
+
+    def reset(self):
+        """통계 초기화"""
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max_value = 0.0
+        self.last_value = 0.0
+
+    def record(self, value_ms: float):
+        """값 기록"""
+        self.counts[bisect_left(self.bounds_ms, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.last_value = value_ms
+        if value_ms > self.max_value:
+            self.max_value = value_ms
+
+    def percentile(self, pct: float) -> float:
+        """백분위 근사값 (해당 버킷의 상한, overflow 버킷은 최대값)"""
+        if self.count == 0:
+            return 0.0
+
+        target = self.count * pct / 100.0
+        cumulative = 0
+        for idx, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target and bucket_count:
+                if idx < len(self.bounds_ms):
+                    return float(min(self.bounds_ms[idx], self.max_value))
+                return float(self.max_value)
+        return float(self.max_value)
+
+    def get_statistics(self) -> Dict:
+        """히스토그램 통계"""
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'max_ms': self.max_value,
+            'last_ms': self.last_value,
+            'buckets': {
+                (f"<={bound}" if idx < len(self.bounds_ms) else f">{self.bounds_ms[-1]}"): self.counts[idx]
+                for idx, bound in enumerate(self.bounds_ms + [None])
+            }
+        }
+
+class FeedLagMonitor:
+    """
+    시세 지연 모니터
+    - 틱마다 거래소 체결시간(FID 20) 대비 로컬 수신시각 지연 기록
+    - 종목별 지연 히스토그램
+    - 임계값 초과시 경보 (종목별 주기 제한)
+
+    참고: FID 20은 초 단위(HHMMSS)이므로 측정 지연은 실제 지연 + 0~999ms 범위이며,
+    로컬 PC 시계와 거래소 시계의 차이도 포함됨
+    """
+
+    def __init__(self, alert_threshold_ms: float = None, alert_interval: float = None):
+        self.logger = logging.getLogger(__name__)
+
+        self.alert_threshold_ms = alert_threshold_ms or DataConfig.FEED_LAG_ALERT_MS
+        self.alert_interval = alert_interval or DataConfig.FEED_LAG_ALERT_INTERVAL
+
+        # 종목별 지연 히스토그램
+        self.histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+
+        # 경보 관리
+        self.alert_counts: Dict[str, int] = defaultdict(int)
+        self.last_alert_time: Dict[str, float] = {}
+        self.alert_callback: Optional[Callable] = None
+
+        # 거래소 시계가 로컬보다 앞선 경우 (음수 지연) 건수
+        self.negative_counts: Dict[str, int] = defaultdict(int)
+
+    def observe(self, stock_code: str, exchange_time_ms: int, recv_time_ms: int) -> Optional[float]:
+        """
+        틱 지연 기록
+
+        Args:
+            stock_code: 종목코드
+            exchange_time_ms: 거래소 체결시간 (epoch ms, 0이면 무시)
+            recv_time_ms: 로컬 수신시각 (epoch ms)
+
+        Returns:
+            float: 지연(ms), 체결시간이 없으면 None
+        """
+        if not exchange_time_ms:
+            return None
+
+        lag_ms = recv_time_ms - exchange_time_ms
+        if lag_ms < 0:
+            self.negative_counts[stock_code] += 1
+            lag_ms = 0
+
+        self.histograms[stock_code].record(lag_ms)
+
+        if lag_ms > self.alert_threshold_ms:
+            self._raise_alert(stock_code, lag_ms)
+
+        return lag_ms
+
+    def _raise_alert(self, stock_code: str, lag_ms: float):
+        """지연 경보 (종목별 alert_interval 초에 1회)"""
+        self.alert_counts[stock_code] += 1
+
+        now = time.time()
+        if now - self.last_alert_time.get(stock_code, 0) < self.alert_interval:
+            return
+        self.last_alert_time[stock_code] = now
+
+        self.logger.warning(
+            f"⚠️ [시세지연] {stock_code}: {lag_ms / 1000:.1f}초 지연 "
+            f"(임계값 {self.alert_threshold_ms / 1000:.1f}초, 누적 {self.alert_counts[stock_code]}회)"
+        )
+
+        if self.alert_callback:
+            try:
+                self.alert_callback(stock_code, lag_ms)
+            except Exception as e:
+                self.logger.error(f"시세지연 경보 콜백 오류: {e}")
+
+    def set_alert_callback(self, callback: Callable):
+        """경보 콜백 함수 설정 - callback(stock_code, lag_ms)"""
+        self.alert_callback = callback
+
+    def get_stock_statistics(self, stock_code: str) -> Optional[Dict]:
+        """종목별 지연 통계 (기록이 없으면 None)"""
+        histogram = self.histograms.get(stock_code)
+        if histogram is None or histogram.count == 0:
+            return None
+
+        stats = histogram.get_statistics()
+        stats['alerts'] = self.alert_counts.get(stock_code, 0)
+        stats['negative'] = self.negative_counts.get(stock_code, 0)
+        return stats
+
+    def get_statistics(self) -> Dict:
+        """전체 지연 통계"""
+        by_stock = {}
+        for stock_code in list(self.histograms.keys()):
+            stats = self.get_stock_statistics(stock_code)
+            if stats:
+                by_stock[stock_code] = stats
+
+        return {
+            'threshold_ms': self.alert_threshold_ms,
+            'total_alerts': sum(self.alert_counts.values()),
+            'worst_p99_ms': max((s['p99_ms'] for s in by_stock.values()), default=0.0),
+            'by_stock': by_stock
+        }
+
+    def reset(self):
+        """통계 초기화 (장 시작 시)"""
+        self.histograms.clear()
+        self.alert_counts.clear()
+        self.last_alert_time.clear()
+        self.negative_counts.clear()
@@ -8,7 +8,7 @@ import time
 import signal
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 from PyQt5.QtCore import QTimer
 
 from config import (
@@ -20,6 +20,11 @@ from data_processor import DataProcessor, InvestorNetManager
 from csv_writer import BatchCSVWriter
 from system_monitor import ComprehensiveMonitor
 from market_scheduler import MarketScheduler
+from latency_monitor import FeedLagMonitor
+from watchlist import Watchlist
+from bar_aggregator import BarCSVSink
+from shm_bus import IndicatorBus, ShmStateTable
+from sampling_profiler import SamplingProfiler, ProfilerControl
 
 class KiwoomDataCollector:
     """
@@ -34,7 +39,7 @@ class KiwoomDataCollector:
     """
     
     def __init__(self, target_stocks: list = None):
-        self.target_stocks = target_stocks or TARGET_STOCKS
+        self.target_stocks = list(target_stocks or TARGET_STOCKS)  # 수집 종목 목록은 수집기 소유 (config 전역 보호)
         self.running = False
         
         # 로깅 설정
@@ -56,10 +61,34 @@ class KiwoomDataCollector:
         
         # 장 시작 스케줄러
         self.market_scheduler: MarketScheduler = None
+
+        # 시세 지연 모니터 (거래소 체결시간 vs 수신시각)
+        self.lag_monitor: FeedLagMonitor = None
+
+        # 런타임 관심종목 (감시 파일/제어 소켓)
+        self.watchlist: Watchlist = None
+        
+        # 지표 상태 스냅샷 주기 저장 타이머
+        self.snapshot_timer: QTimer = None
+        
+        # 다중 시간프레임 봉 저장 + 마감 확인 타이머
+        self.bar_sink: BarCSVSink = None
+        self.bar_timer: QTimer = None
+        
+        # 지표 행 로컬 배포 (공유메모리 링 + TCP 폴백)
+        self.indicator_bus: IndicatorBus = None
+        
+        # 전 종목 최신 상태 공유메모리 테이블 (DataProcessor가 갱신)
+        self.state_table: ShmStateTable = None
+        
+        # 내장 샘플링 프로파일러 (평소 꺼짐) + 로컬 제어 소켓
+        self.profiler: SamplingProfiler = None
+        self.profiler_control: ProfilerControl = None
         
         # 통계
         self.start_time = None
-        self.tick_counts = {}
+        self.tick_counts = {}  # 종목별 실시간 이벤트 수 (체결+호가)
+        self.trade_count = 0   # 체결 이벤트 수
         self.last_stats_time = time.time()
         
         self.logger.info("=" * 60)
@@ -88,7 +117,7 @@ class KiwoomDataCollector:
             
             # 1. 키움 클라이언트 초기화
             self.logger.info("1. 키움 클라이언트 초기화")
-            self.kiwoom_client = KiwoomClient()
+            self.kiwoom_client = KiwoomClient(stock_codes=self.target_stocks)
             
             # 2. QTimer 기반 관리자들 초기화
             self.logger.info("2. TR 관리자 초기화")
@@ -111,6 +140,22 @@ class KiwoomDataCollector:
                 batch_size=DataConfig.CSV_BATCH_SIZE
             )
             
+            # 6.1. 봉 CSV 저장소 연결 (1초/10초/1분 봉)
+            if DataConfig.BAR_TIMEFRAMES:
+                self.bar_sink = BarCSVSink()
+                self.data_processor.bar_aggregator.add_sink(self.bar_sink)
+            
+            # 6.2. 지표 행 로컬 배포 (CSV와 같은 컬럼)
+            self.indicator_bus = IndicatorBus(self.csv_writer.csv_headers, self.csv_writer.integer_headers)
+            
+            # 6.3. 전 종목 최신 상태 테이블 (실패해도 수집은 계속)
+            if DataConfig.STATE_TABLE_ENABLED:
+                try:
+                    self.state_table = ShmStateTable(self.csv_writer.csv_headers, self.csv_writer.integer_headers)
+                    self.data_processor.set_state_table(self.state_table)
+                except Exception as e:
+                    self.logger.error(f"최신 상태 테이블 초기화 실패: {e}")
+            
             # 7. 콜백 함수 연결
             self.logger.info("7. 콜백 함수 연결")
             self.kiwoom_client.set_realdata_callback(self.on_realdata_received)
@@ -124,6 +169,10 @@ class KiwoomDataCollector:
             for stock_code in self.target_stocks:
                 self.data_processor.calculators[stock_code].investor_manager = self.investor_manager
             
+            # 8.2. 당일 CSV 꼬리로 지표 버퍼 워밍업 (스냅샷 복원 종목은 스냅샷 이후 체결만 재생)
+            for stock_code in self.target_stocks:
+                self.backfill_indicators(stock_code)
+            
             # 9. 시스템 모니터링 초기화
             self.logger.info("9. 시스템 모니터링 초기화")
             self.system_monitor = ComprehensiveMonitor(
@@ -138,7 +187,23 @@ class KiwoomDataCollector:
             self.market_scheduler.market_open_signal.connect(self.on_market_open)
             self.market_scheduler.market_close_signal.connect(self.on_market_close)
             
-            # 10. 통계 초기화
+            # 11. 시세 지연 모니터 초기화
+            self.logger.info("11. 시세 지연 모니터 초기화")
+            self.lag_monitor = FeedLagMonitor()
+
+            # 12. 런타임 관심종목 초기화 (연결/등록 후 감시 시작)
+            self.logger.info("12. 관심종목 관리자 초기화")
+            self.watchlist = Watchlist(self.target_stocks)
+            self.watchlist.set_handlers(self.add_stocks, self.remove_stocks)
+
+            # 12.1. 샘플링 프로파일러 (시그널/제어 파일/제어 소켓으로 켜기)
+            self.profiler = SamplingProfiler()
+            self.profiler.start()
+            if DataConfig.PROFILER_PORT:
+                self.profiler_control = ProfilerControl(self.profiler)
+                self.profiler_control.start()
+
+            # 13. 통계 초기화
             for stock_code in self.target_stocks:
                 self.tick_counts[stock_code] = 0
             
@@ -170,10 +235,7 @@ class KiwoomDataCollector:
             
             # 수급 데이터 TR 스케줄링 시작 (즉시 첫 요청)
             self.logger.info("수급 데이터 TR 스케줄링 시작...")
-            for i, stock_code in enumerate(self.target_stocks):
-                # 0.2초씩 지연하여 순차 요청
-                from PyQt5.QtCore import QTimer
-                QTimer.singleShot(i * 200, lambda sc=stock_code: self.tr_manager.request_opt10059(sc))
+            self.tr_manager.initialize_requests(self.target_stocks)
             
             # 연결 모니터링 시작 (자동 재시작 시스템)
             self.logger.info("연결 모니터링 시작...")
@@ -183,6 +245,9 @@ class KiwoomDataCollector:
             self.logger.info("시스템 모니터링 시작...")
             self.system_monitor.start_monitoring()
             
+            # 관심종목 감시 시작 (감시 파일이 있으면 그 목록으로 교체)
+            self.watchlist.start()
+            
             self.logger.info("연결 및 등록 완료")
             return True
             
@@ -192,6 +257,86 @@ class KiwoomDataCollector:
     
     
     
+    # ========================================================================
+    # 런타임 종목 추가/제거 (Watchlist 핸들러)
+    # ========================================================================
+    
+    def add_stocks(self, stock_codes: List[str]) -> List[str]:
+        """
+        종목 추가 - 계산기/수급 상태 생성, 실시간 등록, 수급 TR 주기 작업 등록
+        CSV 파일은 첫 틱 저장 때 생성 (기존 종목 상태는 그대로)
+        
+        Returns:
+            List[str]: 추가된 종목 (실시간 화면 한도 초과시 빈 목록)
+        """
+        new_codes = [code for code in stock_codes if code not in self.data_processor.calculators]
+        if not new_codes:
+            return []
+        
+        if self.kiwoom_client.connected and not self.kiwoom_client.add_realdata(new_codes):
+            self.logger.error(f"종목 추가 실패 (실시간 등록): {new_codes}")
+            return []
+        
+        for stock_code in new_codes:
+            self.investor_manager.add_stock(stock_code)
+            self.data_processor.add_stock(stock_code, self.investor_manager)
+            self.backfill_indicators(stock_code)
+            self.tick_counts.setdefault(stock_code, 0)
+            if stock_code not in self.target_stocks:
+                self.target_stocks.append(stock_code)
+        
+        self.tr_manager.add_stocks(new_codes)
+        self.logger.info(f"종목 추가 완료: {new_codes} (총 {len(self.data_processor.calculators)}종목)")
+        return new_codes
+    
+    def remove_stocks(self, stock_codes: List[str]) -> List[str]:
+        """
+        종목 제거 - 실시간 해제, 수급 TR 취소, 버퍼 플러시 후 CSV 닫기, 상태 정리
+        
+        Returns:
+            List[str]: 제거된 종목
+        """
+        targets = [code for code in stock_codes if code in self.data_processor.calculators]
+        if not targets:
+            return []
+        
+        self.kiwoom_client.remove_realdata(targets)
+        self.tr_manager.remove_stocks(targets)
+        for stock_code in targets:
+            if self.csv_writer:
+                self.csv_writer.close_stock_csv(stock_code)
+            self.data_processor.remove_stock(stock_code)
+            if self.bar_sink:
+                self.bar_sink.close_stock(stock_code)
+            if self.indicator_bus:
+                self.indicator_bus.remove_stock(stock_code)
+            self.investor_manager.remove_stock(stock_code)
+            if self.system_monitor:
+                self.system_monitor.on_stock_removed(stock_code)
+            self.tick_counts.pop(stock_code, None)
+            if stock_code in self.target_stocks:
+                self.target_stocks.remove(stock_code)
+        
+        self.logger.info(f"종목 제거 완료: {targets} (총 {len(self.data_processor.calculators)}종목)")
+        return targets
+    
+    def backfill_indicators(self, stock_code: str) -> int:
+        """당일 CSV 마지막 행들로 계산기 버퍼 워밍업 (파일은 읽기만 함)"""
+        try:
+            calculator = self.data_processor.calculators.get(stock_code)
+            cold = calculator is not None and calculator.last_update_time <= 0
+            rows = self.csv_writer.read_tail_rows(stock_code, DataConfig.BACKFILL_ROWS)
+            replayed = self.data_processor.backfill_stock(stock_code, rows)
+            
+            # 콜드 워밍업은 꼬리만 재생하므로 세션 VWAP 누적값은 파일 전체로 다시 계산
+            if cold and replayed:
+                self.data_processor.seed_session_vwap(stock_code, self.csv_writer.iter_columns(
+                    stock_code, ['time', 'volume', 'current_price', 'trade_qty']))
+            return replayed
+        except Exception as e:
+            self.logger.error(f"지표 버퍼 워밍업 실패 ({stock_code}): {e}")
+            return 0
+    
     # ========================================================================
     # 자동 재시작 시스템
     # ========================================================================
@@ -242,11 +387,18 @@ class KiwoomDataCollector:
             if self.system_monitor:
                 self.system_monitor.on_realdata_received(stock_code)
             
+            # 시세 지연 기록 (체결 이벤트만 거래소 체결시간 보유)
+            if self.lag_monitor and real_type == "주식체결":
+                self.lag_monitor.observe(stock_code, tick_data.get('exchange_time_ms', 0), tick_data.get('time', 0))
+
             # 데이터 프로세서로 전달
             self.data_processor.process_realdata(stock_code, real_type, tick_data)
             
-            # 통계 업데이트
-            self.tick_counts[stock_code] = self.tick_counts.get(stock_code, 0) + 1
+            # 통계 업데이트 (방금 제거된 종목의 늦은 틱은 제외)
+            if stock_code in self.tick_counts:
+                self.tick_counts[stock_code] += 1
+                if real_type == "주식체결":
+                    self.trade_count += 1
             
         except Exception as e:
             self.logger.error(f"💥 실시간 데이터 처리 오류: {e}")
@@ -271,8 +423,15 @@ class KiwoomDataCollector:
             # TR Manager로 전달하여 수급 데이터 처리
             if tr_code == TRCode.INVESTOR_NET_VOL:
                 stock_code = tr_data.get('stock_code', '')
-                self.investor_manager.update_from_tr(stock_code, tr_data)
-                self.logger.info(f"[수급TR처리완료] {stock_code}")
+                if stock_code not in self.data_processor.calculators:
+                    self.logger.debug(f"제거된 종목 수급 응답 무시: {stock_code}")
+                    return
+                # 값이 그대로면 델타/행 조각 재계산 생략 (시계열에는 갱신마다 1행 기록)
+                if self.tr_manager.on_investor_data(stock_code, tr_data):
+                    self.investor_manager.update_from_tr(stock_code, tr_data)
+                    self.logger.info(f"[수급TR처리완료] {stock_code}")
+                else:
+                    self.investor_manager.record_unchanged(stock_code, tr_data)
             
             # 기타 TR 데이터는 데이터 프로세서로
             self.data_processor.process_tr_data(tr_code, tr_data)
@@ -297,6 +456,10 @@ class KiwoomDataCollector:
             else:
                 self.logger.warning("CSV writer가 None입니다!")
             
+            # 구독 프로세스에 배포
+            if self.indicator_bus:
+                self.indicator_bus.publish(stock_code, indicators)
+            
             # 주요 지표 로깅 (100틱마다)
             if self.tick_counts.get(stock_code, 0) % 100 == 0:
                 self.logger.info(
@@ -351,6 +514,16 @@ class KiwoomDataCollector:
             # 주기적 상태 리포트 시작
             self.start_status_reporting()
             
+            # 지표 상태 스냅샷 주기 저장 시작
+            self.start_snapshot_checkpoints()
+            
+            # 봉 마감 타이머 시작 (체결 없는 구간도 제때 봉 생성)
+            self.start_bar_flush()
+            
+            # 지표 배포 TCP 폴백 시작 (포트 설정시)
+            if self.indicator_bus:
+                self.indicator_bus.start()
+            
             # 이벤트 루프 실행
             if self.kiwoom_client and self.kiwoom_client.app:
                 return self.kiwoom_client.app.exec_()
@@ -374,6 +547,38 @@ class KiwoomDataCollector:
         except Exception as e:
             self.logger.error(f"상태 리포트 시작 실패: {e}")
     
+    def start_snapshot_checkpoints(self):
+        """지표 계산기 상태 스냅샷 주기 저장 시작 (비정상 종료시 마지막 체크포인트에서 복원)"""
+        try:
+            self.snapshot_timer = QTimer()
+            self.snapshot_timer.timeout.connect(self.data_processor.save_snapshot)
+            self.snapshot_timer.start(DataConfig.SNAPSHOT_INTERVAL * 1000)
+            self.logger.info(f"지표 상태 스냅샷: {DataConfig.SNAPSHOT_FILE} ({DataConfig.SNAPSHOT_INTERVAL}초 주기)")
+            
+        except Exception as e:
+            self.logger.error(f"지표 상태 스냅샷 시작 실패: {e}")
+    
+    def start_bar_flush(self):
+        """봉 마감 확인 타이머 시작"""
+        if not self.bar_sink:
+            return
+        try:
+            self.bar_timer = QTimer()
+            self.bar_timer.timeout.connect(self.flush_bars)
+            self.bar_timer.start(DataConfig.BAR_FLUSH_MS)
+            self.logger.info(f"봉 생성: {DataConfig.BAR_TIMEFRAMES}초 → {DataConfig.BAR_DIR}")
+            
+        except Exception as e:
+            self.logger.error(f"봉 마감 타이머 시작 실패: {e}")
+    
+    def flush_bars(self):
+        """끝난 구간 봉 마감 + 파일 반영"""
+        try:
+            self.data_processor.bar_aggregator.flush(int(time.time() * 1000))
+            self.bar_sink.flush()
+        except Exception as e:
+            self.logger.error(f"봉 마감 처리 실패: {e}")
+    
     def print_status_report(self):
         """상태 리포트 출력"""
         try:
@@ -390,24 +595,70 @@ class KiwoomDataCollector:
             self.logger.info(f"실행 시간: {running_time / 60:.1f}분")
             self.logger.info(f"총 틱 수: {total_ticks:,} (분당 {ticks_per_minute:.1f}틱)")
             
-            # 종목별 틱 수
+            # 종목별 틱 수 + 시세 지연
             for stock_code, count in self.tick_counts.items():
-                self.logger.info(f"  {stock_code}: {count:,}틱")
-            
+                lag_stats = self.lag_monitor.get_stock_statistics(stock_code) if self.lag_monitor else None
+                if lag_stats:
+                    self.logger.info(
+                        f"  {stock_code}: {count:,}틱 - 지연 p50 {lag_stats['p50_ms']:.0f}ms, "
+                        f"p99 {lag_stats['p99_ms']:.0f}ms, 최대 {lag_stats['max_ms']:.0f}ms, "
+                        f"최근 {lag_stats['last_ms']:.0f}ms (경보 {lag_stats['alerts']}회)"
+                    )
+                else:
+                    self.logger.info(f"  {stock_code}: {count:,}틱")
+
             # CSV 통계
             if self.csv_writer:
                 csv_stats = self.csv_writer.get_statistics()
                 self.logger.info(f"CSV 저장: {csv_stats['total_writes']:,}행")
                 if csv_stats['total_errors'] > 0:
                     self.logger.warning(f"CSV 오류: {csv_stats['total_errors']}건")
-            
+
+            # 호가 병합 통계
+            if self.data_processor:
+                book_stats = self.data_processor.orderbook_coalescer.get_statistics()
+                self.logger.info(
+                    f"호가 수신: {book_stats['total_received']:,}건, "
+                    f"병합: {book_stats['total_merged']:,}건 ({book_stats['merge_ratio'] * 100:.1f}%)"
+                )
+
             # 클라이언트 상태
             if self.kiwoom_client:
                 client_status = self.kiwoom_client.get_status()
                 self.logger.info(f"연결 상태: {'연결' if client_status['connected'] else '끊김'}")
                 self.logger.info(f"등록 종목: {client_status['registered_stocks_count']}개")
+                realreg = client_status['realreg']
+                if realreg['connect_to_first_tick_ms'] is not None:
+                    all_ticks = realreg['connect_to_all_ticks_ms']
+                    self.logger.info(
+                        f"연결→첫 틱: {realreg['connect_to_first_tick_ms']:.0f}ms, "
+                        f"전 종목: {f'{all_ticks:.0f}ms' if all_ticks is not None else '대기'}, "
+                        f"등록 소요: {realreg['last_registration_ms'] or 0:.0f}ms"
+                    )
                 if client_status['tr_queue_size'] > 0:
                     self.logger.info(f"TR 큐: {client_status['tr_queue_size']}개 대기")
+
+            # 이벤트 루프 지연/정지 (감시 스레드 측정)
+            watchdog = self.system_monitor.loop_watchdog if self.system_monitor else None
+            if watchdog:
+                loop_stats = watchdog.get_statistics()
+                lag = loop_stats['lag']
+                self.logger.info(
+                    f"이벤트 루프 지연: p50 {lag['p50_ms']:.0f}ms, p99 {lag['p99_ms']:.0f}ms, "
+                    f"최대 {lag['max_ms']:.0f}ms / 정지 {loop_stats['stalls']}회"
+                )
+                if loop_stats['stalls']:
+                    stall_buckets = {bucket: count for bucket, count in loop_stats['stall']['buckets'].items() if count}
+                    self.logger.warning(f"이벤트 루프 정지 분포(ms): {stall_buckets}")
+
+            # 수급 TR 캐시 (변화 없는 응답 비율, 예산 대비 요청량)
+            if self.tr_manager:
+                cache_stats = self.tr_manager.flow_cache.get_statistics()
+                if cache_stats['updates']:
+                    self.logger.info(
+                        f"수급 TR: {cache_stats['updates']:,}회 중 변화없음 {cache_stats['unchanged']:,}회, "
+                        f"분당 {cache_stats['demand_per_minute']:.1f}/{cache_stats['budget_per_minute']:.1f}회"
+                    )
             
             self.logger.info("=" * 50)
             
@@ -439,6 +690,12 @@ class KiwoomDataCollector:
             self.start_time = time.time()
             for stock_code in self.target_stocks:
                 self.tick_counts[stock_code] = 0
+            if self.lag_monitor:
+                self.lag_monitor.reset()
+            
+            # 봉 마감 타이머 재개 (장 마감시 중지)
+            if self.bar_timer and not self.bar_timer.isActive():
+                self.bar_timer.start(DataConfig.BAR_FLUSH_MS)
             
             # 연결 상태 확인 후 실시간 등록
             if self.kiwoom_client.GetConnectState():
@@ -479,6 +736,14 @@ class KiwoomDataCollector:
                 self.logger.info("CSV 버퍼 모두 저장")
                 self.csv_writer.flush_all_buffers()
             
+            # 봉 마감 후 타이머 중지 (장외 시간에는 빈 봉을 만들지 않음)
+            if self.bar_sink:
+                if self.bar_timer:
+                    self.bar_timer.stop()
+                self.flush_bars()
+                self.data_processor.bar_aggregator.close_all()
+                self.bar_sink.close()
+            
             # 오늘 통계 출력
             if self.start_time:
                 total_time = time.time() - self.start_time
@@ -520,12 +785,43 @@ class KiwoomDataCollector:
         try:
             self.logger.info("시스템 종료 중...")
             
+            # 관심종목 감시 중지
+            if self.watchlist:
+                self.watchlist.stop()
+            
+            # 프로파일러 중지 (켜져 있었으면 마지막 구간 기록)
+            if self.profiler_control:
+                self.profiler_control.stop()
+            if self.profiler:
+                self.profiler.stop()
+            
             # 모든 버퍼 플러시
             if self.csv_writer:
                 self.logger.info("CSV 버퍼 플러시...")
                 self.csv_writer.flush_all_buffers()
                 self.csv_writer.close_all()
             
+            # 진행 중인 봉까지 저장
+            if self.bar_sink:
+                if self.bar_timer:
+                    self.bar_timer.stop()
+                self.data_processor.bar_aggregator.close_all()
+                self.bar_sink.close()
+            
+            # 지표 배포 종료 (공유메모리 링 해제)
+            if self.indicator_bus:
+                self.indicator_bus.close()
+            if self.state_table:
+                self.data_processor.set_state_table(None)
+                self.state_table.close()
+            
+            # 지표 상태 최종 스냅샷 (CSV 플러시 이후 - 재시작시 이어서 계산)
+            if self.data_processor:
+                self.logger.info("지표 상태 스냅샷 저장...")
+                if self.snapshot_timer:
+                    self.snapshot_timer.stop()
+                self.data_processor.save_snapshot()
+            
             # 스케줄러 정리
             if self.market_scheduler:
                 self.logger.info("장 시작 스케줄러 종료...")
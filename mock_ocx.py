@@ -0,0 +1,442 @@
+"""
+키움 OCX 모의 객체
+실제 OpenAPI+ 없이 KiwoomClient 검증/부하 테스트용 - dynamicCall/이벤트 시그널 흉내
+- TR별 응답 지연 설정 (여러 TR 동시 응답 대기 재현)
+- TR별 응답 데이터(행 목록) 및 CommRqData 반환코드(-200 등) 주입, 확률적 시세과부하
+- 합성 시장(synthetic_market) 기반 OnReceiveRealData 발생 (속도 배율 설정)
+- 연결 끊김 모의 (GetConnectState 0 + 실시간 등록 해제)
+"""
+
+import time
+import heapq
+import random
+import logging
+from datetime import datetime
+from itertools import count
+from typing import Callable, Dict, Iterator, List, Optional
+
+from config import KiwoomConfig, RealDataFID, TRCode
+
+class MockSignal:
+    """pyqtSignal 대체 (connect/disconnect/emit)"""
+
+    def __init__(self):
+        self.slots: List[Callable] = []
+
+    def connect(self, slot: Callable):
+        self.slots.append(slot)
+
+    def disconnect(self, slot: Callable = None):
+        if slot is None:
+            self.slots.clear()
+        elif slot in self.slots:
+            self.slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in list(self.slots):
+            slot(*args)
+
+class MockKiwoomOCX:
+    """
+    KHOPENAPI.KHOpenAPICtrl.1 모의 객체
+
+    응답 전달 방식:
+    - timer_fn 지정시 timer_fn(지연ms, 콜백)으로 예약 (예: QTimer.singleShot → Qt 이벤트 루프에서 전달)
+    - 미지정시 내부 힙에 보관, pump() 호출 시 due가 지난 응답 전달 (Qt 없이 검증)
+    """
+
+    def __init__(self, response_delays: Dict[str, float] = None, default_delay: float = 0.05,
+                 tr_data: Dict[str, object] = None, timer_fn: Callable = None,
+                 now_fn: Callable[[], float] = None, throttle_ratio: float = 0.0,
+                 disconnect_interval: float = 0.0, seed: int = 0):
+        """
+        Args:
+            response_delays: TR코드별 응답 지연 (초)
+            default_delay: 기본 응답 지연 (초)
+            tr_data: TR코드별 응답 행 목록 또는 fn(inputs) -> 행 목록 (행 = {필드명: 값})
+            timer_fn: 지연 콜백 예약 함수 timer_fn(ms, callback)
+            now_fn: 현재 시각 함수 (pump 방식에서 사용)
+            throttle_ratio: CommRqData가 -200(시세과부하)을 반환할 확률
+            disconnect_interval: 평균 연결 끊김 간격 (초, 지수분포), 0이면 끊김 없음
+            seed: 난수 시드
+        """
+        self.logger = logging.getLogger(__name__)
+        self.rng = random.Random(seed)
+
+        self.response_delays = dict(response_delays or {})
+        self.default_delay = default_delay
+        self.tr_data = dict(tr_data or {})
+        self.timer_fn = timer_fn
+        self.now_fn = now_fn or time.monotonic
+
+        # 이벤트 시그널 (QAxWidget과 동일한 이름)
+        self.OnEventConnect = MockSignal()
+        self.OnReceiveTrData = MockSignal()
+        self.OnReceiveRealData = MockSignal()
+        self.OnReceiveMsg = MockSignal()
+        self.OnReceiveChejanData = MockSignal()
+
+        # 상태
+        self.connect_state = 0
+        self.login_info = {
+            'USER_ID': 'mock',
+            'USER_NAME': 'mock',
+            'KEY_BSECGB': '0',
+            'FIREW_SECGB': '0',
+            'ACCNO': '0000000000;'
+        }
+        self.inputs: Dict[str, str] = {}
+        self.real_registrations: Dict[str, List[str]] = {}
+        self.registered_codes = set()
+
+        # 오류 주입
+        self.throttle_ratio = throttle_ratio
+        self.disconnect_interval = disconnect_interval
+        self.next_disconnect_at: Optional[float] = None
+
+        # 실시간 이벤트 (합성 시장)
+        self.market_events: Optional[Iterator] = None
+        self.pending_market_event = None
+        self.market_wall_start = 0.0
+        self.market_time_start = 0
+        self.pump_max_events = KiwoomConfig.MOCK_PUMP_MAX_EVENTS  # 처리가 밀리면 나머지는 다음 pump로 (지연으로 집계)
+        self.current_real: Dict[str, Dict[int, str]] = {}  # 종목 -> FID -> 값 (전달 중 이벤트)
+
+        # TR코드별 CommRqData 반환코드 주입 (앞에서부터 소비, 예: [-200, -200])
+        self.rq_return_codes: Dict[str, List[int]] = {}
+
+        # 응답 대기/전달 중 데이터
+        self.responses: Dict[str, List[Dict]] = {}  # rq_name -> 행 목록
+        self._due: List = []
+        self._seq = count()
+
+        # 통계
+        self.request_log: List[Dict] = []
+        self.max_in_flight = 0
+        self.real_event_count = 0
+        self.dropped_real_count = 0   # 미등록 종목/끊김으로 버린 이벤트
+        self.throttled_count = 0
+        self.disconnect_count = 0
+        self.real_lag_max = 0.0       # 예정 시각 대비 전달 지연 최대값 (초)
+
+    # ------------------------------------------------------------------------
+    # dynamicCall 디스패치
+    # ------------------------------------------------------------------------
+
+    def dynamicCall(self, signature: str, *args):
+        """'함수명(타입, ...)' 시그니처를 _함수명 메서드로 전달"""
+        if len(args) == 1 and isinstance(args[0], (list, tuple)):
+            args = tuple(args[0])
+
+        handler = getattr(self, f"_{signature.split('(')[0]}", None)
+        if handler is None:
+            self.logger.debug(f"모의 OCX 미지원 호출: {signature}")
+            return ""
+        return handler(*args)
+
+    def _schedule(self, delay: float, callback: Callable):
+        if self.timer_fn:
+            self.timer_fn(int(delay * 1000), callback)
+        else:
+            heapq.heappush(self._due, (self.now_fn() + delay, next(self._seq), callback))
+
+    def pump(self) -> int:
+        """due가 지난 예약 응답/실시간 이벤트 전달 및 끊김 모의 (timer_fn 미사용시 주기 호출)"""
+        delivered = 0
+        now = self.now_fn()
+        while self._due and self._due[0][0] <= now:
+            _, _, callback = heapq.heappop(self._due)
+            callback()
+            delivered += 1
+
+        if self.market_events is not None:
+            delivered += self._pump_market(now)
+
+        if self.next_disconnect_at is not None and now >= self.next_disconnect_at:
+            self.simulate_disconnect()
+
+        return delivered
+
+    def in_flight(self) -> int:
+        """응답 전달 전 TR 수"""
+        return len(self.responses)
+
+    # ------------------------------------------------------------------------
+    # 로그인
+    # ------------------------------------------------------------------------
+
+    def _CommConnect(self):
+        def connected():
+            self.connect_state = 1
+            if self.disconnect_interval > 0:
+                self.next_disconnect_at = self.now_fn() + self.rng.expovariate(1.0 / self.disconnect_interval)
+            self.OnEventConnect.emit(0)
+        self._schedule(self.default_delay, connected)
+        return 0
+
+    def _CommTerminate(self):
+        self.connect_state = 0
+        self.next_disconnect_at = None
+
+    def simulate_disconnect(self):
+        """서버 연결 끊김: 상태 0, 실시간 등록 해제 (재연결은 CommConnect 호출 필요)"""
+        self.connect_state = 0
+        self.next_disconnect_at = None
+        self.real_registrations.clear()
+        self.registered_codes.clear()
+        self.disconnect_count += 1
+        self.logger.warning(f"⚠️ [모의OCX] 연결 끊김 모의 ({self.disconnect_count}회)")
+
+    def _GetConnectState(self):
+        return self.connect_state
+
+    def _GetLoginInfo(self, tag):
+        return self.login_info.get(tag, "")
+
+    # ------------------------------------------------------------------------
+    # TR
+    # ------------------------------------------------------------------------
+
+    def _SetInputValue(self, key, value):
+        self.inputs[key] = value
+
+    def _CommRqData(self, rq_name, tr_code, prev_next, screen_no):
+        inputs, self.inputs = self.inputs, {}
+
+        codes = self.rq_return_codes.get(tr_code)
+        if codes:
+            return codes.pop(0)
+
+        if self.throttle_ratio and self.rng.random() < self.throttle_ratio:
+            self.throttled_count += 1
+            return -200
+
+        rows = self.tr_data.get(tr_code, [])
+        if callable(rows):
+            rows = rows(inputs)
+
+        self.responses[rq_name] = list(rows)
+        self.max_in_flight = max(self.max_in_flight, len(self.responses))
+        self.request_log.append({
+            'rq_name': rq_name, 'tr_code': tr_code, 'screen_no': screen_no,
+            'inputs': inputs, 'time': self.now_fn()
+        })
+
+        delay = self.response_delays.get(tr_code, self.default_delay)
+        self._schedule(delay, lambda: self._deliver_tr(screen_no, rq_name, tr_code))
+        return 0
+
+    def _deliver_tr(self, screen_no, rq_name, tr_code):
+        # OnReceiveTrData 처리 중 GetCommData 조회가 가능하도록 전달 후 삭제
+        self.OnReceiveTrData.emit(screen_no, rq_name, tr_code, "", "0")
+        self.responses.pop(rq_name, None)
+
+    def _GetRepeatCnt(self, tr_code, rq_name):
+        return len(self.responses.get(rq_name, []))
+
+    def _GetCommData(self, tr_code, rq_name, index, item_name):
+        rows = self.responses.get(rq_name, [])
+        if index < len(rows):
+            return str(rows[index].get(item_name, ""))
+        return ""
+
+    # ------------------------------------------------------------------------
+    # 실시간
+    # ------------------------------------------------------------------------
+
+    def _SetRealReg(self, screen_no, code_list, fid_list, opt_type):
+        codes = [code for code in code_list.split(';') if code]
+        if opt_type == "0" or screen_no not in self.real_registrations:
+            self.real_registrations[screen_no] = codes
+        else:
+            self.real_registrations[screen_no].extend(codes)
+        self._refresh_registered_codes()
+        return 0
+
+    def _refresh_registered_codes(self):
+        self.registered_codes = {code for codes in self.real_registrations.values() for code in codes}
+
+    def _SetRealRemove(self, screen_no, code):
+        # 화면 "ALL" = 전체 화면 대상, 종목 "ALL" = 화면의 전체 종목
+        screens = list(self.real_registrations) if screen_no == "ALL" else [screen_no]
+        for screen in screens:
+            if screen in self.real_registrations:
+                self.real_registrations[screen] = [
+                    c for c in self.real_registrations[screen] if code not in ("ALL", c)
+                ]
+        self._refresh_registered_codes()
+
+    def _DisconnectRealData(self, screen_no):
+        self.real_registrations.pop(screen_no, None)
+        self._refresh_registered_codes()
+
+    def _GetCommRealData(self, code, fid):
+        return self.current_real.get(code, {}).get(int(fid), "")
+
+    # ------------------------------------------------------------------------
+    # 합성 시장 실시간 이벤트
+    # ------------------------------------------------------------------------
+
+    def start_market(self, market):
+        """
+        합성 시장 이벤트 발생 시작 (synthetic_market.SyntheticMarket)
+        이벤트의 시장시각 간격을 그대로 벽시계 간격으로 사용 (속도 배율은 market.speed)
+        """
+        self.market_events = market.events(10 ** 12)
+        self.pending_market_event = next(self.market_events, None)
+        self.market_wall_start = self.now_fn()
+        self.market_time_start = self.pending_market_event[2]['time'] if self.pending_market_event else 0
+
+    def stop_market(self):
+        """합성 시장 이벤트 중지"""
+        self.market_events = None
+        self.pending_market_event = None
+
+    def _pump_market(self, now: float) -> int:
+        delivered = 0
+        while self.pending_market_event is not None and delivered < self.pump_max_events:
+            stock_code, real_type, data = self.pending_market_event
+            due = self.market_wall_start + (data['time'] - self.market_time_start) / 1000
+            if due > now:
+                break
+
+            self.real_lag_max = max(self.real_lag_max, now - due)
+            self._emit_real(stock_code, real_type, data, due)
+            delivered += 1
+            self.pending_market_event = next(self.market_events, None)
+        return delivered
+
+    def _emit_real(self, stock_code: str, real_type: str, data: Dict, due: float):
+        """실시간 이벤트 1건을 FID 문자열로 변환해 OnReceiveRealData 발생 (등록 종목만)"""
+        if self.connect_state != 1 or stock_code not in self.registered_codes:
+            self.dropped_real_count += 1
+            return
+
+        if real_type == "주식체결":
+            values = {
+                'current_price': f"+{int(data['current_price'])}",
+                'volume': str(data['volume']),
+                'trade_volume': f"+{data['trade_volume']}",  # 체결량 (부호 = 매수/매도 체결)
+                'trade_time': datetime.fromtimestamp(time.time() - (self.now_fn() - due)).strftime('%H%M%S'),
+            }
+            fids = {RealDataFID.STOCK_QUOTE[field]: value for field, value in values.items()}
+        else:
+            fids = {fid: (f"+{data[field]}" if 'qty' not in field else str(data[field]))
+                    for field, fid in RealDataFID.STOCK_HOGA.items()}
+
+        self.current_real[stock_code] = fids
+        self.real_event_count += 1
+        try:
+            self.OnReceiveRealData.emit(stock_code, real_type, "")
+        finally:
+            self.current_real.pop(stock_code, None)
+
+    # ------------------------------------------------------------------------
+    # 설정 기반 생성 (KiwoomConfig.TRANSPORT = "mock")
+    # ------------------------------------------------------------------------
+
+    @classmethod
+    def from_config(cls, stock_codes: List[str]) -> 'MockKiwoomOCX':
+        """
+        KiwoomConfig.MOCK_* 설정으로 모의 OCX 생성
+        - 샘플 CSV 종목 특성을 대상 종목에 순환 배정한 합성 시장 (MOCK_SPEED 배율)
+        - OPT10059 / opt10081 응답 생성
+        - Qt 이벤트 루프에서 MOCK_PUMP_INTERVAL_MS 주기로 pump
+        """
+        from synthetic_market import MarketProfile, SyntheticMarket, load_profiles
+
+        seed = KiwoomConfig.MOCK_SEED
+        ocx = cls(default_delay=KiwoomConfig.MOCK_TR_DELAY,
+                  throttle_ratio=KiwoomConfig.MOCK_THROTTLE_RATIO,
+                  disconnect_interval=KiwoomConfig.MOCK_DISCONNECT_INTERVAL,
+                  seed=seed)
+
+        samples = load_profiles(KiwoomConfig.MOCK_PROFILE_DIR or None) or [MarketProfile.default("000000")]
+        profiles = []
+        for idx, stock_code in enumerate(stock_codes):
+            base = samples[idx % len(samples)]
+            profiles.append(MarketProfile(stock_code, base.start_price, base.tick, base.gaps_ms,
+                                          base.trade_sizes, base.price_moves, base.spread_ticks,
+                                          base.level_qtys))
+
+        investor_totals: Dict[str, Dict[str, int]] = {}
+        investor_fields = ['개인투자자', '외국인투자자', '기관계', '연기금등', '투신', '보험',
+                           '사모펀드', '은행', '국가', '기타법인', '내외국인']
+
+        def investor_rows(inputs):
+            totals = investor_totals.setdefault(inputs.get('종목코드', ''), dict.fromkeys(investor_fields, 0))
+            for field in investor_fields:
+                if ocx.rng.random() < 0.5:
+                    totals[field] += ocx.rng.randint(-50, 50)
+            return [{field: f"{value:+d}" for field, value in totals.items()}]
+
+        start_prices = {profile.stock_code: profile.start_price for profile in profiles}
+
+        def daily_rows(inputs):
+            price = start_prices.get(inputs.get('종목코드', ''))
+            return [{'전일고가': str(int(price))}] if price else []
+
+        ocx.tr_data[TRCode.INVESTOR_NET_VOL] = investor_rows
+        ocx.tr_data[TRCode.DAILY_STOCK] = daily_rows
+
+        if profiles:
+            ocx.start_market(SyntheticMarket(profiles, seed=seed, speed=KiwoomConfig.MOCK_SPEED))
+
+        try:
+            from PyQt5.QtCore import QTimer
+            ocx.pump_timer = QTimer()
+            ocx.pump_timer.timeout.connect(ocx.pump)
+            ocx.pump_timer.start(KiwoomConfig.MOCK_PUMP_INTERVAL_MS)
+        except ImportError:
+            pass  # Qt 없이 사용시 pump()를 직접 호출
+
+        ocx.logger.info(f"모의 OCX 생성: {len(profiles)}종목, 속도 {KiwoomConfig.MOCK_SPEED:g}배, "
+                        f"시세과부하 {KiwoomConfig.MOCK_THROTTLE_RATIO * 100:.0f}%")
+        return ocx
+
+    def get_statistics(self) -> Dict:
+        """모의 OCX 통계"""
+        return {
+            'real_events': self.real_event_count,
+            'dropped_real_events': self.dropped_real_count,
+            'real_lag_max_sec': self.real_lag_max,
+            'tr_requests': len(self.request_log),
+            'throttled': self.throttled_count,
+            'disconnects': self.disconnect_count,
+            'max_tr_in_flight': self.max_in_flight,
+        }
+
+
+if __name__ == "__main__":
+    # 모의 OCX로 비동기 TR 동작 확인 (응답 대기 중 실시간 이벤트 처리, TR 동시 진행)
+    import sys
+    from PyQt5.QtCore import QTimer
+    from kiwoom_client import KiwoomClient
+    from config import TRCode
+
+    logging.basicConfig(level=logging.INFO)
+
+    ocx = MockKiwoomOCX(
+        response_delays={TRCode.INVESTOR_NET_VOL: 1.5, TRCode.DAILY_STOCK: 0.5},
+        tr_data={TRCode.INVESTOR_NET_VOL: [{'개인투자자': '+1200', '외국인투자자': '-800'}]},
+        timer_fn=QTimer.singleShot
+    )
+    client = KiwoomClient(ocx=ocx)
+    client.connected = True
+
+    ticks = []
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(lambda: ticks.append(time.monotonic()))
+    heartbeat.start(10)
+
+    futures = [client.request_tr_async(TRCode.INVESTOR_NET_VOL, {'종목코드': code})
+               for code in ["005930", "000660", "035420"]]
+    for future in futures:
+        future.add_done_callback(lambda f: print(f"[TR 완료] {f.result().get('stock_code')}"))
+
+    def finish():
+        print(f"최대 동시 대기 TR: {ocx.max_in_flight}, 대기 중 이벤트 처리: {len(ticks)}회")
+        client.app.quit()
+
+    QTimer.singleShot(5000, finish)
+    sys.exit(client.app.exec_())
@@ -0,0 +1,373 @@
+"""
+내장 샘플링 프로파일러 (외부 프로파일러를 붙일 수 없는 매매 PC용)
+분당 틱 처리량이 떨어질 때 수집을 멈추지 않고 켜서 원인 구간 확인
+- 켜기/끄기: 시그널(SIGUSR2, Windows는 SIGBREAK) 토글, 제어 파일, 로컬 제어 소켓(ON/OFF/DUMP/STATUS)
+  시그널 핸들러는 메인 스레드가 파이썬 코드를 실행할 때만 돌기 때문에 이벤트 루프가 멈춘 동안(C 호출 대기 등)에는
+  토글이 늦어지거나 적용되지 않음 → 멈춘 루프를 잡을 때는 제어 파일 사용 (샘플링 스레드가 직접 확인)
+- 샘플링 스레드가 전 스레드 파이썬 스택을 설정 주기로 수집 - 스택별 카운트, 개수 상한(고정 메모리)
+- 시간 구간마다 접힌 스택 파일(flamegraph.pl / speedscope 입력) + 종목별 요약 파일 저장
+- 종목 귀속: DataProcessor가 틱 처리 동안 tag_stock으로 종목 표시 → 스택에 "종목:코드" 프레임 삽입,
+  요약에 지표 계산(IndicatorCalculator) / 싱크(CSV, 봉, 배포) 시간 분리
+"""
+
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import DataConfig
+
+# 스레드 -> 처리 중인 종목 (DataProcessor.process_realdata 동안만, 샘플링 스레드가 읽음)
+_stock_tags: Dict[int, str] = {}
+
+# 종목별 요약 구간 (스택 프레임 "파일:함수" 접두사)
+ATTRIBUTION_FRAMES = {
+    'indicators': ('data_processor.py:update_tick_data',),
+    'sinks': ('csv_writer.py:', 'shm_bus.py:', 'bar_aggregator.py:_emit'),
+}
+
+OVERFLOW_FRAME = '(스택 한도 초과)'
+
+def tag_stock(stock_code: str):
+    """현재 스레드가 stock_code 처리 중 (O(1), 프로파일러가 꺼져 있어도 호출 가능)"""
+    _stock_tags[threading.get_ident()] = stock_code
+
+def clear_stock_tag():
+    _stock_tags.pop(threading.get_ident(), None)
+
+class SamplingProfiler:
+    """
+    샘플링 프로파일러 - 제어 스레드 1개 (꺼져 있으면 제어 파일만 확인)
+    enable/disable/request_dump는 플래그만 바꾸고 샘플링/파일 기록은 모두 샘플링 스레드에서 수행
+    (Qt 이벤트 루프가 멈춘 상태에서도 제어 파일로 켜고 기록 가능 - 시그널은 메인 스레드가 파이썬 코드를 실행해야 반영)
+    """
+
+    def __init__(self, rate_hz: float = None, window_seconds: float = None, max_stacks: int = None,
+                 max_depth: int = None, output_dir: str = None, control_file: str = None):
+        self.logger = logging.getLogger(__name__)
+        self.rate_hz = rate_hz or DataConfig.PROFILER_RATE_HZ
+        self.window_seconds = window_seconds or DataConfig.PROFILER_WINDOW_SECONDS
+        self.max_stacks = max_stacks or DataConfig.PROFILER_MAX_STACKS
+        self.max_depth = max_depth or DataConfig.PROFILER_MAX_DEPTH
+        self.output_dir = output_dir or DataConfig.PROFILER_DIR
+        self.control_file = DataConfig.PROFILER_CONTROL_FILE if control_file is None else control_file
+
+        self.enabled = False
+        self.dump_requested = False
+        self.toggle_requested = False  # 시그널 핸들러는 플래그만 세움 (로그/잠금은 샘플링 스레드에서)
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.control_state = None  # 제어 파일 (존재, mtime) - 바뀔 때만 반영
+        self.next_control_check = 0.0
+
+        # 현재 구간 집계 (샘플링 스레드만 접근)
+        self.window_start: Optional[float] = None
+        self.stacks: Counter = Counter()
+        self.thread_samples: Counter = Counter()
+        self.stock_samples: Dict[str, Counter] = defaultdict(Counter)
+        self.window_samples = 0
+        self.thread_names: Dict[int, str] = {}
+
+        # 통계
+        self.total_samples = 0
+        self.overflow_samples = 0
+        self.windows_written = 0
+        self.sample_seconds = 0.0  # 샘플링 자체에 쓴 시간 (오버헤드)
+
+    # ------------------------------------------------------------------------
+    # 제어 (어느 스레드에서나 호출 가능)
+    # ------------------------------------------------------------------------
+
+    def start(self):
+        """제어 스레드 시작 + 시그널 토글 등록 (메인 스레드에서 호출)"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self.thread.start()
+        self._install_signal()
+        if DataConfig.PROFILER_AUTOSTART:
+            self.enable()
+
+    def stop(self):
+        """중지 (진행 중인 구간은 파일로 기록)"""
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    def enable(self, rate_hz: float = None):
+        if rate_hz:
+            self.rate_hz = max(1.0, min(float(rate_hz), 1000.0))
+        if not self.enabled:
+            self.enabled = True
+            self.logger.info(f"🔬 샘플링 프로파일러 켜짐 ({self.rate_hz:g}Hz, {self.window_seconds:g}초 구간)")
+        self.wake_event.set()
+
+    def disable(self):
+        if self.enabled:
+            self.enabled = False
+            self.logger.info("🔬 샘플링 프로파일러 꺼짐")
+        self.wake_event.set()
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def request_dump(self):
+        """현재 구간을 바로 기록 (다음 샘플 시점)"""
+        self.dump_requested = True
+        self.wake_event.set()
+
+    def _install_signal(self):
+        signum = getattr(signal, 'SIGUSR2', None) or getattr(signal, 'SIGBREAK', None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return
+        try:
+            signal.signal(signum, self._on_signal)
+            self.logger.info(f"샘플링 프로파일러 토글 시그널: {signal.Signals(signum).name}")
+        except (ValueError, OSError) as e:
+            self.logger.error(f"프로파일러 시그널 등록 실패: {e}")
+
+    def _on_signal(self, signum, frame):
+        """시그널 토글 요청 - 핸들러 안에서는 로그/잠금 금지, 샘플링 스레드가 다음 확인 때 반영"""
+        self.toggle_requested = True
+
+    # ------------------------------------------------------------------------
+    # 샘플링 스레드
+    # ------------------------------------------------------------------------
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                if self.toggle_requested:
+                    self.toggle_requested = False
+                    self.toggle()
+                self._check_control_file()
+                if self.enabled:
+                    if self.window_start is None:
+                        self.window_start = time.time()
+                    self._sample()
+                    if self.dump_requested or time.time() - self.window_start >= self.window_seconds:
+                        self._write_window()
+                    wait = 1.0 / self.rate_hz
+                else:
+                    if self.window_start is not None:
+                        self._write_window()
+                    wait = DataConfig.PROFILER_CONTROL_POLL_SECONDS
+            except Exception as e:
+                self.logger.error(f"샘플링 프로파일러 오류: {e}")
+                wait = DataConfig.PROFILER_CONTROL_POLL_SECONDS
+
+            self.wake_event.wait(wait)
+            self.wake_event.clear()
+
+        if self.window_start is not None:
+            self._write_window()
+
+    def _check_control_file(self):
+        """제어 파일: 생기면 켜기 (첫 줄 숫자 = 샘플링 Hz), 지우면 끄기"""
+        now = time.time()
+        if not self.control_file or now < self.next_control_check:
+            return
+        self.next_control_check = now + DataConfig.PROFILER_CONTROL_POLL_SECONDS
+
+        try:
+            state = (True, os.path.getmtime(self.control_file))
+        except OSError:
+            state = (False, None)
+        if state == self.control_state:
+            return
+        first_check = self.control_state is None
+        self.control_state = state
+
+        if state[0]:
+            with open(self.control_file, 'r', encoding='utf-8') as f:
+                tokens = f.read().split()
+            try:
+                rate_hz = float(tokens[0]) if tokens else None
+            except ValueError:
+                rate_hz = None
+            self.enable(rate_hz)
+        elif not first_check:
+            self.disable()
+
+    def _sample(self):
+        """전 스레드 스택 1회 수집"""
+        started = time.perf_counter()
+        own_id = threading.get_ident()
+        frames = sys._current_frames()
+        if any(thread_id not in self.thread_names for thread_id in frames):
+            self.thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for thread_id, frame in frames.items():
+            if thread_id == own_id:
+                continue
+            thread_name = self.thread_names.get(thread_id, str(thread_id))
+            parts = []
+            while frame is not None and len(parts) < self.max_depth:
+                code = frame.f_code
+                parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if frame is not None:
+                parts.append('...')  # 바깥쪽 프레임 생략
+            parts.reverse()
+
+            stock_code = _stock_tags.get(thread_id)
+            if stock_code:
+                self._attribute(stock_code, parts)
+                parts.insert(0, f"종목:{stock_code}")
+            parts.insert(0, f"스레드:{thread_name}")
+
+            key = ';'.join(parts)
+            if key not in self.stacks and len(self.stacks) >= self.max_stacks:
+                key = f"스레드:{thread_name};{OVERFLOW_FRAME}"
+                self.overflow_samples += 1
+            self.stacks[key] += 1
+            self.thread_samples[thread_name] += 1
+        del frames
+
+        self.window_samples += 1
+        self.total_samples += 1
+        self.sample_seconds += time.perf_counter() - started
+
+    def _attribute(self, stock_code: str, parts):
+        counts = self.stock_samples[stock_code]
+        counts['total'] += 1
+        for category, prefixes in ATTRIBUTION_FRAMES.items():
+            if any(part.startswith(prefixes) for part in parts):
+                counts[category] += 1
+
+    def _write_window(self):
+        """현재 구간 → 접힌 스택 + 요약 파일, 집계 초기화"""
+        started, ended = self.window_start, time.time()
+        stacks, thread_samples, stock_samples = self.stacks, self.thread_samples, self.stock_samples
+        samples = self.window_samples
+
+        self.window_start = time.time() if self.enabled else None
+        self.stacks, self.thread_samples, self.stock_samples = Counter(), Counter(), defaultdict(Counter)
+        self.window_samples = 0
+        self.dump_requested = False
+        if not samples:
+            return
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"profile_{datetime.fromtimestamp(started).strftime('%Y%m%d_%H%M%S')}")
+        with open(f"{base}.collapsed", 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        # 샘플 간격은 GIL 대기로 설정값보다 길어질 수 있어 실제 구간 길이 / 샘플 수로 환산
+        sample_ms = (ended - started) * 1000.0 / samples
+        with open(f"{base}.summary.txt", 'w', encoding='utf-8') as f:
+            f.write(f"구간: {datetime.fromtimestamp(started)} ~ {datetime.fromtimestamp(ended)} "
+                    f"({ended - started:.1f}초)\n")
+            f.write(f"샘플: {samples}회 @ {self.rate_hz:g}Hz (샘플 1회 ≈ {sample_ms:.1f}ms), "
+                    f"스택 {len(stacks)}종\n")
+
+            f.write("\n=== 스레드별 샘플 (파이썬 스택 기준 - 대기 중인 스레드 포함) ===\n")
+            for thread_name, count in thread_samples.most_common():
+                f.write(f"{count:7d}  {count / samples * 100:5.1f}%  {thread_name}\n")
+
+            f.write("\n=== 종목별 처리 시간 추정 (ms) - 전체 / 지표 계산 / 싱크 ===\n")
+            for stock_code, counts in sorted(stock_samples.items(), key=lambda item: -item[1]['total']):
+                f.write(f"{stock_code}  {counts['total'] * sample_ms:9.0f}  "
+                        f"{counts['indicators'] * sample_ms:9.0f}  {counts['sinks'] * sample_ms:9.0f}\n")
+
+        self.windows_written += 1
+        self.logger.info(f"🔬 프로파일 저장: {base}.collapsed ({samples}샘플, 스택 {len(stacks)}종)")
+
+    def get_statistics(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'rate_hz': self.rate_hz,
+            'samples': self.total_samples,
+            'overflow_samples': self.overflow_samples,
+            'windows': self.windows_written,
+            'overhead_ms_per_sample': self.sample_seconds * 1000 / self.total_samples if self.total_samples else 0.0
+        }
+
+class ProfilerControl:
+    """
+    프로파일러 로컬 제어 소켓 (127.0.0.1:DataConfig.PROFILER_PORT, Qt 이벤트 루프에서 처리)
+        ON [Hz] / OFF / DUMP / STATUS
+    이벤트 루프가 멈춘 동안에는 응답하지 않음 - 그때는 제어 파일 사용
+    """
+
+    def __init__(self, profiler: SamplingProfiler, port: int = None):
+        self.logger = logging.getLogger(__name__)
+        self.profiler = profiler
+        self.port = DataConfig.PROFILER_PORT if port is None else port
+        self.server = None
+        self.client_buffers = {}
+
+    def start(self) -> bool:
+        from PyQt5.QtNetwork import QHostAddress, QTcpServer
+
+        self.server = QTcpServer()
+        self.server.newConnection.connect(self._on_new_connection)
+        if not self.server.listen(QHostAddress(QHostAddress.LocalHost), self.port):
+            self.logger.error(f"프로파일러 제어 소켓 시작 실패 (포트 {self.port}): {self.server.errorString()}")
+            self.server = None
+            return False
+
+        self.logger.info(f"프로파일러 제어 소켓: 127.0.0.1:{self.port} (ON/OFF/DUMP/STATUS)")
+        return True
+
+    def stop(self):
+        if self.server:
+            self.server.close()
+            self.server = None
+
+    def _on_new_connection(self):
+        while self.server and self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.client_buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._on_disconnected(s))
+
+    def _on_disconnected(self, socket):
+        self.client_buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket):
+        buffer = self.client_buffers.get(socket, b"") + bytes(socket.readAll())
+        *lines, buffer = buffer.split(b"\n")
+        self.client_buffers[socket] = buffer
+
+        for line in lines:
+            reply = self.handle_command(line.decode('utf-8', errors='replace'))
+            socket.write((reply + "\n").encode('utf-8'))
+
+    def handle_command(self, line: str) -> str:
+        """제어 명령 1줄 처리 → 응답 1줄"""
+        parts = line.strip().split()
+        if not parts:
+            return "ERR empty command"
+
+        command = parts[0].upper()
+        try:
+            if command == "ON":
+                self.profiler.enable(float(parts[1]) if len(parts) > 1 else None)
+                return f"OK on rate={self.profiler.rate_hz:g}"
+            if command == "OFF":
+                self.profiler.disable()
+                return "OK off"
+            if command == "DUMP":
+                self.profiler.request_dump()
+                return f"OK dump dir={self.profiler.output_dir}"
+            if command == "STATUS":
+                return "OK " + " ".join(f"{key}={value}" for key, value in self.profiler.get_statistics().items())
+            return f"ERR unknown command: {command}"
+        except Exception as e:
+            self.logger.error(f"프로파일러 명령 처리 실패 ({line.strip()}): {e}")
+            return f"ERR {e}"
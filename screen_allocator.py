@@ -0,0 +1,119 @@
+"""
+실시간 화면번호 할당기
+종목을 화면당 최대 MAX_STOCKS_PER_SCREEN개로 채워 넣고 종목 ↔ 화면 매핑 관리
+장중 종목 추가/삭제시 빈 자리 재사용 (기존 화면 등록은 그대로 유지)
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from config import KiwoomConfig
+
+class ScreenPool:
+    """
+    한 종류(체결 또는 호가) 실시간 화면번호 풀
+    - 화면번호: base, base+1, ... (4자리)
+    - 추가: 여유가 있는 가장 낮은 번호 화면에 배정, 모두 차면 새 화면
+    - 삭제: 화면이 비면 반납 (다음 추가시 재사용)
+    """
+
+    def __init__(self, base: str, capacity: int = None, max_screens: int = None):
+        self.logger = logging.getLogger(__name__)
+
+        self.base = int(base)
+        self.capacity = capacity or KiwoomConfig.MAX_STOCKS_PER_SCREEN
+        self.max_screens = max_screens or KiwoomConfig.MAX_REAL_SCREENS
+
+        # 화면번호 -> 종목 목록 (등록 순서 유지), 종목 -> 화면번호
+        self.screens: Dict[str, List[str]] = {}
+        self.stock_screen: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.stock_screen)
+
+    def __contains__(self, stock_code: str) -> bool:
+        return stock_code in self.stock_screen
+
+    def _screen_no(self, idx: int) -> str:
+        return f"{self.base + idx:04d}"
+
+    def add(self, stock_code: str) -> str:
+        """
+        종목 배정 (이미 배정된 종목은 기존 화면)
+
+        Returns:
+            str: 화면번호
+
+        Raises:
+            ValueError: 화면 수 한도 초과
+        """
+        screen_no = self.stock_screen.get(stock_code)
+        if screen_no:
+            return screen_no
+
+        for idx in range(self.max_screens):
+            screen_no = self._screen_no(idx)
+            stocks = self.screens.setdefault(screen_no, [])
+            if len(stocks) < self.capacity:
+                stocks.append(stock_code)
+                self.stock_screen[stock_code] = screen_no
+                return screen_no
+
+        raise ValueError(f"실시간 화면 한도 초과: {self.max_screens}화면 × {self.capacity}종목 "
+                         f"(화면 시작번호 {self.base:04d})")
+
+    def remove(self, stock_code: str) -> Optional[str]:
+        """종목 배정 해제 → 해제된 화면번호 (미배정이면 None)"""
+        screen_no = self.stock_screen.pop(stock_code, None)
+        if screen_no is None:
+            return None
+
+        stocks = self.screens[screen_no]
+        stocks.remove(stock_code)
+        if not stocks:
+            del self.screens[screen_no]
+        return screen_no
+
+    def assign(self, stock_codes: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        여러 종목 배정
+
+        Returns:
+            Dict[str, List[str]]: 화면번호 -> 이번에 배정된 종목 (화면번호 순)
+        """
+        assigned: Dict[str, List[str]] = {}
+        for stock_code in stock_codes:
+            if stock_code in self.stock_screen:
+                continue
+            assigned.setdefault(self.add(stock_code), []).append(stock_code)
+        return dict(sorted(assigned.items()))
+
+    def screen_of(self, stock_code: str) -> Optional[str]:
+        """종목의 화면번호"""
+        return self.stock_screen.get(stock_code)
+
+    def group_by_screen(self, stock_codes: Iterable[str]) -> Dict[str, List[str]]:
+        """배정된 종목을 화면별로 묶음 (미배정 종목 제외)"""
+        groups: Dict[str, List[str]] = {}
+        for stock_code in stock_codes:
+            screen_no = self.stock_screen.get(stock_code)
+            if screen_no:
+                groups.setdefault(screen_no, []).append(stock_code)
+        return dict(sorted(groups.items()))
+
+    def clear(self) -> List[str]:
+        """전체 해제 → 사용 중이던 화면번호 목록"""
+        screen_nos = sorted(self.screens)
+        self.screens.clear()
+        self.stock_screen.clear()
+        return screen_nos
+
+    def get_statistics(self) -> Dict:
+        """풀 사용 현황"""
+        return {
+            'base': self._screen_no(0),
+            'stocks': len(self.stock_screen),
+            'screens': len(self.screens),
+            'capacity': self.capacity * self.max_screens,
+            'fill': {screen_no: len(stocks) for screen_no, stocks in sorted(self.screens.items())}
+        }
@@ -0,0 +1,674 @@
+"""
+지표 행 로컬 배포 (pub/sub)
+계산된 지표 행을 CSV 저장과 별도로 같은 PC의 전략 프로세스에 전달 - CSV 꼬리 읽기(디스크 지연/파싱) 대체
+- 공유메모리: 종목별 seqlock 링 버퍼 (쓰기 1 프로세스, 읽기 N 프로세스, 빠른 경로에 시스템 호출 없음)
+- TCP 폴백: 127.0.0.1 JSON 줄 스트림, 타이머마다 묶어서 전송 (공유메모리를 못 쓰는 소비자용)
+- 최신 상태 테이블: 종목당 고정 슬롯 1개를 제자리 갱신 (스트림 대신 "지금 전 종목 상태" 조회용)
+구독 측은 이 모듈의 ShmSubscriber / SocketSubscriber / ShmStateReader만 사용 (PyQt5 불필요)
+"""
+
+import os
+import json
+import time
+import socket
+import struct
+import logging
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import DataConfig
+
+# 링 형식 (little-endian)
+#   헤더: 매직, 버전, 예약, 슬롯 수, 슬롯 크기, 누적 기록 행 수(write_count) + 스키마("컬럼:형식" 쉼표 구분)
+#   슬롯: seq(uint64) + 행 값 - 행 n 기록 중 seq = 2n+1, 기록 완료 seq = 2n+2
+#   읽기: seq 확인 → 값 복사 → seq 재확인, 두 값이 같고 짝수여야 유효 (다르면 쓰는 중/덮어씀)
+RING_MAGIC = b'SHB1'
+RING_VERSION = 1
+HEADER_STRUCT = struct.Struct('<4sHHIIQ')
+WRITE_COUNT_OFFSET = 16
+SCHEMA_LEN_STRUCT = struct.Struct('<I')
+SCHEMA_OFFSET = 32
+HEADER_SIZE = 4096
+SEQ_STRUCT = struct.Struct('<Q')
+READ_SPIN_LIMIT = 10000  # 쓰는 중인 슬롯 재확인 최대 횟수 (쓰기 도중 수집 프로세스가 죽은 경우 대비)
+READ_SPIN_YIELD = 64     # 이 횟수 이후로는 재확인마다 CPU 양보 (쓰기 도중 선점된 수집 프로세스가 마저 쓰도록)
+
+# 최신 상태 테이블 형식 (링과 같은 헤더, 매직만 다름 - 헤더 write_count 자리는 사용 중인 슬롯 상한)
+#   슬롯: seq(uint64) + 종목코드(16바이트) + 갱신 시각(ns) + 값 (호가 컬럼을 앞에 모아 호가 갱신은 한 번에 기록)
+#   슬롯 seq: 기록 중 홀수, 완료 짝수, 0이면 한 번도 안 쓴 슬롯 / 종목코드가 비면 해제된 슬롯
+TABLE_MAGIC = b'SHT1'
+TABLE_SLOT_HEAD_STRUCT = struct.Struct('<16sq')
+TABLE_BOOK_COLUMNS = tuple(
+    [column for i in range(1, 6) for column in (f'ask{i}', f'ask{i}_qty', f'bid{i}', f'bid{i}_qty')])
+
+def _backoff(attempt: int):
+    if attempt >= READ_SPIN_YIELD:
+        time.sleep(0)
+
+def segment_name(stock_code: str, prefix: str = None) -> str:
+    """종목 공유메모리 이름"""
+    return f"{prefix or DataConfig.SHM_BUS_PREFIX}_{stock_code}"
+
+def row_schema(columns: Iterable[str], integer_columns: Iterable[str]) -> List[Tuple[str, str]]:
+    """행 스키마 [(컬럼, struct 형식)] - 정수 컬럼/수량은 int64, 나머지 float64 (종목코드는 세그먼트 이름에)"""
+    integer_columns = set(integer_columns)
+    return [
+        (column, 'q' if column in integer_columns or 'qty' in column or column == 'volume' else 'd')
+        for column in columns if column != 'stock_code'
+    ]
+
+def _row_struct(schema: List[Tuple[str, str]]) -> struct.Struct:
+    return struct.Struct('<' + ''.join(typecode for _, typecode in schema))
+
+def _converters(schema: List[Tuple[str, str]]) -> List[Tuple[str, type]]:
+    """행 값 변환 [(컬럼, int/float)] - struct 'q'는 float를 받지 않음"""
+    return [(column, int if typecode == 'q' else float) for column, typecode in schema]
+
+def _slot_size(row_struct: struct.Struct) -> int:
+    """seq + 행 값 (8바이트 정렬)"""
+    size = SEQ_STRUCT.size + row_struct.size
+    return (size + 7) // 8 * 8
+
+def _schema_bytes(schema: List[Tuple[str, str]]) -> bytes:
+    data = ','.join(f"{column}:{typecode}" for column, typecode in schema).encode('ascii')
+    if SCHEMA_OFFSET + SCHEMA_LEN_STRUCT.size + len(data) > HEADER_SIZE:
+        raise ValueError(f"스키마가 헤더보다 큼: {len(data)}바이트")
+    return data
+
+def _create_segment(name: str, size: int, magic: bytes, capacity: int, slot_size: int,
+                    schema_bytes: bytes) -> shared_memory.SharedMemory:
+    """세그먼트 생성 + 헤더 기록 (이전 실행이 남긴 같은 이름 세그먼트는 크기가 맞으면 열어서 초기화 후 재사용)"""
+    try:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        # Windows는 unlink가 무동작 → 이전 실행의 구독자가 매핑을 잡고 있으면 같은 이름으로 다시 만들 수 없음
+        shm = shared_memory.SharedMemory(name=name)
+        if shm.size < size:
+            shm.close()
+            if os.name != 'posix':
+                raise RuntimeError(f"이전 실행의 공유메모리가 더 작고 사용 중 (구독 프로세스 종료 필요): {name}")
+            shm.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            # 매직부터 지워 새로 붙는 구독자가 초기화 중인 헤더를 읽지 않게 한 뒤 슬롯 seq까지 0으로
+            # (기존 구독자는 write_count가 0부터 다시 시작하므로 재연결 필요)
+            shm.buf[:4] = b'\0' * 4
+            shm.buf[4:size] = bytes(size - 4)
+
+    buf = shm.buf
+    SCHEMA_LEN_STRUCT.pack_into(buf, SCHEMA_OFFSET, len(schema_bytes))
+    start = SCHEMA_OFFSET + SCHEMA_LEN_STRUCT.size
+    buf[start:start + len(schema_bytes)] = schema_bytes
+    # 매직은 스키마 기록 후 마지막에 (구독자는 매직이 보여야 스키마를 읽음)
+    HEADER_STRUCT.pack_into(buf, 0, magic, RING_VERSION, 0, capacity, slot_size, 0)
+    return shm
+
+def _open_segment(name: str, magic: bytes) -> Tuple[shared_memory.SharedMemory, int, int, List[Tuple[str, str]]]:
+    """읽기용 세그먼트 열기 → (공유메모리, 슬롯 수, 슬롯 크기, 스키마)"""
+    shm = shared_memory.SharedMemory(name=name)
+    _untrack(shm)
+
+    buf = shm.buf
+    found, version, _, capacity, slot_size, _ = HEADER_STRUCT.unpack_from(buf, 0)
+    if found != magic or version != RING_VERSION:
+        shm.close()
+        raise ValueError(f"공유메모리 형식 불일치: {name}")
+
+    (schema_len,) = SCHEMA_LEN_STRUCT.unpack_from(buf, SCHEMA_OFFSET)
+    start = SCHEMA_OFFSET + SCHEMA_LEN_STRUCT.size
+    schema_text = bytes(buf[start:start + schema_len]).decode('ascii')
+    schema = [tuple(item.split(':')) for item in schema_text.split(',')]
+    return shm, capacity, slot_size, schema
+
+def _untrack(shm: shared_memory.SharedMemory):
+    """읽기 프로세스 종료시 resource_tracker가 세그먼트를 지우지 않도록 등록 해제 (POSIX)"""
+    if os.name != 'posix':
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+
+def _release(shm: shared_memory.SharedMemory, logger: logging.Logger):
+    """쓰기 측 세그먼트 해제"""
+    try:
+        shm.close()
+        shm.unlink()
+    except Exception as e:
+        logger.error(f"공유메모리 해제 실패 ({shm.name}): {e}")
+
+class ShmRingPublisher:
+    """
+    종목별 공유메모리 seqlock 링 쓰기 (수집 프로세스 1개만 사용)
+    세그먼트는 첫 행 기록시 생성, 종목 제거/종료시 해제
+    """
+
+    def __init__(self, columns: Iterable[str], integer_columns: Iterable[str],
+                 capacity: int = None, prefix: str = None):
+        self.logger = logging.getLogger(__name__)
+        self.schema = row_schema(columns, integer_columns)
+        self.row_struct = _row_struct(self.schema)
+        self.converters = _converters(self.schema)
+        self.slot_size = _slot_size(self.row_struct)
+        self.capacity = capacity or DataConfig.SHM_BUS_CAPACITY
+        self.prefix = prefix or DataConfig.SHM_BUS_PREFIX
+
+        self.schema_bytes = _schema_bytes(self.schema)
+
+        # 종목 -> (공유메모리, 누적 기록 행 수), 생성 실패 종목 (재시도 안함)
+        self.rings: Dict[str, List] = {}
+        self.failed = set()
+
+        # 통계
+        self.publish_count = 0
+
+    def publish(self, stock_code: str, row: Dict):
+        """행 1개 기록 (O(1), 링이 차면 가장 오래된 행을 덮어씀)"""
+        ring = self.rings.get(stock_code)
+        if ring is None:
+            if stock_code in self.failed:
+                return
+            ring = self._create(stock_code)
+            if ring is None:
+                return
+
+        shm, count = ring
+        buf = shm.buf
+        offset = HEADER_SIZE + (count % self.capacity) * self.slot_size
+        values = [convert(row.get(column) or 0) for column, convert in self.converters]
+
+        SEQ_STRUCT.pack_into(buf, offset, 2 * count + 1)
+        self.row_struct.pack_into(buf, offset + SEQ_STRUCT.size, *values)
+        SEQ_STRUCT.pack_into(buf, offset, 2 * count + 2)
+        ring[1] = count + 1
+        SEQ_STRUCT.pack_into(buf, WRITE_COUNT_OFFSET, count + 1)
+        self.publish_count += 1
+
+    def _create(self, stock_code: str) -> Optional[List]:
+        name = segment_name(stock_code, self.prefix)
+        size = HEADER_SIZE + self.capacity * self.slot_size
+        try:
+            shm = _create_segment(name, size, RING_MAGIC, self.capacity, self.slot_size, self.schema_bytes)
+            ring = self.rings[stock_code] = [shm, 0]
+            self.logger.info(f"📡 지표 공유메모리 링 생성: {name} ({self.capacity}행, {size / 1024:.0f}KB)")
+            return ring
+
+        except Exception as e:
+            self.failed.add(stock_code)
+            self.logger.error(f"지표 공유메모리 링 생성 실패 ({name}): {e}")
+            return None
+
+    def remove_stock(self, stock_code: str):
+        """종목 링 해제"""
+        ring = self.rings.pop(stock_code, None)
+        self.failed.discard(stock_code)
+        if ring:
+            _release(ring[0], self.logger)
+
+    def close(self):
+        for ring in self.rings.values():
+            _release(ring[0], self.logger)
+        self.rings.clear()
+
+    def get_statistics(self) -> Dict:
+        return {
+            'rings': len(self.rings),
+            'published': self.publish_count,
+            'row_bytes': self.slot_size,
+            'capacity': self.capacity
+        }
+
+class ShmSubscriber:
+    """
+    종목 링 읽기 (전략 프로세스용, 잠금/시스템 호출 없음)
+    수집 프로세스가 재시작되면 링이 새로 만들어지므로 다시 생성해야 함
+    (Windows 등에서 같은 세그먼트를 재사용해 초기화한 경우 write_count가 커서보다 작아지면 처음부터 다시 읽음)
+
+    Raises:
+        FileNotFoundError: 수집 프로세스가 아직 해당 종목 링을 만들지 않음
+    """
+
+    def __init__(self, stock_code: str, prefix: str = None, from_oldest: bool = False):
+        self.stock_code = stock_code
+        self.shm, self.capacity, self.slot_size, self.schema = _open_segment(
+            segment_name(stock_code, prefix), RING_MAGIC)
+        self.columns = [column for column, _ in self.schema]
+        self.row_struct = _row_struct(self.schema)
+
+        # 다음에 읽을 행 번호 (기본: 지금부터 새로 기록되는 행)
+        write_count = self.write_count()
+        self.cursor = max(0, write_count - self.capacity) if from_oldest else write_count
+
+        # 통계 (링 한 바퀴 이상 뒤처져 건너뛴 행, 쓰는 중이라 재시도한 횟수)
+        self.dropped = 0
+        self.retries = 0
+
+    def write_count(self) -> int:
+        """발행된 누적 행 수"""
+        return SEQ_STRUCT.unpack_from(self.shm.buf, WRITE_COUNT_OFFSET)[0]
+
+    def _read(self, index: int) -> Optional[Tuple]:
+        """행 index 읽기 → 값 튜플 (덮어써졌으면 None)"""
+        buf = self.shm.buf
+        offset = HEADER_SIZE + (index % self.capacity) * self.slot_size
+        expected = 2 * index + 2
+        for attempt in range(READ_SPIN_LIMIT):
+            (seq,) = SEQ_STRUCT.unpack_from(buf, offset)
+            if seq == expected:
+                values = self.row_struct.unpack_from(buf, offset + SEQ_STRUCT.size)
+                if SEQ_STRUCT.unpack_from(buf, offset)[0] == seq:
+                    return values
+            elif seq != expected - 1:
+                return None  # 다음 바퀴 행으로 덮어씀
+            self.retries += 1  # 쓰는 중 - 수 마이크로초 내 완료
+            _backoff(attempt)
+        return None
+
+    def _to_row(self, values: Tuple) -> Dict:
+        row = dict(zip(self.columns, values))
+        row['stock_code'] = self.stock_code
+        return row
+
+    def latest(self) -> Optional[Dict]:
+        """가장 최근 행 (없으면 None, 커서는 그대로)"""
+        count = self.write_count()
+        while count:
+            values = self._read(count - 1)
+            if values is not None:
+                return self._to_row(values)
+            count = self.write_count()
+        return None
+
+    def read_new(self, max_rows: int = None) -> List[Dict]:
+        """커서 이후 새 행 (오래된 것부터) - 링 한 바퀴 이상 뒤처지면 남아 있는 가장 오래된 행부터"""
+        count = self.write_count()
+        if count < self.cursor:
+            self.cursor = 0  # 수집 프로세스가 재시작하며 세그먼트를 초기화
+        rows = []
+        while self.cursor < count and (max_rows is None or len(rows) < max_rows):
+            oldest = count - self.capacity
+            if self.cursor < oldest:
+                self.dropped += oldest - self.cursor
+                self.cursor = oldest
+            values = self._read(self.cursor)
+            if values is None:
+                count = self.write_count()  # 읽는 동안 덮어씀 - 최신 위치로 다시 계산
+                continue
+            rows.append(self._to_row(values))
+            self.cursor += 1
+        return rows
+
+    def close(self):
+        self.shm.close()
+
+class ShmStateTable:
+    """
+    종목별 최신 상태 공유메모리 테이블 쓰기 (수집 프로세스 1개만 사용, DataProcessor가 갱신)
+    - 종목마다 고정 슬롯 1개를 제자리 갱신 (체결: 지표 행 전체, 호가 이벤트: 호가 컬럼만)
+    - 슬롯마다 seq 버전 카운터 - 읽기는 잠금 없이 ShmStateReader.snapshot()으로 전 종목 일괄 복사
+    """
+
+    def __init__(self, columns: Iterable[str], integer_columns: Iterable[str],
+                 capacity: int = None, name: str = None):
+        self.logger = logging.getLogger(__name__)
+        schema = row_schema(columns, integer_columns)
+        book = [item for item in schema if item[0] in TABLE_BOOK_COLUMNS]
+        self.schema = book + [item for item in schema if item[0] not in TABLE_BOOK_COLUMNS]
+        self.book_columns = [column for column, _ in book]
+        self.converters = _converters(self.schema)
+
+        self.row_struct = struct.Struct(
+            '<' + TABLE_SLOT_HEAD_STRUCT.format[1:] + ''.join(typecode for _, typecode in self.schema))
+        self.book_struct = struct.Struct('<q' + ''.join(typecode for _, typecode in book))
+        self.book_offset = SEQ_STRUCT.size + TABLE_SLOT_HEAD_STRUCT.size - 8  # 갱신 시각부터
+        self.slot_size = _slot_size(self.row_struct)
+        self.capacity = capacity or DataConfig.STATE_TABLE_CAPACITY
+        self.name = name or DataConfig.STATE_TABLE_NAME
+
+        size = HEADER_SIZE + self.capacity * self.slot_size
+        self.shm = _create_segment(self.name, size, TABLE_MAGIC, self.capacity, self.slot_size,
+                                   _schema_bytes(self.schema))
+
+        # 종목 -> 슬롯, 슬롯별 seq, 빈 슬롯 (낮은 번호부터 재사용), 슬롯 부족 종목
+        self.slots: Dict[str, int] = {}
+        self.seqs: List[int] = [0] * self.capacity
+        self.free_slots: List[int] = []
+        self.used_slots = 0
+        self.overflow = set()
+
+        # 통계
+        self.update_count = 0
+        self.book_update_count = 0
+
+        self.logger.info(f"📋 최신 상태 공유메모리 테이블: {self.name} ({self.capacity}종목, {size / 1024:.0f}KB)")
+
+    def _slot(self, stock_code: str) -> Optional[int]:
+        slot = self.slots.get(stock_code)
+        if slot is not None:
+            return slot
+        if stock_code in self.overflow:
+            return None
+
+        if self.free_slots:
+            slot = min(self.free_slots)
+            self.free_slots.remove(slot)
+        elif self.used_slots < self.capacity:
+            slot = self.used_slots
+            self.used_slots += 1
+            SEQ_STRUCT.pack_into(self.shm.buf, WRITE_COUNT_OFFSET, self.used_slots)
+        else:
+            self.overflow.add(stock_code)
+            self.logger.error(f"최신 상태 테이블 슬롯 부족 ({self.capacity}종목): {stock_code} 제외")
+            return None
+
+        self.slots[stock_code] = slot
+        return slot
+
+    def update(self, stock_code: str, row: Dict):
+        """지표 행으로 슬롯 전체 갱신 (체결마다, O(1))"""
+        slot = self._slot(stock_code)
+        if slot is None:
+            return
+
+        values = [stock_code.encode('ascii'), time.time_ns()]
+        values.extend([convert(row.get(column) or 0) for column, convert in self.converters])
+
+        buf = self.shm.buf
+        offset = HEADER_SIZE + slot * self.slot_size
+        seq = self.seqs[slot]
+        SEQ_STRUCT.pack_into(buf, offset, seq + 1)
+        self.row_struct.pack_into(buf, offset + SEQ_STRUCT.size, *values)
+        SEQ_STRUCT.pack_into(buf, offset, seq + 2)
+        self.seqs[slot] = seq + 2
+        self.update_count += 1
+
+    def update_book(self, stock_code: str, book: Dict):
+        """호가 이벤트로 호가 컬럼만 갱신 (체결 전이라도 최신 호가 조회 가능, 아직 행이 없는 종목은 무시)"""
+        slot = self.slots.get(stock_code)
+        if slot is None:
+            return
+
+        values = [time.time_ns()]
+        values.extend(int(book.get(column) or 0) for column in self.book_columns)
+
+        buf = self.shm.buf
+        offset = HEADER_SIZE + slot * self.slot_size
+        seq = self.seqs[slot]
+        SEQ_STRUCT.pack_into(buf, offset, seq + 1)
+        self.book_struct.pack_into(buf, offset + self.book_offset, *values)
+        SEQ_STRUCT.pack_into(buf, offset, seq + 2)
+        self.seqs[slot] = seq + 2
+        self.book_update_count += 1
+
+    def remove_stock(self, stock_code: str):
+        """종목 슬롯 해제 (종목코드를 비워 읽기 측에서 제외)"""
+        self.overflow.discard(stock_code)
+        slot = self.slots.pop(stock_code, None)
+        if slot is None:
+            return
+
+        buf = self.shm.buf
+        offset = HEADER_SIZE + slot * self.slot_size
+        seq = self.seqs[slot]
+        SEQ_STRUCT.pack_into(buf, offset, seq + 1)
+        TABLE_SLOT_HEAD_STRUCT.pack_into(buf, offset + SEQ_STRUCT.size, b'', time.time_ns())
+        SEQ_STRUCT.pack_into(buf, offset, seq + 2)
+        self.seqs[slot] = seq + 2
+        self.free_slots.append(slot)
+
+    def close(self):
+        _release(self.shm, self.logger)
+
+    def get_statistics(self) -> Dict:
+        return {
+            'stocks': len(self.slots),
+            'capacity': self.capacity,
+            'updates': self.update_count,
+            'book_updates': self.book_update_count,
+            'overflow': len(self.overflow)
+        }
+
+class ShmStateReader:
+    """
+    최신 상태 테이블 읽기 (위험관리/UI 프로세스용, 잠금/시스템 호출 없음 - 수집 프로세스를 막지 않음)
+    snapshot(): 사용 중인 슬롯 영역을 한 번에 복사하고 복사 전후 seq가 같은 슬롯만 채택
+    (그 사이 갱신된 슬롯만 개별 재시도) → 종목마다 찢어지지 않은 행, 한 번의 순회로 전 종목
+
+    Raises:
+        FileNotFoundError: 수집 프로세스가 실행 중이 아님
+    """
+
+    def __init__(self, name: str = None):
+        self.shm, self.capacity, self.slot_size, self.schema = _open_segment(
+            name or DataConfig.STATE_TABLE_NAME, TABLE_MAGIC)
+        self.columns = [column for column, _ in self.schema]
+        self.row_struct = struct.Struct(
+            '<' + TABLE_SLOT_HEAD_STRUCT.format[1:] + ''.join(typecode for _, typecode in self.schema))
+
+        # 통계 (복사 중 갱신되어 개별 재시도한 슬롯, 재시도도 실패해 제외한 슬롯)
+        self.retries = 0
+        self.skipped = 0
+
+    def _used_slots(self) -> int:
+        return min(SEQ_STRUCT.unpack_from(self.shm.buf, WRITE_COUNT_OFFSET)[0], self.capacity)
+
+    def _seqs(self, used: int) -> List[int]:
+        buf = self.shm.buf
+        return [SEQ_STRUCT.unpack_from(buf, HEADER_SIZE + slot * self.slot_size)[0] for slot in range(used)]
+
+    def _read_slot(self, slot: int) -> Optional[Tuple[int, Tuple]]:
+        """슬롯 1개 seqlock 읽기 → (seq, 값) (쓰기가 끝나지 않으면 None)"""
+        buf = self.shm.buf
+        offset = HEADER_SIZE + slot * self.slot_size
+        for attempt in range(READ_SPIN_LIMIT):
+            (seq,) = SEQ_STRUCT.unpack_from(buf, offset)
+            if not seq & 1:
+                values = self.row_struct.unpack_from(buf, offset + SEQ_STRUCT.size)
+                if SEQ_STRUCT.unpack_from(buf, offset)[0] == seq:
+                    return seq, values
+            _backoff(attempt)
+        return None
+
+    def _to_row(self, seq: int, values: Tuple) -> Optional[Dict]:
+        code = values[0].rstrip(b'\0').decode('ascii')
+        if not code:
+            return None
+        row = dict(zip(self.columns, values[2:]))
+        row['stock_code'] = code
+        row['version'] = seq // 2
+        row['updated_ns'] = values[1]
+        return row
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """전 종목 최신 상태 {종목: 행} (행에 version(슬롯 갱신 횟수), updated_ns 포함)"""
+        used = self._used_slots()
+        before = self._seqs(used)
+        data = bytes(self.shm.buf[HEADER_SIZE:HEADER_SIZE + used * self.slot_size])
+        after = self._seqs(used)
+
+        rows = {}
+        for slot in range(used):
+            seq = before[slot]
+            if seq == 0:
+                continue
+            if seq == after[slot] and not seq & 1:
+                values = self.row_struct.unpack_from(data, slot * self.slot_size + SEQ_STRUCT.size)
+            else:
+                self.retries += 1
+                result = self._read_slot(slot)
+                if result is None:
+                    self.skipped += 1
+                    continue
+                seq, values = result
+            row = self._to_row(seq, values)
+            if row is not None:
+                rows[row['stock_code']] = row
+        return rows
+
+    def get(self, stock_code: str) -> Optional[Dict]:
+        """한 종목 최신 상태 (없으면 None)"""
+        encoded = stock_code.encode('ascii')
+        for slot in range(self._used_slots()):
+            result = self._read_slot(slot)
+            if result is not None and result[1][0].rstrip(b'\0') == encoded:
+                return self._to_row(*result)
+        return None
+
+    def close(self):
+        self.shm.close()
+
+class SocketFanout:
+    """
+    TCP 폴백 배포 (127.0.0.1, Qt 이벤트 루프 - 별도 스레드 없음)
+    행은 JSON 한 줄로 모아 두었다가 flush 타이머마다 전 연결에 일괄 전송
+    전송 대기량이 한도를 넘는 느린 소비자는 연결 종료 (수집 지연 방지)
+    """
+
+    def __init__(self, port: int = None, max_backlog: int = None):
+        self.logger = logging.getLogger(__name__)
+        self.port = DataConfig.BUS_SOCKET_PORT if port is None else port
+        self.max_backlog = max_backlog or DataConfig.BUS_SOCKET_MAX_BACKLOG
+
+        self.server = None
+        self.clients = []
+        self.pending: List[bytes] = []
+
+        # 통계
+        self.sent_rows = 0
+        self.dropped_clients = 0
+
+    def start(self) -> bool:
+        from PyQt5.QtNetwork import QHostAddress, QTcpServer
+
+        self.server = QTcpServer()
+        self.server.newConnection.connect(self._on_new_connection)
+        if not self.server.listen(QHostAddress(QHostAddress.LocalHost), self.port):
+            self.logger.error(f"지표 배포 소켓 시작 실패 (포트 {self.port}): {self.server.errorString()}")
+            self.server = None
+            return False
+
+        self.logger.info(f"📡 지표 배포 소켓: 127.0.0.1:{self.port} (JSON 줄)")
+        return True
+
+    def _on_new_connection(self):
+        while self.server and self.server.hasPendingConnections():
+            client = self.server.nextPendingConnection()
+            self.clients.append(client)
+            client.disconnected.connect(lambda c=client: self._drop(c))
+
+    def _drop(self, client):
+        if client in self.clients:
+            self.clients.remove(client)
+            client.deleteLater()
+
+    def publish(self, stock_code: str, row: Dict):
+        """행 보관 (연결이 없으면 버림)"""
+        if self.clients:
+            self.pending.append(json.dumps(row, separators=(',', ':')).encode('utf-8'))
+
+    def flush(self):
+        """보관 행 일괄 전송"""
+        if not self.pending:
+            return
+        data = b'\n'.join(self.pending) + b'\n'
+        rows = len(self.pending)
+        self.pending = []
+
+        for client in list(self.clients):
+            if client.bytesToWrite() > self.max_backlog:
+                self.dropped_clients += 1
+                self.logger.warning(f"지표 배포 소켓: 느린 소비자 연결 종료 (대기 {client.bytesToWrite():,}바이트)")
+                client.abort()
+                self._drop(client)
+                continue
+            client.write(data)
+        self.sent_rows += rows
+
+    def close(self):
+        for client in list(self.clients):
+            client.abort()
+            self._drop(client)
+        if self.server:
+            self.server.close()
+            self.server = None
+
+class SocketSubscriber:
+    """TCP 폴백 구독 (전략 프로세스용, 표준 socket만 사용)"""
+
+    def __init__(self, port: int = None, host: str = '127.0.0.1', stock_codes: Iterable[str] = None):
+        self.sock = socket.create_connection((host, DataConfig.BUS_SOCKET_PORT if port is None else port))
+        self.stock_codes = set(stock_codes) if stock_codes else None
+
+    def rows(self) -> Iterator[Dict]:
+        """행 스트림 (연결 종료시 끝, stock_codes 지정시 해당 종목만)"""
+        buffer = b''
+        while True:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                return
+            *lines, buffer = (buffer + chunk).split(b'\n')
+            for line in lines:
+                row = json.loads(line)
+                if self.stock_codes is None or row.get('stock_code') in self.stock_codes:
+                    yield row
+
+    def close(self):
+        self.sock.close()
+
+class IndicatorBus:
+    """
+    지표 행 배포 (공유메모리 링 + TCP 폴백) - KiwoomDataCollector.on_indicators_calculated에서 호출
+    """
+
+    def __init__(self, columns: Iterable[str], integer_columns: Iterable[str]):
+        self.logger = logging.getLogger(__name__)
+
+        self.shm: Optional[ShmRingPublisher] = None
+        if DataConfig.SHM_BUS_ENABLED:
+            try:
+                self.shm = ShmRingPublisher(list(columns), integer_columns)
+            except Exception as e:
+                self.logger.error(f"지표 공유메모리 배포 초기화 실패: {e}")
+
+        self.fanout: Optional[SocketFanout] = None
+        self.flush_timer = None
+
+    def start(self):
+        """TCP 폴백 시작 (포트 설정시) + 일괄 전송 타이머"""
+        if not DataConfig.BUS_SOCKET_PORT:
+            return
+        from PyQt5.QtCore import QTimer
+
+        fanout = SocketFanout()
+        if fanout.start():
+            self.fanout = fanout
+            self.flush_timer = QTimer()
+            self.flush_timer.timeout.connect(self.fanout.flush)
+            self.flush_timer.start(DataConfig.BUS_SOCKET_FLUSH_MS)
+
+    def publish(self, stock_code: str, row: Dict):
+        if self.shm:
+            self.shm.publish(stock_code, row)
+        if self.fanout:
+            self.fanout.publish(stock_code, row)
+
+    def remove_stock(self, stock_code: str):
+        if self.shm:
+            self.shm.remove_stock(stock_code)
+
+    def close(self):
+        if self.flush_timer:
+            self.flush_timer.stop()
+        if self.fanout:
+            self.fanout.flush()
+            self.fanout.close()
+        if self.shm:
+            self.shm.close()
+
+    def get_statistics(self) -> Dict:
+        return {
+            'shm': self.shm.get_statistics() if self.shm else None,
+            'socket_clients': len(self.fanout.clients) if self.fanout else 0,
+            'socket_rows': self.fanout.sent_rows if self.fanout else 0
+        }
@@ -0,0 +1,226 @@
+"""
+합성 시장 데이터 생성기
+pure_websocket_data/ 샘플 CSV에서 종목별 경험 분포(틱 간격, 체결량, 가격 변화, 호가 잔량)를 추출하고
+부트스트랩 재표본으로 체결/호가 이벤트 생성 - KiwoomClient.on_receive_real_data 출력과 같은 형식
+PyQt5/OCX 불필요 (벤치마크, 모의 OCX 부하 테스트용)
+"""
+
+import os
+import csv
+import glob
+import heapq
+import random
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import DataConfig
+
+# 체결 사이 평균 호가 이벤트 수 (샘플 CSV에는 체결 틱만 있어 보정 불가 - 고정값)
+BOOK_EVENTS_PER_TRADE = 4.0
+
+# 샘플이 없을 때 기본 분포
+DEFAULT_GAPS_MS = [0, 1, 2, 5, 20, 80, 200, 400, 800, 1500, 3000]
+DEFAULT_TRADE_SIZES = [1, 1, 2, 5, 10, 20, 50, 100, 300]
+DEFAULT_PRICE_MOVES = [-2, -1, -1, 0, 0, 0, 0, 0, 1, 1, 2]
+DEFAULT_LEVEL_QTYS = [10, 50, 100, 200, 500, 1000, 3000]
+
+class MarketProfile:
+    """종목별 시장 특성 (경험 분포 - 재표본 대상 값 목록)"""
+
+    def __init__(self, stock_code: str, start_price: float, tick: float,
+                 gaps_ms: List[int], trade_sizes: List[int], price_moves: List[int],
+                 spread_ticks: List[int], level_qtys: List[int]):
+        self.stock_code = stock_code
+        self.start_price = start_price
+        self.tick = tick
+        self.gaps_ms = gaps_ms or DEFAULT_GAPS_MS
+        self.trade_sizes = trade_sizes or DEFAULT_TRADE_SIZES
+        self.price_moves = price_moves or DEFAULT_PRICE_MOVES
+        self.spread_ticks = spread_ticks or [1]
+        self.level_qtys = level_qtys or DEFAULT_LEVEL_QTYS
+
+    @classmethod
+    def default(cls, stock_code: str, start_price: float = 50000, tick: float = 50) -> 'MarketProfile':
+        """샘플 없이 기본 분포로 생성"""
+        return cls(stock_code, start_price, tick, [], [], [], [], [])
+
+    @classmethod
+    def from_csv(cls, filepath: str) -> Optional['MarketProfile']:
+        """지표 CSV(time, current_price, volume, spread, 호가 잔량 컬럼)에서 분포 추출"""
+        try:
+            with open(filepath, 'r', newline='', encoding='utf-8-sig') as f:
+                rows = list(csv.DictReader(f))
+        except Exception as e:
+            logging.getLogger(__name__).error(f"샘플 CSV 읽기 실패: {filepath}, 오류: {e}")
+            return None
+
+        if len(rows) < 2:
+            return None
+
+        def column(name, cast=float):
+            values = []
+            for row in rows:
+                try:
+                    values.append(cast(float(row.get(name) or 0)))
+                except ValueError:
+                    values.append(cast(0))
+            return values
+
+        times = column('time', int)
+        prices = column('current_price')
+        volumes = column('volume', int)
+        spreads = column('spread')
+
+        # 호가단위 추정: 연속 가격 차이 중 최소 양수
+        diffs = [abs(b - a) for a, b in zip(prices, prices[1:]) if b != a]
+        tick = min(diffs) if diffs else 1.0
+
+        gaps_ms = [b - a for a, b in zip(times, times[1:]) if b >= a]
+        trade_sizes = [b - a for a, b in zip(volumes, volumes[1:]) if b > a]
+        price_moves = [int(round((b - a) / tick)) for a, b in zip(prices, prices[1:])]
+        spread_ticks = [max(1, int(round(s / tick))) for s in spreads if s > 0]
+        level_qtys = [
+            int(float(row.get(f'{side}{level}_qty') or 0))
+            for row in rows for side in ('ask', 'bid') for level in range(1, 6)
+        ]
+        level_qtys = [qty for qty in level_qtys if qty > 0]
+
+        stock_code = rows[0].get('stock_code') or os.path.basename(filepath).split('_')[0]
+        return cls(stock_code.zfill(6), prices[0], tick, gaps_ms, trade_sizes,
+                   price_moves, spread_ticks, level_qtys)
+
+def load_profiles(csv_dir: str = None) -> List[MarketProfile]:
+    """샘플 디렉토리의 *_realtime_*.csv 전체에서 종목별 특성 추출"""
+    csv_dir = csv_dir or DataConfig.CSV_DIR
+    profiles = []
+    for filepath in sorted(glob.glob(os.path.join(csv_dir, '*_realtime_*.csv'))):
+        profile = MarketProfile.from_csv(filepath)
+        if profile:
+            profiles.append(profile)
+    return profiles
+
+class _StockState:
+    """종목별 생성 상태"""
+
+    def __init__(self, profile: MarketProfile):
+        self.profile = profile
+        self.price = profile.start_price
+        self.volume = 0
+        self.spread = profile.spread_ticks[0]
+
+class SyntheticMarket:
+    """
+    합성 체결/호가 이벤트 스트림
+    - 종목별 다음 체결 시각을 힙으로 병합 → 전 종목 시간순 이벤트
+    - 체결 간격은 샘플 간격 재표본 (0~수ms 몰림 구간 포함) / speed
+    - 체결 사이에 평균 BOOK_EVENTS_PER_TRADE개의 호가 이벤트
+    """
+
+    def __init__(self, profiles: List[MarketProfile], seed: int = 0, speed: float = 1.0,
+                 book_events_per_trade: float = BOOK_EVENTS_PER_TRADE, start_time_ms: int = None):
+        if not profiles:
+            raise ValueError("MarketProfile이 최소 1개 필요합니다")
+
+        self.rng = random.Random(seed)
+        self.speed = speed
+        self.book_events_per_trade = book_events_per_trade
+        self.start_time_ms = start_time_ms or int(datetime.now().replace(
+            hour=9, minute=0, second=0, microsecond=0).timestamp() * 1000)
+
+        self.states = {profile.stock_code: _StockState(profile) for profile in profiles}
+        self.stock_codes = list(self.states.keys())
+
+    def _next_gap(self, state: _StockState) -> float:
+        return self.rng.choice(state.profile.gaps_ms) / self.speed
+
+    def _book_event(self, state: _StockState, time_ms: int) -> Dict:
+        profile = state.profile
+        tick = profile.tick
+        if self.rng.random() < 0.2:
+            state.spread = self.rng.choice(profile.spread_ticks)
+
+        bid1 = state.price - tick * self.rng.randint(0, 1)
+        ask1 = bid1 + tick * state.spread
+        data = {'time': time_ms, 'recv_time_ns': time_ms * 1_000_000, 'stock_code': profile.stock_code}
+        for level in range(1, 6):
+            data[f'ask{level}'] = int(ask1 + tick * (level - 1))
+            data[f'bid{level}'] = int(max(tick, bid1 - tick * (level - 1)))
+            data[f'ask{level}_qty'] = self.rng.choice(profile.level_qtys)
+            data[f'bid{level}_qty'] = self.rng.choice(profile.level_qtys)
+        return data
+
+    def _trade_event(self, state: _StockState, time_ms: int) -> Dict:
+        profile = state.profile
+        state.price = max(profile.tick, state.price + self.rng.choice(profile.price_moves) * profile.tick)
+        size = self.rng.choice(profile.trade_sizes)
+        state.volume += size
+
+        trade_time = datetime.fromtimestamp(time_ms / 1000).strftime('%H%M%S')
+        return {
+            'time': time_ms,
+            'recv_time_ns': time_ms * 1_000_000,
+            'stock_code': profile.stock_code,
+            'current_price': int(state.price),
+            'volume': state.volume,
+            'trade_volume': size,
+            'trade_time': trade_time,
+            'exchange_time_ms': time_ms - time_ms % 1000,
+        }
+
+    def events(self, n_trades: int) -> Iterator[Tuple[str, str, Dict]]:
+        """
+        체결 n_trades건(전 종목 합계)과 그 사이 호가 이벤트를 시간순 생성
+
+        Yields:
+            (stock_code, real_type, tick_data) - real_type: "주식체결" / "주식호가잔량"
+        """
+        # 힙: (시각ms, 순번, 종목코드, 체결여부)
+        heap = []
+        seq = 0
+        for stock_code in self.stock_codes:
+            state = self.states[stock_code]
+            heapq.heappush(heap, (self.start_time_ms + self._next_gap(state), seq, stock_code, True))
+            seq += 1
+
+        # 체결 사이 호가 이벤트 수: 평균 book_events_per_trade인 기하분포
+        continue_p = self.book_events_per_trade / (1.0 + self.book_events_per_trade)
+
+        trades = 0
+        while trades < n_trades:
+            due_ms, _, stock_code, is_trade = heapq.heappop(heap)
+            state = self.states[stock_code]
+
+            if not is_trade:
+                yield stock_code, "주식호가잔량", self._book_event(state, int(due_ms))
+                continue
+
+            yield stock_code, "주식체결", self._trade_event(state, int(due_ms))
+            trades += 1
+
+            # 다음 체결과, 그 사이 구간에 흩어진 호가 이벤트 예약
+            gap = self._next_gap(state)
+            heapq.heappush(heap, (due_ms + gap, seq, stock_code, True))
+            seq += 1
+            while self.rng.random() < continue_p:
+                heapq.heappush(heap, (due_ms + self.rng.random() * gap, seq, stock_code, False))
+                seq += 1
+
+    def generate(self, n_trades: int) -> List[Tuple[str, str, Dict]]:
+        """events()를 리스트로 (벤치마크 측정 전 미리 생성)"""
+        return list(self.events(n_trades))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    profiles = load_profiles() or [MarketProfile.default("005930", 70000, 100)]
+    for profile in profiles:
+        print(f"{profile.stock_code}: 시작가 {profile.start_price:,.0f}, 호가단위 {profile.tick:g}, "
+              f"간격 샘플 {len(profile.gaps_ms)}개, 체결량 샘플 {len(profile.trade_sizes)}개")
+
+    market = SyntheticMarket(profiles, seed=1)
+    events = market.generate(1000)
+    trades = sum(1 for _, real_type, _ in events if real_type == "주식체결")
+    span_sec = (events[-1][2]['time'] - events[0][2]['time']) / 1000
+    print(f"이벤트 {len(events)}개 (체결 {trades}개), 시장시간 {span_sec:.1f}초")
@@ -11,9 +11,35 @@ import time
 import psutil
 import logging
 import threading
+from collections import Counter
 from datetime import datetime
 from typing import Dict, List, Optional
-from PyQt5.QtCore import QTimer, QObject, pyqtSignal
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal
+
+from config import DataConfig
+from latency_monitor import LatencyHistogram
+
+# 프로젝트 소스 경로 (정지 원인을 프로젝트 코드 위치로 귀속)
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def collapse_stack(frame) -> str:
+    """프레임 → 접힌 스택 문자열 (바깥 → 안쪽, "파일:함수:줄" 세미콜론 구분 - flamegraph 입력 형식)"""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    parts.reverse()
+    return ';'.join(parts)
+
+def project_site(frame) -> Optional[str]:
+    """스택에서 가장 안쪽의 프로젝트 코드 위치 ("파일:함수:줄", 없으면 None)"""
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(PROJECT_DIR):
+            return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return None
 
 class SystemCrashDetector(QObject):
     """
@@ -126,6 +152,146 @@ class SystemCrashDetector(QObject):
         except Exception as e:
             self.logger.error(f"크래시 체크 오류: {e}")
 
+class EventLoopWatchdog(QObject):
+    """
+    Qt 이벤트 루프 정지 감지 (감시 스레드)
+    - 감시 스레드가 메인 스레드에 핑을 게시(queued signal) → 처리되기까지 걸린 시간 = 루프 지연
+    - 임계값 동안 처리되지 않으면 정지로 보고 메인 스레드 파이썬 스택을 주기적으로 샘플링
+    - 정지가 끝나면 원인 위치(가장 안쪽 프로젝트 코드) 경고 + 스택별 샘플 수 리포트 파일 저장
+    SystemCrashDetector 하트비트는 같은 스레드 QTimer라 루프가 멈춘 동안에는 감지하지 못함
+    """
+    ping = pyqtSignal(object)
+
+    def __init__(self, interval_ms: int = None, stall_ms: int = None, sample_ms: int = None,
+                 report_dir: str = None):
+        super().__init__()
+        self.logger = logging.getLogger('loop_watchdog')
+        self.interval = (interval_ms or DataConfig.LOOP_PING_INTERVAL_MS) / 1000
+        self.stall_threshold = (stall_ms or DataConfig.LOOP_STALL_MS) / 1000
+        self.sample_interval = (sample_ms or DataConfig.LOOP_STALL_SAMPLE_MS) / 1000
+        self.report_dir = report_dir or DataConfig.LOOP_STALL_DIR
+
+        # 감시 대상은 이 객체를 만든 스레드 (Qt 메인 스레드)
+        self.main_thread_id = threading.get_ident()
+        self.ping.connect(self._on_ping, Qt.QueuedConnection)
+
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.pong_event = threading.Event()
+        self.pong_lag_ms = 0.0
+
+        # 통계 (감시 스레드에서만 기록)
+        self.lag_histogram = LatencyHistogram(DataConfig.LOOP_LAG_BUCKETS_MS)
+        self.stall_histogram = LatencyHistogram(DataConfig.LOOP_LAG_BUCKETS_MS)
+        self.stall_count = 0
+        self.report_count = 0
+        self.last_stall: Optional[Dict] = None
+
+    def start(self):
+        """감시 스레드 시작"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='loop-watchdog', daemon=True)
+        self.thread.start()
+        self.logger.info(f"🐕 이벤트 루프 감시 시작 (핑 {self.interval * 1000:.0f}ms, "
+                         f"정지 임계값 {self.stall_threshold * 1000:.0f}ms)")
+
+    def stop(self):
+        """감시 스레드 중지"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def _on_ping(self, sent_ns: int):
+        """메인 스레드: 핑 처리 (게시 → 처리 지연)"""
+        self.pong_lag_ms = (time.perf_counter_ns() - sent_ns) / 1e6
+        self.pong_event.set()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.pong_event.clear()
+            self.ping.emit(time.perf_counter_ns())
+
+            if not self.pong_event.wait(self.stall_threshold):
+                result = self._sample_stall()
+                if result is None:
+                    break  # 정지 중 감시 종료
+                try:
+                    self._report_stall(*result)
+                except Exception as e:
+                    self.logger.error(f"이벤트 루프 정지 리포트 실패: {e}")
+
+            self.lag_histogram.record(self.pong_lag_ms)
+            self.stop_event.wait(self.interval)
+
+    def _sample_stall(self):
+        """핑이 처리될 때까지 메인 스레드 스택 샘플링 → (스택별 샘플 수, 원인 위치별 샘플 수, 샘플 수)"""
+        stacks: Counter = Counter()
+        sites: Counter = Counter()
+        samples = 0
+        while not self.pong_event.is_set():
+            if self.stop_event.is_set():
+                return None
+            if samples < DataConfig.LOOP_STALL_MAX_SAMPLES:
+                frame = sys._current_frames().get(self.main_thread_id)
+                if frame is not None:
+                    stacks[collapse_stack(frame)] += 1
+                    sites[project_site(frame) or '(프로젝트 외부)'] += 1
+                    samples += 1
+                del frame
+            self.pong_event.wait(self.sample_interval)
+        return stacks, sites, samples
+
+    def _report_stall(self, stacks: Counter, sites: Counter, samples: int):
+        """정지 종료 - 통계 기록, 경고 로그, 리포트 파일 (실행당 상한)"""
+        duration_ms = self.pong_lag_ms
+        self.stall_count += 1
+        self.stall_histogram.record(duration_ms)
+
+        site, site_samples = sites.most_common(1)[0] if sites else ('(샘플 없음)', 0)
+        self.last_stall = {
+            'time': time.time(),
+            'duration_ms': duration_ms,
+            'site': site,
+            'samples': samples
+        }
+        self.logger.warning(f"🐢 이벤트 루프 정지 {duration_ms:.0f}ms - 원인 위치 {site} "
+                            f"({site_samples}/{samples} 샘플)")
+
+        if self.report_count >= DataConfig.LOOP_STALL_MAX_REPORTS:
+            return
+        self.report_count += 1
+
+        os.makedirs(self.report_dir, exist_ok=True)
+        report_path = os.path.join(self.report_dir, f"stall_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.log")
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(f"정지 감지 시간: {datetime.now()}\n")
+            f.write(f"정지 시간: {duration_ms:.1f}ms (임계값 {self.stall_threshold * 1000:.0f}ms)\n")
+            f.write(f"스택 샘플: {samples}개 ({self.sample_interval * 1000:.0f}ms 간격)\n")
+
+            f.write("\n=== 원인 위치 (가장 안쪽 프로젝트 코드) ===\n")
+            for site, count in sites.most_common():
+                f.write(f"{count / samples * 100:5.1f}%  {count:5d}  {site}\n")
+
+            # 접힌 스택 형식 (flamegraph.pl / speedscope 입력 가능)
+            f.write("\n=== 스택 (접힌 형식: 스택 샘플수) ===\n")
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        self.logger.info(f"이벤트 루프 정지 리포트 저장: {report_path}")
+
+    def get_statistics(self) -> Dict:
+        """루프 지연/정지 통계"""
+        return {
+            'lag': self.lag_histogram.get_statistics(),
+            'stalls': self.stall_count,
+            'stall': self.stall_histogram.get_statistics(),
+            'reports': self.report_count,
+            'last_stall': self.last_stall
+        }
+
 class ConnectionStabilityMonitor(QObject):
     """
     키움 연결 안정성 모니터링
@@ -202,6 +368,10 @@ class ConnectionStabilityMonitor(QObject):
         """데이터 수신 시 호출"""
         self.last_data_time[stock_code] = time.time()
 
+    def forget_stock(self, stock_code: str):
+        """제거된 종목 수신 타임아웃 감시 중지"""
+        self.last_data_time.pop(stock_code, None)
+
 class ExceptionTracker:
     """
     예외 발생 추적 및 분석
@@ -305,6 +475,7 @@ class ComprehensiveMonitor:
         self.connection_monitor = ConnectionStabilityMonitor(kiwoom_client) if kiwoom_client else None
         self.exception_tracker = ExceptionTracker()
         self.file_monitor = FilePermissionMonitor(csv_dir)
+        self.loop_watchdog = EventLoopWatchdog() if DataConfig.LOOP_WATCHDOG_ENABLED else None
         
         # 이벤트 연결
         self.crash_detector.crash_detected.connect(self.on_crash_detected)
@@ -400,6 +571,12 @@ class ComprehensiveMonitor:
                 connected_count = sum(1 for log in recent_connections if log['connected'])
                 self.logger.info(f"최근 연결 상태: {connected_count}/{len(recent_connections)} 성공")
             
+            # 이벤트 루프 정지
+            if self.loop_watchdog and self.loop_watchdog.stall_count:
+                last_stall = self.loop_watchdog.last_stall
+                self.logger.warning(f"이벤트 루프 정지: {self.loop_watchdog.stall_count}회 "
+                                    f"(최근 {last_stall['duration_ms']:.0f}ms @ {last_stall['site']})")
+            
             # 예외 발생 현황
             if self.exception_tracker.exception_history:
                 recent_exceptions = len([exc for exc in self.exception_tracker.exception_history 
@@ -415,8 +592,15 @@ class ComprehensiveMonitor:
         if self.connection_monitor:
             self.connection_monitor.on_data_received(stock_code)
     
+    def on_stock_removed(self, stock_code: str):
+        """종목 제거 시 호출"""
+        if self.connection_monitor:
+            self.connection_monitor.forget_stock(stock_code)
+    
     def start_monitoring(self):
         """모니터링 시작"""
+        if self.loop_watchdog:
+            self.loop_watchdog.start()
         self.logger.info("🔍 종합 모니터링 시작")
         
     def stop_monitoring(self):
@@ -434,6 +618,9 @@ class ComprehensiveMonitor:
                 
             if hasattr(self, 'status_timer'):
                 self.status_timer.stop()
+            
+            if self.loop_watchdog:
+                self.loop_watchdog.stop()
                 
             self.logger.info("🔍 종합 모니터링 중지")
             
@@ -0,0 +1,122 @@
+"""
+이벤트 타임스탬프 서비스
+perf_counter_ns 단조 시계를 벽시계(Unix time)에 고정하여 나노초 수신시각 제공
+"""
+
+import time
+import logging
+from datetime import datetime
+
+from config import DataConfig
+
+class TickClock:
+    """
+    단조 증가 나노초 타임스탬프
+    - 시작 시 perf_counter_ns()를 time.time_ns()에 1회 고정 (anchor)
+    - 주기적으로 벽시계에 재동기화 (시계 보정 반영, 단 역행 없음)
+    - 동일 값이 두 번 나오지 않도록 최소 1ns씩 증가 보장 (수신 순서 보존)
+    """
+
+    # 재동기화 시 경고를 남길 벽시계 차이 (50ms)
+    DRIFT_WARNING_NS = 50_000_000
+
+    def __init__(self, resync_interval: float = None):
+        self.logger = logging.getLogger(__name__)
+
+        interval = resync_interval if resync_interval is not None else DataConfig.CLOCK_RESYNC_SECONDS
+        self.resync_interval_ns = int(interval * 1_000_000_000)
+
+        # 마지막으로 발급한 타임스탬프 (단조 증가 보장용)
+        self.last_ns = 0
+
+        # 재동기화 통계
+        self.resync_count = 0
+        self.last_drift_ns = 0
+
+        # 체결시간(HHMMSS) 변환용 자정 캐시 (ms)
+        self._midnight_ms = 0
+        self._next_midnight_ms = 0
+
+        self._anchor()
+
+    def _anchor(self):
+        """perf_counter_ns와 time_ns를 최대한 같은 시점에 읽어 고정"""
+        perf_before = time.perf_counter_ns()
+        wall = time.time_ns()
+        perf_after = time.perf_counter_ns()
+
+        self.anchor_perf_ns = (perf_before + perf_after) // 2
+        self.anchor_wall_ns = wall
+        self.next_resync_perf_ns = self.anchor_perf_ns + self.resync_interval_ns
+
+    def resync(self):
+        """벽시계 재동기화 (드리프트 측정 후 anchor 갱신)"""
+        projected_ns = self.anchor_wall_ns + (time.perf_counter_ns() - self.anchor_perf_ns)
+        self._anchor()
+
+        self.last_drift_ns = self.anchor_wall_ns - projected_ns
+        self.resync_count += 1
+
+        if abs(self.last_drift_ns) > self.DRIFT_WARNING_NS:
+            self.logger.warning(f"⚠️ 벽시계 보정 감지: {self.last_drift_ns / 1_000_000:+.1f}ms")
+
+    def now_ns(self) -> int:
+        """현재 시각 (Unix epoch 나노초, 단조 증가)"""
+        perf = time.perf_counter_ns()
+        if perf >= self.next_resync_perf_ns:
+            self.resync()
+            perf = time.perf_counter_ns()
+
+        ns = self.anchor_wall_ns + (perf - self.anchor_perf_ns)
+
+        # 벽시계가 뒤로 보정되어도 역행하지 않음
+        if ns <= self.last_ns:
+            ns = self.last_ns + 1
+        self.last_ns = ns
+        return ns
+
+    def now_ms(self) -> int:
+        """현재 시각 (Unix epoch 밀리초)"""
+        return self.now_ns() // 1_000_000
+
+    def exchange_time_ms(self, trade_time, ref_ns: int) -> int:
+        """
+        거래소 체결시간(FID 20, HHMMSS)을 Unix epoch 밀리초로 변환
+
+        Args:
+            trade_time: HHMMSS 문자열 또는 정수
+            ref_ns: 기준 수신시각 (나노초) - 해당 일자의 자정 기준으로 변환
+
+        Returns:
+            int: epoch 밀리초 (파싱 실패시 0)
+        """
+        try:
+            hhmmss = int(trade_time)
+        except (ValueError, TypeError):
+            return 0
+
+        hours, rest = divmod(hhmmss, 10000)
+        minutes, seconds = divmod(rest, 100)
+        if hours > 23 or minutes > 59 or seconds > 59:
+            return 0
+
+        ref_ms = ref_ns // 1_000_000
+        if not (self._midnight_ms <= ref_ms < self._next_midnight_ms):
+            self._update_midnight(ref_ms)
+
+        return self._midnight_ms + ((hours * 3600 + minutes * 60 + seconds) * 1000)
+
+    def _update_midnight(self, ref_ms: int):
+        """기준 시각이 속한 로컬 일자의 자정 (ms) 캐시 갱신"""
+        ref_dt = datetime.fromtimestamp(ref_ms / 1000)
+        midnight = ref_dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._midnight_ms = int(midnight.timestamp() * 1000)
+        self._next_midnight_ms = self._midnight_ms + 86_400_000
+
+    def get_status(self) -> dict:
+        """시계 상태 조회"""
+        return {
+            'resync_count': self.resync_count,
+            'last_drift_ms': self.last_drift_ns / 1_000_000,
+            'resync_interval_s': self.resync_interval_ns / 1_000_000_000
+        }
@@ -0,0 +1,55 @@
+"""
+KRX 호가가격단위 (유가증권/코스닥 주권 공통, 2023.01 개편 기준)
+ETF/ETN/ELW는 별도 격자(2,000원 미만 1원, 이상 5원)라 이 표와 맞지 않음 - 해당 종목의 틱 단위 컬럼은 사용하지 말 것
+가격대 경계 이분 탐색으로 호가단위 / 호가 격자 인덱스 조회
+- tick_index: 가격을 1원부터 센 호가 격자 순번으로 변환 → 두 가격 차이가 가격대를 넘어도 정확한 틱 수
+- 스프레드/호가 깊이/가격 변동을 틱 단위로 표현 (종목 간 가격 수준과 무관하게 비교)
+"""
+
+from bisect import bisect_right
+from typing import List
+
+# 가격대 (하한 포함, 상한 미포함 원, 호가단위 원) - 마지막 가격대는 상한 없음
+KRX_TICK_BANDS = [
+    (2_000, 1),
+    (5_000, 5),
+    (20_000, 10),
+    (50_000, 50),
+    (200_000, 100),
+    (500_000, 500),
+    (None, 1_000),
+]
+
+def _build_bands(bands):
+    """가격대 표 → (상한 목록, 가격대 하한, 호가단위, 가격대 시작 격자 인덱스) 미리 계산"""
+    uppers: List[int] = []
+    starts: List[int] = []
+    ticks: List[int] = []
+    offsets: List[int] = []
+    start = 0
+    offset = 0
+    for upper, tick in bands:
+        starts.append(start)
+        ticks.append(tick)
+        offsets.append(offset)
+        if upper is None:
+            break
+        uppers.append(upper)
+        offset += (upper - start) // tick
+        start = upper
+    return uppers, starts, ticks, offsets
+
+_BAND_UPPERS, _BAND_STARTS, _BAND_TICKS, _BAND_OFFSETS = _build_bands(KRX_TICK_BANDS)
+
+def tick_size(price: int) -> int:
+    """가격의 호가단위 (원)"""
+    return _BAND_TICKS[bisect_right(_BAND_UPPERS, price)]
+
+def tick_index(price: int) -> int:
+    """가격의 호가 격자 인덱스 (가격대마다 호가단위로 센 누적 순번, 격자 밖 가격은 내림)"""
+    band = bisect_right(_BAND_UPPERS, price)
+    return _BAND_OFFSETS[band] + (int(price) - _BAND_STARTS[band]) // _BAND_TICKS[band]
+
+def ticks_between(low: int, high: int) -> int:
+    """low → high 사이 호가 수 (high < low면 음수)"""
+    return tick_index(high) - tick_index(low)
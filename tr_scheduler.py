@@ -0,0 +1,357 @@
+"""
+TR 요청 스케줄러
+토큰 버킷 요청 제한 + 우선순위 큐 + 종목별 지터 주기 스케줄 + 시세과부하(-200) 적응형 백오프
+Qt 비의존 - QTimer에서 poll()만 주기적으로 호출
+"""
+
+import time
+import heapq
+import random
+import logging
+from itertools import count
+from typing import Callable, Dict, List, Optional
+
+from config import KiwoomConfig
+
+# TR 우선순위 (작을수록 먼저)
+PRIORITY_RETRY = 0        # 실패 재시도
+PRIORITY_PREV_HIGH = 1    # 전일고가 (opt10081) - 장 시작 전 1회
+PRIORITY_INVESTOR = 2     # 수급 갱신 (OPT10059)
+PRIORITY_DEFAULT = 3
+
+# 키움 CommRqData 오류 코드
+ERR_SISE_OVERFLOW = -200  # 시세과부하
+
+TR_ERROR_MESSAGES = {
+    -200: "시세과부하",
+    -201: "조회전문작성실패",
+    -202: "전문작성초기화실패"
+}
+
+class TokenBucket:
+    """
+    토큰 버킷 요청 제한
+    - capacity: 순간 최대 요청 수 (burst)
+    - rate: 초당 토큰 충전량
+    - 임의의 window 초 구간 요청 수 ≤ capacity + rate * window
+    """
+
+    def __init__(self, rate: float, capacity: float, now: float = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic() if now is None else now
+
+    @classmethod
+    def for_window(cls, limit: int, window_seconds: float, burst: int = 1, now: float = None) -> 'TokenBucket':
+        """'window_seconds 동안 최대 limit회' 제한을 어떤 구간에서도 넘지 않는 버킷 생성"""
+        burst = max(1, min(burst, limit))
+        rate = (limit - burst) / window_seconds if limit > burst else limit / window_seconds
+        return cls(rate, burst, now)
+
+    def available(self, now: float, scale: float = 1.0) -> bool:
+        """토큰 1개 사용 가능 여부 (scale: 충전속도 배율)"""
+        self._refill(now, scale)
+        return self.tokens >= 1.0
+
+    def consume(self, now: float, scale: float = 1.0):
+        """토큰 1개 사용"""
+        self._refill(now, scale)
+        self.tokens -= 1.0
+
+    def wait_time(self, now: float, scale: float = 1.0) -> float:
+        """토큰 1개가 충전될 때까지 남은 시간 (초)"""
+        self._refill(now, scale)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / (self.rate * scale)
+
+    def _refill(self, now: float, scale: float = 1.0):
+        elapsed = now - self.last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate * scale)
+            self.last_refill = now
+
+class TRJob:
+    """스케줄러 작업 (1회성 또는 주기)"""
+
+    __slots__ = ('key', 'send_fn', 'on_drop', 'base_priority', 'priority', 'interval', 'stock_code',
+                 'due', 'seq', 'attempts', 'cancelled')
+
+    def __init__(self, key: str, send_fn: Callable[[], int], priority: int,
+                 interval: Optional[float], stock_code: str, on_drop: Callable[[], None] = None):
+        self.key = key
+        self.send_fn = send_fn
+        self.on_drop = on_drop
+        self.base_priority = priority
+        self.priority = priority
+        self.interval = interval
+        self.stock_code = stock_code
+        self.due = 0.0
+        self.seq = 0
+        self.attempts = 0
+        self.cancelled = False
+
+class TRScheduler:
+    """
+    단일 TR 스케줄러
+    - 초/분/시간 토큰 버킷 (키움 조회 제한)
+    - 대기 힙(due 시각) → 준비 힙(우선순위) 2단계 큐
+    - 주기 작업은 지터를 준 다음 due로 재예약
+    - -200(시세과부하) 수신시 지수 백오프 + 충전속도 감속, 성공시 점진 회복
+    """
+
+    def __init__(self, now_fn: Callable[[], float] = None):
+        self.logger = logging.getLogger(__name__)
+        self.now_fn = now_fn or time.monotonic
+
+        now = self.now_fn()
+        self.buckets: List[TokenBucket] = [
+            TokenBucket.for_window(KiwoomConfig.TR_PER_SECOND, 1, KiwoomConfig.TR_BURST_PER_SECOND, now),
+            TokenBucket.for_window(KiwoomConfig.TR_PER_MINUTE, 60, KiwoomConfig.TR_BURST_PER_MINUTE, now),
+            TokenBucket.for_window(KiwoomConfig.TR_PER_HOUR, 3600, KiwoomConfig.TR_BURST_PER_HOUR, now),
+        ]
+
+        # 대기 힙: (due, seq, job) / 준비 힙: (priority, due, seq, job)
+        self.waiting: List = []
+        self.ready: List = []
+        self.jobs: Dict[str, TRJob] = {}
+        self._seq = count()
+
+        # 적응형 백오프
+        self.backoff_seconds = 0.0
+        self.backoff_until = 0.0
+        self.rate_scale = 1.0
+
+        self.paused = False
+
+        # 추가 발송 조건 (예: 응답 대기 화면번호 여유) - False면 이번 poll 발송 중단
+        self.dispatch_gate: Optional[Callable[[], bool]] = None
+
+        # 통계
+        self.sent_count = 0
+        self.throttled_count = 0
+        self.error_count = 0
+        self.dropped_count = 0
+
+    # ------------------------------------------------------------------------
+    # 작업 등록/취소
+    # ------------------------------------------------------------------------
+
+    def submit(self, key: str, send_fn: Callable[[], int], priority: int = PRIORITY_DEFAULT,
+               delay: float = 0.0, interval: float = None, stock_code: str = '',
+               on_drop: Callable[[], None] = None) -> TRJob:
+        """
+        TR 작업 등록 (같은 key의 기존 작업은 대체)
+
+        Args:
+            key: 작업 식별자 (예: "OPT10059:005930")
+            send_fn: 실제 요청 함수 - CommRqData 반환코드(int) 반환
+            priority: 우선순위 (PRIORITY_*)
+            delay: 첫 실행까지 지연 (초)
+            interval: 주기 작업 간격 (초), None이면 1회성
+            stock_code: 종목코드 (통계/로그용)
+            on_drop: 재시도 한도 초과로 버려질 때 호출
+        """
+        self.cancel(key)
+
+        job = TRJob(key, send_fn, priority, interval, stock_code, on_drop)
+        self.jobs[key] = job
+        self._push_waiting(job, self.now_fn() + delay)
+        return job
+
+    def cancel(self, key: str) -> bool:
+        """작업 취소 (힙에서는 lazy 삭제)"""
+        job = self.jobs.pop(key, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        return True
+
+    def reschedule(self, key: str, delay: float) -> bool:
+        """대기 중인 작업의 다음 실행 시각 변경"""
+        job = self.jobs.get(key)
+        if job is None:
+            return False
+
+        # 기존 힙 항목은 버리고 같은 작업을 새 due로 다시 넣음
+        job.cancelled = True
+        new_job = TRJob(job.key, job.send_fn, job.base_priority, job.interval, job.stock_code, job.on_drop)
+        new_job.attempts = job.attempts
+        self.jobs[key] = new_job
+        self._push_waiting(new_job, self.now_fn() + delay)
+        return True
+
+    def set_interval(self, key: str, interval: float) -> bool:
+        """주기 작업의 간격 변경 - 다음 실행을 지금부터 새 간격(지터 적용) 뒤로 재예약"""
+        job = self.jobs.get(key)
+        if job is None or not job.interval:
+            return False
+        job.interval = interval
+        return self.reschedule(key, self._jittered(interval))
+
+    def pause(self):
+        """발송 중지 (작업은 유지)"""
+        self.paused = True
+
+    def resume(self):
+        """발송 재개"""
+        self.paused = False
+
+    def _push_waiting(self, job: TRJob, due: float):
+        job.due = due
+        job.seq = next(self._seq)
+        heapq.heappush(self.waiting, (job.due, job.seq, job))
+
+    def _jittered(self, interval: float) -> float:
+        """주기에 ±TR_JITTER_RATIO 지터 적용 (종목별 요청이 한 시점에 몰리지 않도록)"""
+        jitter = interval * KiwoomConfig.TR_JITTER_RATIO
+        return interval + random.uniform(-jitter, jitter)
+
+    # ------------------------------------------------------------------------
+    # 발송
+    # ------------------------------------------------------------------------
+
+    def poll(self) -> int:
+        """
+        due가 지난 작업을 우선순위 순으로 토큰이 허용하는 만큼 발송
+
+        Returns:
+            int: 이번 호출에서 발송한 요청 수
+        """
+        now = self.now_fn()
+
+        # 1. due 도달 작업을 준비 힙으로 이동
+        waiting = self.waiting
+        while waiting and waiting[0][0] <= now:
+            due, seq, job = heapq.heappop(waiting)
+            if not job.cancelled:
+                heapq.heappush(self.ready, (job.priority, due, seq, job))
+
+        if self.paused or now < self.backoff_until:
+            return 0
+
+        # 2. 토큰이 허용하는 만큼 발송
+        sent = 0
+        ready = self.ready
+        while ready:
+            if self.dispatch_gate and not self.dispatch_gate():
+                break
+            if not all(bucket.available(now, self.rate_scale) for bucket in self.buckets):
+                break
+
+            priority, due, seq, job = heapq.heappop(ready)
+            if job.cancelled:
+                continue
+
+            for bucket in self.buckets:
+                bucket.consume(now, self.rate_scale)
+
+            self._dispatch(job, now)
+            sent += 1
+
+            if now < self.backoff_until:
+                break
+
+        return sent
+
+    def _dispatch(self, job: TRJob, now: float):
+        """작업 1건 발송 및 결과 처리"""
+        job.attempts += 1
+        try:
+            ret = job.send_fn()
+        except Exception as e:
+            self.logger.error(f"TR 발송 오류 ({job.key}): {e}")
+            ret = None
+
+        if ret == 0:
+            self.sent_count += 1
+            self._on_success()
+            job.attempts = 0
+            self._finish(job, now)
+            return
+
+        if ret == ERR_SISE_OVERFLOW:
+            self.throttled_count += 1
+            self._on_throttled(now)
+        else:
+            self.error_count += 1
+
+        error_msg = TR_ERROR_MESSAGES.get(ret, f"알수없는오류({ret})")
+        self.logger.warning(f"⚠️ TR 요청 실패 ({job.key}): {error_msg}, 시도 {job.attempts}회")
+
+        if job.attempts < KiwoomConfig.TR_MAX_RETRIES:
+            # 재시도 (최우선, 백오프 이후)
+            job.priority = PRIORITY_RETRY
+            self._push_waiting(job, max(now, self.backoff_until))
+        else:
+            self.dropped_count += 1
+            self.logger.error(f"❌ TR 재시도 한도 초과 ({job.key})")
+            job.attempts = 0
+            if job.on_drop:
+                try:
+                    job.on_drop()
+                except Exception as e:
+                    self.logger.error(f"TR 폐기 콜백 오류 ({job.key}): {e}")
+            self._finish(job, now)
+
+    def _finish(self, job: TRJob, now: float):
+        """발송 완료 후 주기 작업은 다음 due로 재예약, 1회성은 제거"""
+        if job.cancelled:
+            return
+
+        if job.interval:
+            job.priority = job.base_priority  # 재시도로 올라간 우선순위 복원
+            self._push_waiting(job, now + self._jittered(job.interval))
+        else:
+            self.jobs.pop(job.key, None)
+
+    # ------------------------------------------------------------------------
+    # 적응형 백오프
+    # ------------------------------------------------------------------------
+
+    def _on_throttled(self, now: float):
+        """시세과부하: 백오프 2배 + 충전속도 감속"""
+        if self.backoff_seconds <= 0:
+            self.backoff_seconds = KiwoomConfig.TR_BACKOFF_INITIAL
+        else:
+            self.backoff_seconds = min(self.backoff_seconds * 2, KiwoomConfig.TR_BACKOFF_MAX)
+
+        self.backoff_until = now + self.backoff_seconds
+        self.rate_scale = max(KiwoomConfig.TR_MIN_RATE_SCALE, self.rate_scale * 0.5)
+
+        self.logger.warning(
+            f"⚠️ [시세과부하] TR 백오프 {self.backoff_seconds:.1f}초, 요청속도 {self.rate_scale * 100:.0f}%"
+        )
+
+    def _on_success(self):
+        """성공: 백오프 및 충전속도 점진 회복"""
+        if self.backoff_seconds > 0:
+            self.backoff_seconds /= 2
+            if self.backoff_seconds < KiwoomConfig.TR_BACKOFF_INITIAL:
+                self.backoff_seconds = 0.0
+        if self.rate_scale < 1.0:
+            self.rate_scale = min(1.0, self.rate_scale * 1.1)
+
+    # ------------------------------------------------------------------------
+    # 상태 조회
+    # ------------------------------------------------------------------------
+
+    def pending_count(self) -> int:
+        """등록된 작업 수"""
+        return len(self.jobs)
+
+    def get_status(self) -> Dict:
+        """스케줄러 상태"""
+        now = self.now_fn()
+        return {
+            'pending_jobs': len(self.jobs),
+            'ready_jobs': sum(1 for entry in self.ready if not entry[3].cancelled),
+            'sent': self.sent_count,
+            'throttled': self.throttled_count,
+            'errors': self.error_count,
+            'dropped': self.dropped_count,
+            'paused': self.paused,
+            'backoff_remaining': max(0.0, self.backoff_until - now),
+            'rate_scale': self.rate_scale,
+        }
@@ -0,0 +1,234 @@
+"""
+런타임 관심종목(watchlist) 관리
+재시작 없이 수집 종목 추가/삭제 - 다른 종목의 지표 워밍업 상태 유지
+- 감시 파일: DataConfig.WATCHLIST_FILE (종목코드 목록) 변경시 파일 내용으로 전체 교체
+- 제어 소켓: 127.0.0.1:DataConfig.WATCHLIST_PORT 텍스트 명령 (ADD/REMOVE/SET/LIST)
+실제 반영은 등록된 핸들러(KiwoomDataCollector.add_stocks/remove_stocks)가 수행
+"""
+
+import os
+import re
+import logging
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from PyQt5.QtCore import QTimer
+
+from config import DataConfig
+
+# 종목코드 형식 (6자리 숫자/영대문자 - ETN 등 포함)
+STOCK_CODE_PATTERN = re.compile(r'^[0-9A-Z]{6}$')
+
+def parse_codes(text: str) -> List[str]:
+    """텍스트에서 종목코드 추출 (줄/쉼표/공백 구분, '#' 이후 주석) - 순서 유지, 중복 제거"""
+    codes = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0]
+        codes.extend(token.strip().upper() for token in re.split(r'[,\s;]+', line) if token.strip())
+    return list(dict.fromkeys(codes))
+
+class Watchlist:
+    """
+    수집 종목 목록 + 변경 소스(감시 파일, 제어 소켓)
+    - add/remove/replace: 핸들러가 실제로 반영한 종목만 목록에 반영
+    - API/소켓으로 바뀐 목록은 감시 파일에 기록 (재시작시 유지)
+    """
+
+    def __init__(self, stock_codes: Iterable[str], watch_file: str = None, port: int = None):
+        self.logger = logging.getLogger(__name__)
+
+        self.codes: List[str] = list(dict.fromkeys(stock_codes))
+        self.watch_file = DataConfig.WATCHLIST_FILE if watch_file is None else watch_file
+        self.port = DataConfig.WATCHLIST_PORT if port is None else port
+
+        # 반영 핸들러: fn(종목 목록) -> 실제 반영된 종목 목록
+        self.add_handler: Optional[Callable[[List[str]], List[str]]] = None
+        self.remove_handler: Optional[Callable[[List[str]], List[str]]] = None
+
+        # 감시 파일
+        self.file_mtime: Optional[float] = None
+        self.file_timer = QTimer()
+        self.file_timer.timeout.connect(self.check_file)
+
+        # 제어 소켓 (연결별 수신 버퍼)
+        self.server = None
+        self.client_buffers = {}
+
+    def set_handlers(self, add_handler: Callable, remove_handler: Callable):
+        """종목 추가/제거 반영 함수 설정"""
+        self.add_handler = add_handler
+        self.remove_handler = remove_handler
+
+    # ------------------------------------------------------------------------
+    # 변경 API
+    # ------------------------------------------------------------------------
+
+    def add(self, stock_codes: Iterable[str], persist: bool = True) -> List[str]:
+        """종목 추가 → 실제 추가된 종목"""
+        new_codes = [code for code in self._validate(stock_codes) if code not in self.codes]
+        if not new_codes:
+            return []
+
+        added = self.add_handler(new_codes) if self.add_handler else new_codes
+        self.codes.extend(added)
+        if added:
+            self.logger.info(f"➕ 관심종목 추가: {added} (총 {len(self.codes)}종목)")
+            if persist:
+                self.save_file()
+        return added
+
+    def remove(self, stock_codes: Iterable[str], persist: bool = True) -> List[str]:
+        """종목 제거 → 실제 제거된 종목"""
+        targets = [code for code in dict.fromkeys(stock_codes) if code in self.codes]
+        if not targets:
+            return []
+
+        removed = self.remove_handler(targets) if self.remove_handler else targets
+        self.codes = [code for code in self.codes if code not in set(removed)]
+        if removed:
+            self.logger.info(f"➖ 관심종목 제거: {removed} (총 {len(self.codes)}종목)")
+            if persist:
+                self.save_file()
+        return removed
+
+    def replace(self, stock_codes: Iterable[str], persist: bool = True) -> Tuple[List[str], List[str]]:
+        """목록 전체 교체 → (추가된 종목, 제거된 종목)"""
+        target = self._validate(stock_codes)
+        removed = self.remove([code for code in self.codes if code not in target], persist=False)
+        added = self.add(target, persist=False)
+        if persist and (added or removed):
+            self.save_file()
+        return added, removed
+
+    def _validate(self, stock_codes: Iterable[str]) -> List[str]:
+        valid = []
+        for code in dict.fromkeys(str(code).strip().upper() for code in stock_codes):
+            if STOCK_CODE_PATTERN.match(code):
+                valid.append(code)
+            else:
+                self.logger.warning(f"⚠️ 잘못된 종목코드 무시: '{code}'")
+        return valid
+
+    # ------------------------------------------------------------------------
+    # 감시 파일
+    # ------------------------------------------------------------------------
+
+    def start(self):
+        """감시 파일 폴링 및 제어 소켓 시작"""
+        if self.watch_file:
+            self.check_file()
+            self.file_timer.start(DataConfig.WATCHLIST_POLL_MS)
+            self.logger.info(f"관심종목 파일 감시 시작: {self.watch_file}")
+
+        if self.port:
+            self.start_server()
+
+    def stop(self):
+        """감시/소켓 중지"""
+        self.file_timer.stop()
+        if self.server:
+            self.server.close()
+            self.server = None
+
+    def check_file(self):
+        """감시 파일 변경 확인 (mtime) → 파일 목록으로 교체"""
+        try:
+            if not os.path.exists(self.watch_file):
+                return
+
+            mtime = os.path.getmtime(self.watch_file)
+            if mtime == self.file_mtime:
+                return
+            self.file_mtime = mtime
+
+            with open(self.watch_file, 'r', encoding='utf-8') as f:
+                codes = parse_codes(f.read())
+
+            # 저장 도중 잘린 파일/실수로 비운 파일로 전 종목이 해제되지 않도록 (전체 해제는 소켓 SET으로 명시)
+            if not any(STOCK_CODE_PATTERN.match(code) for code in codes):
+                self.logger.warning(f"⚠️ 관심종목 파일에 유효한 종목이 없어 무시: {self.watch_file}")
+                return
+
+            added, removed = self.replace(codes, persist=False)
+            if added or removed:
+                self.logger.info(f"관심종목 파일 반영: +{len(added)} -{len(removed)} → {len(self.codes)}종목")
+
+        except Exception as e:
+            self.logger.error(f"관심종목 파일 확인 실패: {e}")
+
+    def save_file(self):
+        """현재 목록을 감시 파일에 기록 (임시 파일 후 교체, 자기 기록은 재반영 안함)"""
+        if not self.watch_file:
+            return
+        try:
+            temp_file = f"{self.watch_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write("# 수집 종목 (한 줄에 하나, 수정하면 자동 반영)\n")
+                f.write("\n".join(self.codes) + "\n")
+            os.replace(temp_file, self.watch_file)
+            self.file_mtime = os.path.getmtime(self.watch_file)
+        except Exception as e:
+            self.logger.error(f"관심종목 파일 저장 실패: {e}")
+
+    # ------------------------------------------------------------------------
+    # 제어 소켓 (Qt 이벤트 루프에서 처리 - 별도 스레드 없음)
+    # ------------------------------------------------------------------------
+
+    def start_server(self) -> bool:
+        """로컬 제어 소켓 시작 (127.0.0.1만 허용)"""
+        from PyQt5.QtNetwork import QHostAddress, QTcpServer
+
+        self.server = QTcpServer()
+        self.server.newConnection.connect(self._on_new_connection)
+        if not self.server.listen(QHostAddress(QHostAddress.LocalHost), self.port):
+            self.logger.error(f"관심종목 제어 소켓 시작 실패 (포트 {self.port}): {self.server.errorString()}")
+            self.server = None
+            return False
+
+        self.logger.info(f"관심종목 제어 소켓: 127.0.0.1:{self.port} (ADD/REMOVE/SET/LIST)")
+        return True
+
+    def _on_new_connection(self):
+        while self.server and self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.client_buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._on_disconnected(s))
+
+    def _on_disconnected(self, socket):
+        self.client_buffers.pop(socket, None)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket):
+        buffer = self.client_buffers.get(socket, b"") + bytes(socket.readAll())
+        *lines, buffer = buffer.split(b"\n")
+        self.client_buffers[socket] = buffer
+
+        for line in lines:
+            reply = self.handle_command(line.decode('utf-8', errors='replace'))
+            socket.write((reply + "\n").encode('utf-8'))
+
+    def handle_command(self, line: str) -> str:
+        """
+        제어 명령 1줄 처리 → 응답 1줄
+            ADD 005930 000660 / REMOVE 005930 / SET 005930 000660 / LIST
+        """
+        parts = line.strip().split(None, 1)
+        if not parts:
+            return "ERR empty command"
+
+        command = parts[0].upper()
+        codes = parse_codes(parts[1]) if len(parts) > 1 else []
+        try:
+            if command == "ADD":
+                return f"OK added={','.join(self.add(codes))} total={len(self.codes)}"
+            if command == "REMOVE":
+                return f"OK removed={','.join(self.remove(codes))} total={len(self.codes)}"
+            if command == "SET":
+                added, removed = self.replace(codes)
+                return f"OK added={','.join(added)} removed={','.join(removed)} total={len(self.codes)}"
+            if command == "LIST":
+                return f"OK {','.join(self.codes)}"
+            return f"ERR unknown command: {command}"
+        except Exception as e:
+            self.logger.error(f"관심종목 명령 처리 실패 ({line.strip()}): {e}")
+            return f"ERR {e}"